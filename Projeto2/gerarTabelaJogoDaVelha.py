@@ -0,0 +1,16 @@
+"""
+Gera a tabela pré-calculada do jogo da velha (motorJogoDaVelha.ARQUIVO_TABELA)
+com a jogada perfeita e o valor de todas as posições alcançáveis.
+Uso: python gerarTabelaJogoDaVelha.py [arquivo]
+"""
+import sys
+
+from motorJogoDaVelha import ARQUIVO_TABELA, POSICAO_INVALIDA, gerarTabela
+
+if __name__ == '__main__':
+    caminho = sys.argv[1] if len(sys.argv) > 1 else ARQUIVO_TABELA
+    tabela = gerarTabela()
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(tabela)
+    posicoes = sum(entrada != POSICAO_INVALIDA for entrada in tabela)
+    print(f'{posicoes} posições gravadas em {caminho}.')
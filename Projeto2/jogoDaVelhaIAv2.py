@@ -1,5 +1,8 @@
 from tabulate import tabulate
 
+from motorJogoDaVelha import BOTS, JOGADORES, cheio, coordenada, \
+    deTabuleiro, jogadaDificil, venceu
+
 
 def validaEntradaCorreta(letra, numero):
     """
@@ -85,17 +88,8 @@ def confereGanhador(tabuleiro, jogador):
     :param jogador: jogador que fez ultima jogada.
     :return: True(se vitória) / False(se não vitória).
     """
-    vitoria = [
-        # Confere colunas
-        bool([True for col in ["A", "B", "C"] if tabuleiro[col].count(jogador) == 3]),
-        # Confere linhas
-        bool([True for i in range(3) if tabuleiro["A"][i] == tabuleiro["B"][i] == tabuleiro["C"][i] == jogador]),
-        # Confere diagonais
-        jogador == tabuleiro["A"][0] == tabuleiro["B"][1] == tabuleiro["C"][2],
-        jogador == tabuleiro["A"][2] == tabuleiro["B"][1] == tabuleiro["C"][0]
-    ]
-
-    if True in vitoria:
+    # Confere as 8 linhas de vitória (colunas, linhas e diagonais) no bitboard
+    if venceu(deTabuleiro(tabuleiro)[JOGADORES.index(jogador)]):
         parabenizaGanhador(tabuleiro, jogador)
         return True
     return False
@@ -107,7 +101,7 @@ def confereEmpate(tabuleiro):
     Parâmetros: tabuleiro
     Retorno: True(Empate)/False(Sem empate)
     """
-    if "" not in tabuleiro["A"] + tabuleiro["B"] + tabuleiro["C"]:
+    if cheio(*deTabuleiro(tabuleiro)):
         imprimiTabuleiro(tabuleiro)
         print("O jogo empatou!")
         return True
@@ -134,301 +128,19 @@ def confereFim(tabuleiro, jogador, placar):
     return acabou, placar
 
 
-def tentarFinalizarPartida(tabuleiro):
-    """
-    Confere se as sequencias possíveis de finalização de partida são possíveis.
-    :param tabuleiro: tabuleiro na situação atual do jogo.
-    :return: tabuleiro atualizado com jogada vencedora se houver condição de vitória,
-    senão False (jogada não possível).
-    """
-    if tabuleiro["A"][0] not in ["X", "O"] and \
-            ((tabuleiro["A"][1] == "X" and tabuleiro["A"][2] == "X") or
-             (tabuleiro["B"][0] == "X" and tabuleiro["C"][0] == "X") or
-             (tabuleiro["B"][1] == "X" and tabuleiro["C"][2] == "X")):
-        tabuleiro["A"][0] = "X"
-    elif tabuleiro["A"][1] not in ["X", "O"] and \
-            ((tabuleiro["A"][0] == "X" and tabuleiro["A"][2] == "X") or
-             (tabuleiro["B"][1] == "X" and tabuleiro["C"][1] == "X")):
-        tabuleiro["A"][1] = "X"
-    elif tabuleiro["A"][2] not in ["X", "O"] and \
-            ((tabuleiro["A"][0] == "X" and tabuleiro["A"][1] == "X") or
-             (tabuleiro["B"][2] == "X" and tabuleiro["C"][2] == "X") or
-             (tabuleiro["B"][1] == "X" and tabuleiro["C"][0] == "X")):
-        tabuleiro["A"][2] = "X"
-    elif tabuleiro["B"][0] not in ["X", "O"] and \
-            ((tabuleiro["A"][0] == "X" and tabuleiro["C"][0] == "X") or
-             (tabuleiro["B"][1] == "X" and tabuleiro["B"][2] == "X")):
-        tabuleiro["B"][0] = "X"
-    elif tabuleiro["B"][1] not in ["X", "O"] and \
-            ((tabuleiro["B"][0] == "X" and tabuleiro["B"][2] == "X") or
-             (tabuleiro["A"][1] == "X" and tabuleiro["C"][1] == "X") or
-             (tabuleiro["C"][0] == "X" and tabuleiro["A"][2] == "X") or
-             (tabuleiro["A"][0] == "X" and tabuleiro["C"][2] == "X")):
-        tabuleiro["B"][1] = "X"
-    elif tabuleiro["B"][2] not in ["X", "O"] and \
-            ((tabuleiro["B"][0] == "X" and tabuleiro["B"][1] == "X") or
-             (tabuleiro["A"][2] == "X" and tabuleiro["C"][2] == "X")):
-        tabuleiro["B"][2] = "X"
-    elif tabuleiro["C"][0] not in ["X", "O"] and \
-            ((tabuleiro["A"][0] == "X" and tabuleiro["B"][0] == "X") or
-             (tabuleiro["C"][1] == "X" and tabuleiro["C"][2] == "X") or
-             (tabuleiro["B"][1] == "X" and tabuleiro["A"][2] == "X")):
-        tabuleiro["C"][0] = "X"
-    elif tabuleiro["C"][1] not in ["X", "O"] and \
-            ((tabuleiro["C"][0] == "X" and tabuleiro["C"][2] == "X") or
-             (tabuleiro["A"][1] == "X" and tabuleiro["B"][1] == "X")):
-        tabuleiro["C"][1] = "X"
-    elif tabuleiro["C"][2] not in ["X", "O"] and \
-            ((tabuleiro["C"][0] == "X" and tabuleiro["C"][1] == "X") or
-             (tabuleiro["A"][2] == "X" and tabuleiro["B"][2] == "X") or
-             (tabuleiro["A"][0] == "X" and tabuleiro["B"][1] == "X")):
-        tabuleiro["C"][2] = "X"
-    else:
-        return False
-    return tabuleiro
-
-
-def impedirJogadaAdversaria(tabuleiro):
-    """
-    Confere se as sequencias possíveis de impedir uma futura jogada vencedora adversária são possíveis.
-    :param tabuleiro: tabuleiro na situação atual do jogo.
-    :return: tabuleiro atualizado com jogada defensiva se houver condição de
-    impedir futura jogada vencedora adversária, senão False (jogada não possível).
-    """
-    # Tentar bloquear jogada casa a casa
-    if tabuleiro["A"][0] not in ["X", "O"] and \
-            ((tabuleiro["A"][1] == "O" and tabuleiro["A"][2] == "O") or
-             (tabuleiro["B"][0] == "O" and tabuleiro["C"][0] == "O") or
-             (tabuleiro["B"][1] == "O" and tabuleiro["C"][2] == "O")):
-        tabuleiro["A"][0] = "X"
-    elif tabuleiro["A"][1] not in ["X", "O"] and \
-            ((tabuleiro["B"][1] == "O" and tabuleiro["C"][1] == "O") or
-             (tabuleiro["A"][0] == "O" and tabuleiro["A"][2] == "O")):
-        tabuleiro["A"][1] = "X"
-    elif tabuleiro["A"][2] not in ["X", "O"] and \
-            ((tabuleiro["A"][0] == "O" and tabuleiro["A"][1] == "O") or
-             (tabuleiro["B"][1] == "O" and tabuleiro["C"][0] == "O") or
-             (tabuleiro["B"][2] == "O" and tabuleiro["C"][2] == "O")):
-        tabuleiro["A"][2] = "X"
-    elif tabuleiro["B"][0] not in ["X", "O"] and \
-            ((tabuleiro["A"][0] == "O" and tabuleiro["C"][0] == "O") or
-             (tabuleiro["B"][1] == "O" and tabuleiro["B"][2] == "O")):
-        tabuleiro["B"][0] = "X"
-    elif tabuleiro["B"][1] not in ["X", "O"] and \
-            ((tabuleiro["B"][0] == "O" and tabuleiro["B"][2] == "O") or
-             (tabuleiro["A"][1] == "O" and tabuleiro["C"][1] == "O") or
-             (tabuleiro["C"][0] == "O" and tabuleiro["A"][2] == "O") or
-             (tabuleiro["A"][0] == "O" and tabuleiro["C"][2] == "O")):
-        tabuleiro["B"][1] = "X"
-    elif tabuleiro["B"][2] not in ["X", "O"] and \
-            ((tabuleiro["A"][2] == "O" and tabuleiro["C"][2] == "O") or
-             (tabuleiro["B"][0] == "O" and tabuleiro["B"][1] == "O")):
-        tabuleiro["B"][2] = "X"
-    elif tabuleiro["C"][0] not in ["X", "O"] and \
-            ((tabuleiro["A"][0] == "O" and tabuleiro["B"][0] == "O") or
-             (tabuleiro["B"][1] == "O" and tabuleiro["A"][2] == "O") or
-             (tabuleiro["C"][1] == "O" and tabuleiro["C"][2] == "O")):
-        tabuleiro["C"][0] = "X"
-    elif tabuleiro["C"][1] not in ["X", "O"] and \
-            ((tabuleiro["A"][1] == "O" and tabuleiro["B"][1] == "O") or
-             (tabuleiro["C"][0] == "O" and tabuleiro["C"][2] == "O")):
-        tabuleiro["C"][1] = "X"
-    elif tabuleiro["C"][2] not in ["X", "O"] and \
-            ((tabuleiro["A"][0] == "O" and tabuleiro["B"][1] == "O") or
-             (tabuleiro["A"][2] == "O" and tabuleiro["B"][2] == "O") or
-             (tabuleiro["C"][0] == "O" and tabuleiro["C"][1] == "O")):
-        tabuleiro["C"][2] = "X"
-    else:
-        return False
-    return tabuleiro
-
-
-def montarEstrategia(tabuleiro, rodada, iniciador):
-    """
-    Monta uma situação estratégica dependendo do inciador da partida (iniciador)
-    e também da rodada atual da partida (rodada). Jogada essa tanto defensiva,
-    quanto ofensiva.
-    :param tabuleiro: tabuleiro na situação atual do jogo.
-    :param rodada: rodada atual da partida.
-    :param iniciador: iniciador da partida (0 -> bot | 1 -> usuário).
-    :return: tabuleiro atualizado com jogada estratégica se for possível
-    montar estratégia, senão False.
-    """
-    # Se o bot iniciou:
-    if iniciador == 0:
-        if rodada == 1:
-            if tabuleiro["B"][1] not in ["X", "O"] and (
-                    tabuleiro["A"][0] == "O"
-                    or tabuleiro["A"][2] == "O"
-                    or tabuleiro["C"][0] == "O"
-                    or tabuleiro["C"][2] == "O"
-            ):
-                tabuleiro["B"][1] = "X"
-            else:
-                tabuleiro["A"][0] = "X"
-
-        elif rodada == 2:
-            if tabuleiro["B"][1] == "O":
-                tabuleiro["C"][2] = "X"
-            elif ((tabuleiro["B"][0] == "O" or tabuleiro["C"][0] == "O") or
-                  (tabuleiro["B"][2] == "O" or tabuleiro["C"][2] == "O")):
-                tabuleiro["A"][2] = "X"
-            else:
-                tabuleiro["C"][0] = "X"
-        elif tabuleiro["B"][0] == "O" and tabuleiro["A"][1] == "O":
-            tabuleiro["B"][1] = "X"
-        elif tabuleiro["C"][0] not in ["X", "O"]:
-            tabuleiro["C"][0] = "X"
-        elif tabuleiro["A"][2] not in ["X", "O"]:
-            tabuleiro["A"][2] = "X"
-        else:
-            tabuleiro["C"][2] = "X"
-    # Se o bot nao iniciou:
-    elif iniciador == 1:
-        if rodada == 1:
-            if tabuleiro["B"][1] == "O":
-                tabuleiro["A"][0] = "X"
-            else:
-                tabuleiro["B"][1] = "X"
-        elif rodada == 2:
-            if tabuleiro["B"][0] not in ["X", "O"] and \
-                    ((tabuleiro["A"][0] == "O" and tabuleiro["C"][2] == "O") or
-                     (tabuleiro["C"][0] == "O" and tabuleiro["A"][2])):
-                tabuleiro["B"][0] = "X"
-            elif tabuleiro["A"][2] not in ["X", "O"] and \
-                    ((tabuleiro["B"][1] == "O" and tabuleiro["C"][2] == "O") or
-                     (tabuleiro["A"][1] == "O" and tabuleiro["B"][2] == "O") or
-                     (tabuleiro["A"][1] == "O" and tabuleiro["C"][1] == "O")):
-                tabuleiro["A"][2] = "X"
-            elif tabuleiro["A"][0] not in ["X", "O"] and \
-                    tabuleiro["A"][1] == "O" and tabuleiro["B"][0] == "O":
-                tabuleiro["A"][0] = "X"
-            elif tabuleiro["C"][0] not in ["X", "O"] and \
-                    tabuleiro["B"][0] == "O" and tabuleiro["C"][1] == "O":
-                tabuleiro["C"][0] = "X"
-            elif tabuleiro["C"][2] not in ["X", "O"] and \
-                    tabuleiro["B"][2] == "O" and tabuleiro["C"][1] == "O":
-                tabuleiro["C"][2] = "X"
-            elif tabuleiro["B"][2] not in ["X", "O"]:
-                tabuleiro["B"][2] = "X"
-            else:
-                tabuleiro["A"][2] = "X"
-
-        elif tabuleiro["A"][0] not in ["X", "O"] and \
-                tabuleiro["A"][1] == "O" and tabuleiro["B"][0] == "O":
-            tabuleiro["A"][0] = "X"
-        elif tabuleiro["C"][0] not in ["X", "O"] and \
-                tabuleiro["B"][0] == "O" and tabuleiro["C"][1] == "O":
-            tabuleiro["C"][0] = "X"
-        elif tabuleiro["C"][2] not in ["X", "O"] and \
-                tabuleiro["B"][2] == "O" and tabuleiro["C"][1] == "O":
-            tabuleiro["C"][2] = "X"
-        elif tabuleiro["A"][2] not in ["X", "O"] and \
-                ((tabuleiro["A"][1] == "O" and tabuleiro["B"][2] == "O") or
-                 (tabuleiro["A"][1] == "O" and tabuleiro["B"][0] == "O" and
-                  tabuleiro["C"][2] not in ["X", "O"] and
-                  tabuleiro["C"][0] not in ["X", "O"])):
-            tabuleiro["A"][2] = "X"
-        elif tabuleiro["A"][1] not in ["X", "O"] and \
-                (tabuleiro["B"][0] == "O" and tabuleiro["B"][2] == "O" and
-                 tabuleiro["A"][0] not in ["X", "O"] and
-                 tabuleiro["C"][1] not in ["X", "O"] or
-                 (tabuleiro["B"][1] == "O" and tabuleiro["C"][2] == "O")):
-            tabuleiro["A"][1] = "X"
-        else:
-            tabuleiro = False
-
-    return tabuleiro
-
-
-def buscarEspacoVazio(tabuleiro):
+def jogadaMaquina(tabuleiro, nivel):
     """
-    Busca um espaço vazio no tabuleiro, nas casas:
-    ( [A][1], [B][0], [B][2], [C][1] ), visto que são melhores que as casas
-    das pontas.
+    Processa a jogada que deve ser feita pela máquina de acordo com o nível
+    do jogo (as mesmas jogadas do simulador, em motorJogoDaVelha.BOTS).
     :param tabuleiro: tabuleiro na situação atual do jogo.
-    :return: tabuleiro atualizado com a marcação na primeira casa vazia disponível.
-    """
-    if tabuleiro["A"][1] not in ["X", "O"]:
-        tabuleiro["A"][1] = "X"
-    elif tabuleiro["B"][0] not in ["X", "O"]:
-        tabuleiro["B"][0] = "X"
-    elif tabuleiro["B"][2] not in ["X", "O"]:
-        tabuleiro["B"][2] = "X"
-    else:
-        tabuleiro["C"][1] = "X"
-    return tabuleiro
-
-
-def escolherEspacoAleatorio(tabuleiro):
-    """
-    Escolhe um espaço vazio aleatório no tabuleiro (usado para bot dos níveis 'easy' e 'medium'.
-    :param tabuleiro: tabuleiro na situação atual do jogo.
-    :return: tabuleiro atualizado com a marcação na primeira casa aleatória e vazia disponível.
+    :param nivel: nível do jogo ('easy', 'medium', 'hard').
+    :return: tabuleiro atualizado com jogada.
     """
-    from random import choice
-    col = choice(["A", "B", "C"])
-    lin = choice(list(range(0, 3)))
-    while tabuleiro[col][lin] in ["O", "X"]:
-        col = choice(["A", "B", "C"])
-        lin = choice(list(range(3)))
+    x, o = deTabuleiro(tabuleiro)
+    col, lin = coordenada(BOTS.get(nivel, jogadaDificil)(x, o))
     tabuleiro[col][lin] = "X"
     return tabuleiro
 
-def jogadaMaquina(*parametros):
-    """
-    Processa a jogada que deve ser feita pela máquina de acordo com
-    a rodada atual (jogada), iniciador da partida (iniciador) e nível do jogo.
-    :param parametros: tabuleiro, jogada, iniciador, nivel
-    :return: tabuleiro atualizado com jogada.
-    """
-    # tabuleiro, jogada, iniciador, nivel
-    # idx: 0        1         2       3
-    match parametros:
-        case _, _, _, 'easy':
-            return sequenciaFIMBE(parametros[0], cmd='E')
-        case _, _, _, 'medium':
-            return sequenciaFIMBE(tabuleiro, cmd='IE')
-        case _, 1, 0, _:
-            parametros[0]["A"][0] = "X"
-            return parametros[0]
-        case (_, 1, 1, _) | (_, 2, 0, _):
-            return sequenciaFIMBE(parametros[0], parametros[1], parametros[2], 'M')
-        case _, 2 | 3, _, _:
-            return sequenciaFIMBE(parametros[0], parametros[1], parametros[2])
-        case _, 4, _, _:
-            return sequenciaFIMBE(parametros[0], cmd='FIB')
-        case _, _, _, _:
-            return sequenciaFIMBE(parametros[0], cmd='B')
-
-
-def sequenciaFIMBE(tabuleiro, jogada=None, iniciador=None, cmd='FIMBE'):
-    """
-    Tenta Finalizar, Impedir jogada, Montar estratégia, Buscar um espaço vazio
-    estrategico para jogar ou entao Encontrar um espaço vazio,
-    seguindo toda essa ordem.
-    :param tabuleiro: tabuleiro
-    :param jogada: jogada maquina
-    :param iniciador: iniciador da partida ( 0 -> bot 'X' | 1 -> usuario 'O" ).
-    :return: tabuleiro atualizado com jogada do bot.
-    """
-    for comando in cmd:
-        if comando == 'F':
-            jogada = tentarFinalizarPartida(tabuleiro)
-        elif comando == 'I':
-            jogada = impedirJogadaAdversaria(tabuleiro)
-        elif comando == 'M':
-            jogada = montarEstrategia(tabuleiro, jogada, iniciador)
-        elif comando == 'B':
-            jogada = buscarEspacoVazio(tabuleiro)
-        elif comando == 'E':
-            return escolherEspacoAleatorio(tabuleiro)
-        if jogada is False:
-            continue
-        else:
-            return jogada
-
-
 
 def jogarNovamente():
     """
@@ -451,8 +163,8 @@ def escolherNivel():
     Usuário determina nível do bot que deseja enfrentar.
     easy -> joga em lugar aleatório que seja vazio.
     medium -> joga igual o nivel 'easy', porém prioriza impedir vitória do usuário quando possível.
-    hard -> monta estratégia de jogada desde a primeira rodada, pririozando em
-    ordem: vencer, impedir vitoria adversária, montar um contra-golpe, enfim empate.
+    hard -> joga perfeitamente (tabela pré-calculada): nunca perde e vence sempre que
+    o usuário errar.
     :return: nivel (string do nível que usuário selecionou ['easy', 'medium', 'hard']).
     """
     print('-' * 36)
@@ -465,7 +177,7 @@ def escolherNivel():
         print(f'Nivel {niveis[cod_nivel].title()} selecionado.')
     except:
         print('Por favor, digite um código do item válido.')
-        escolherNivel()
+        return escolherNivel()
     else:
         return niveis[cod_nivel]
 
@@ -483,56 +195,57 @@ def mostrarPlacar(placar):
     print('*' * 21)
 
 
-# String para acompanhar qual o jogador da vez
-bot = "X"
-jogador = "O"
-# Flag para continuar o jogo, ate usuario decidir sair
-continuar = True
-# Placar do jogo:
-placar = {'O': 0, 'X': 0}
-# Definindo quem inicia: 0 -> Bot | 1-> Usuário
-iniciar = 0
-# Determina o nível das partidas.
-nivel = escolherNivel()
-
-print(
-    "Instruções:\nDigite as coordenadas da sua jogada no formato letra e numero (Ex: 'A 1', 'B 2', 'C 3', etc)\n")
-# Loop enquanto jogo não acabar que cicla em jogada da maquina e jogada do usuario com as devidas validações de entrada e fim de jogo
-while continuar:
-    # Dicionário para registro do jogo
-    tabuleiro = {
-        " ": ["1", "2", "3"],
-        "A": ["", "", ""],
-        "B": ["", "", ""],
-        "C": ["", "", ""]
-    }
-    # Flag que é acionada para definir que o jogo acabou (vitoria, derrota, empate).
-    acabou = False
-    rodada = 0
-    mostrarPlacar(placar)
-    if iniciar == 0:
-        print('Máquina começa (X)')
-        while not acabou:
-            rodada += 1
-            print(f'Rodada: {rodada}')
-            tabuleiro = jogadaMaquina(tabuleiro, rodada, iniciar, nivel)
-            acabou, placar = confereFim(tabuleiro, bot, placar)
-            imprimiTabuleiro(tabuleiro)
-            if not acabou:
+if __name__ == '__main__':
+    # String para acompanhar qual o jogador da vez
+    bot = "X"
+    jogador = "O"
+    # Flag para continuar o jogo, ate usuario decidir sair
+    continuar = True
+    # Placar do jogo:
+    placar = {'O': 0, 'X': 0}
+    # Definindo quem inicia: 0 -> Bot | 1-> Usuário
+    iniciar = 0
+    # Determina o nível das partidas.
+    nivel = escolherNivel()
+
+    print(
+        "Instruções:\nDigite as coordenadas da sua jogada no formato letra e numero (Ex: 'A 1', 'B 2', 'C 3', etc)\n")
+    # Loop enquanto jogo não acabar que cicla em jogada da maquina e jogada do usuario com as devidas validações de entrada e fim de jogo
+    while continuar:
+        # Dicionário para registro do jogo
+        tabuleiro = {
+            " ": ["1", "2", "3"],
+            "A": ["", "", ""],
+            "B": ["", "", ""],
+            "C": ["", "", ""]
+        }
+        # Flag que é acionada para definir que o jogo acabou (vitoria, derrota, empate).
+        acabou = False
+        rodada = 0
+        mostrarPlacar(placar)
+        if iniciar == 0:
+            print('Máquina começa (X)')
+            while not acabou:
+                rodada += 1
+                print(f'Rodada: {rodada}')
+                tabuleiro = jogadaMaquina(tabuleiro, nivel)
+                acabou, placar = confereFim(tabuleiro, bot, placar)
+                imprimiTabuleiro(tabuleiro)
+                if not acabou:
+                    tabuleiro = jogada(tabuleiro, jogador)
+                    acabou, placar = confereFim(tabuleiro, jogador, placar)
+        else:
+            print('Você começa (O)')
+            while not acabou:
+                rodada += 1
+                print(f'Rodada: {rodada}')
+                imprimiTabuleiro(tabuleiro)
                 tabuleiro = jogada(tabuleiro, jogador)
                 acabou, placar = confereFim(tabuleiro, jogador, placar)
-    else:
-        print('Você começa (O)')
-        while not acabou:
-            rodada += 1
-            print(f'Rodada: {rodada}')
-            imprimiTabuleiro(tabuleiro)
-            tabuleiro = jogada(tabuleiro, jogador)
-            acabou, placar = confereFim(tabuleiro, jogador, placar)
-            if not acabou:
-                tabuleiro = jogadaMaquina(tabuleiro, rodada, iniciar, nivel)
-                acabou, placar = confereFim(tabuleiro, bot, placar)
+                if not acabou:
+                    tabuleiro = jogadaMaquina(tabuleiro, nivel)
+                    acabou, placar = confereFim(tabuleiro, bot, placar)
 
-    # Trocando a ordem do jogador.
-    iniciar = (iniciar + 1) % 2
-    continuar = jogarNovamente()
+        # Trocando a ordem do jogador.
+        iniciar = (iniciar + 1) % 2
+        continuar = jogarNovamente()
@@ -0,0 +1,528 @@
+"""
+Núcleo do jogo da velha em bitboards: cada jogador é uma máscara de 9 bits
+com as casas que marcou, a casa (coluna, linha) sendo o bit
+coluna * 3 + linha (A1 = bit 0, A2 = bit 1, ..., C3 = bit 8).
+
+Os adaptadores deTabuleiro / paraTabuleiro convertem de e para o
+dicionário usado pela interface (tabuleiro["A"][0] == "X"), de modo que
+imprimiTabuleiro e as funções de entrada continuam usando o dicionário.
+
+melhorJogada escolhe a jogada perfeita (nível 'hard') com uma busca negamax
+com poda alfa-beta e tabela de transposição; as posições ja avaliadas
+ficam nas tabelas do módulo e as próximas consultas são imediatas.
+
+As tabelas da busca são indexadas pela forma canônica da posição (canonica:
+a menor entre as 8 posições obtidas por rotações e reflexões), de modo que
+posições simétricas são avaliadas uma única vez; a jogada escolhida na
+forma canônica volta ao tabuleiro original com destransformarCasa.
+
+A tabela completa (jogada perfeita e valor de todas as posições
+alcançáveis) fica pré-calculada em ARQUIVO_TABELA, gerado por
+gerarTabelaJogoDaVelha.py e lido na primeira consulta (jogadaDaTabela).
+
+BOTS reúne as jogadas da máquina em cada nível ('easy', 'medium', 'hard'),
+usadas pela interface (jogoDaVelhaIAv2.py) e pelo simulador (simulador.py).
+"""
+import os
+import random
+
+COLUNAS = ("A", "B", "C")
+# Jogadores na ordem das máscaras devolvidas por deTabuleiro.
+JOGADORES = ("X", "O")
+CHEIO = 0b111111111
+# As 8 linhas de vitória: 3 colunas, 3 linhas e 2 diagonais.
+LINHAS_VITORIA = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+
+def casa(coluna, linha):
+    """
+    Retorna o índice da casa no bitboard.
+    :param coluna: "A", "B" ou "C".
+    :param linha: índice da linha (0 a 2).
+    :return: índice da casa (0 a 8).
+    """
+    return COLUNAS.index(coluna) * 3 + linha
+
+
+def coordenada(indice):
+    """
+    Retorna a coluna e a linha da casa (inverso de casa).
+    :param indice: índice da casa (0 a 8).
+    :return: (coluna, linha).
+    """
+    return COLUNAS[indice // 3], indice % 3
+
+
+def deTabuleiro(tabuleiro):
+    """
+    Converte o tabuleiro da interface em bitboards.
+    :param tabuleiro: dicionário {"A": [...], "B": [...], "C": [...]}.
+    :return: (mascara do X, mascara do O).
+    """
+    mascaras = [0, 0]
+    for c, coluna in enumerate(COLUNAS):
+        for linha, marca in enumerate(tabuleiro[coluna]):
+            if marca in JOGADORES:
+                mascaras[JOGADORES.index(marca)] |= 1 << (c * 3 + linha)
+    return mascaras[0], mascaras[1]
+
+
+def paraTabuleiro(x, o, tabuleiro=None):
+    """
+    Converte bitboards no tabuleiro da interface.
+    :param x: máscara do X.
+    :param o: máscara do O.
+    :param tabuleiro: dicionário a atualizar (padrão: um novo, com a
+    coluna de cabeçalho " ").
+    :return: tabuleiro com as marcas das máscaras.
+    """
+    if tabuleiro is None:
+        tabuleiro = {" ": ["1", "2", "3"]}
+    for c, coluna in enumerate(COLUNAS):
+        tabuleiro[coluna] = ["X" if x >> (c * 3 + linha) & 1 else
+                             "O" if o >> (c * 3 + linha) & 1 else ""
+                             for linha in range(3)]
+    return tabuleiro
+
+
+def venceu(mascara):
+    """
+    Confere se as casas da máscara completam alguma linha de vitória.
+    :param mascara: máscara de um jogador.
+    :return: True(se vitória) / False(se não vitória).
+    """
+    for linha in LINHAS_VITORIA:
+        if mascara & linha == linha:
+            return True
+    return False
+
+
+def casasVazias(x, o):
+    """
+    Retorna a máscara das casas ainda sem marca.
+    :param x: máscara do X.
+    :param o: máscara do O.
+    :return: máscara das casas vazias.
+    """
+    return CHEIO & ~(x | o)
+
+
+def cheio(x, o):
+    """
+    Confere se todas as casas estão marcadas.
+    :param x: máscara do X.
+    :param o: máscara do O.
+    :return: True(se cheio) / False(se há casa vazia).
+    """
+    return x | o == CHEIO
+
+
+def indicesVazios(x, o):
+    """
+    Lista os índices das casas vazias, em ordem.
+    :param x: máscara do X.
+    :param o: máscara do O.
+    :return: lista de índices (0 a 8).
+    """
+    vazias = casasVazias(x, o)
+    return [indice for indice in range(9) if vazias >> indice & 1]
+
+
+def chave(jogador, adversario):
+    """
+    Retorna a chave da posição (única para cada par de máscaras) usada
+    nas tabelas do motor.
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :return: inteiro de 18 bits.
+    """
+    return jogador | adversario << 9
+
+
+# As 8 simetrias do tabuleiro (rotações e reflexões), como funções da
+# (coluna, linha) de uma casa: identidade, rotações de 90, 180 e 270 graus,
+# reflexões que trocam as colunas A e C, as linhas 1 e 3, e as duas
+# diagonais.
+_SIMETRIAS = (
+    lambda col, lin: (col, lin), lambda col, lin: (lin, 2 - col),
+    lambda col, lin: (2 - col, 2 - lin), lambda col, lin: (2 - lin, col),
+    lambda col, lin: (2 - col, lin), lambda col, lin: (col, 2 - lin),
+    lambda col, lin: (lin, col), lambda col, lin: (2 - lin, 2 - col),
+)
+# PERMUTACOES[s][i]: casa para onde a simetria s leva a casa i;
+# INVERSAS[s] desfaz a simetria s.
+PERMUTACOES = tuple(tuple(3 * col + lin for col, lin in
+                          (simetria(i // 3, i % 3) for i in range(9)))
+                    for simetria in _SIMETRIAS)
+INVERSAS = tuple(tuple(permutacao.index(i) for i in range(9))
+                 for permutacao in PERMUTACOES)
+# _IMAGENS[s][mascara]: máscara levada pela simetria s.
+_IMAGENS = tuple(tuple(sum(1 << permutacao[i] for i in range(9)
+                           if mascara >> i & 1) for mascara in range(512))
+                 for permutacao in PERMUTACOES)
+
+
+def transformarCasa(indice, simetria):
+    """
+    Leva uma casa pela simetria.
+    :param indice: índice da casa (0 a 8).
+    :param simetria: índice da simetria (0 a 7; 0 é a identidade).
+    :return: índice da casa transformada.
+    """
+    return PERMUTACOES[simetria][indice]
+
+
+def destransformarCasa(indice, simetria):
+    """
+    Desfaz a simetria em uma casa (inverso de transformarCasa).
+    :param indice: índice da casa na posição transformada.
+    :param simetria: índice da simetria aplicada.
+    :return: índice da casa na posição original.
+    """
+    return INVERSAS[simetria][indice]
+
+
+def transformarMascara(mascara, simetria):
+    """
+    Leva todas as casas de uma máscara pela simetria.
+    :param mascara: máscara de 9 bits.
+    :param simetria: índice da simetria (0 a 7).
+    :return: máscara transformada.
+    """
+    return _IMAGENS[simetria][mascara]
+
+
+def transformarSequencia(casas, simetria):
+    """
+    Leva pela simetria qualquer codificação casa a casa do tabuleiro (lista,
+    tupla ou texto de 9 posições na ordem dos índices, ex.: "X O  XO  ").
+    :param casas: sequência de 9 valores.
+    :param simetria: índice da simetria (0 a 7).
+    :return: sequência transformada, do mesmo tipo (list para listas).
+    """
+    transformada = [None] * 9
+    for indice, valor in enumerate(casas):
+        transformada[PERMUTACOES[simetria][indice]] = valor
+    if isinstance(casas, str):
+        return "".join(transformada)
+    return type(casas)(transformada)
+
+
+def canonica(jogador, adversario):
+    """
+    Forma canônica da posição: a menor (pela chave) entre as 8 posições
+    simétricas a ela. Posições simétricas têm a mesma forma canônica.
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :return: (jogador, adversario, simetria): máscaras da forma canônica e
+    a simetria que leva a posição até ela (desfeita com destransformarCasa).
+    """
+    menor, escolhida = chave(jogador, adversario), 0
+    for simetria in range(1, 8):
+        imagens = _IMAGENS[simetria]
+        candidata = imagens[jogador] | imagens[adversario] << 9
+        if candidata < menor:
+            menor, escolhida = candidata, simetria
+    return menor & CHEIO, menor >> 9, escolhida
+
+
+def canonicaTabuleiro(tabuleiro):
+    """
+    Forma canônica do tabuleiro da interface (ver canonica), com o X no
+    lugar de quem joga.
+    :param tabuleiro: dicionário {"A": [...], "B": [...], "C": [...]}.
+    :return: (tabuleiro canônico, simetria).
+    """
+    x, o, simetria = canonica(*deTabuleiro(tabuleiro))
+    return paraTabuleiro(x, o), simetria
+
+
+def casaOriginal(coluna, linha, simetria):
+    """
+    Traz uma casa do tabuleiro canônico de volta ao tabuleiro original.
+    :param coluna: coluna no tabuleiro canônico ("A", "B" ou "C").
+    :param linha: linha no tabuleiro canônico (0 a 2).
+    :param simetria: simetria devolvida por canonicaTabuleiro.
+    :return: (coluna, linha) no tabuleiro original.
+    """
+    return coordenada(destransformarCasa(casa(coluna, linha), simetria))
+
+
+def posicoesCanonicas(posicoes):
+    """
+    Reduz uma lista de posições às formas canônicas distintas.
+    :param posicoes: iteravel de (jogador, adversario).
+    :return: lista ordenada de (jogador, adversario) canônicos.
+    """
+    return sorted({canonica(jogador, adversario)[:2]
+                   for jogador, adversario in posicoes})
+
+
+# Ordem em que as jogadas são tentadas (centro, cantos, meios): corta
+# mais cedo na poda alfa-beta e desempata as jogadas de mesmo valor.
+ORDEM_JOGADAS = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+# Tipos de valor guardados na tabela de transposição.
+EXATO, LIMITE_INFERIOR, LIMITE_SUPERIOR = 0, 1, 2
+# Tabela de transposição: chave da forma canônica da posição -> (valor,
+# tipo do valor). Posições simétricas dividem a mesma entrada.
+_transposicao = {}
+# Melhor jogada ja calculada, por chave da forma canônica (casa no
+# tabuleiro canônico).
+_melhores = {}
+
+
+def negamax(jogador, adversario, alfa=-10, beta=10):
+    """
+    Valor da posição para quem joga, com jogo perfeito dos dois lados:
+    positivo se vence (maior quanto mais cedo), 0 se empata e negativo se
+    perde. Busca negamax com poda alfa-beta e tabela de transposição
+    (indexada pela forma canônica da posição).
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário (que acabou de jogar).
+    :param alfa: limite inferior da janela de busca.
+    :param beta: limite superior da janela de busca.
+    :return: valor da posição (exato se estiver dentro da janela).
+    """
+    vazias = CHEIO & ~(jogador | adversario)
+    if venceu(adversario):
+        return -1 - bin(vazias).count("1")
+    if not vazias:
+        return 0
+    canonico, oponente, _ = canonica(jogador, adversario)
+    indice = chave(canonico, oponente)
+    alfa_inicial = alfa
+    entrada = _transposicao.get(indice)
+    if entrada is not None:
+        valor, tipo = entrada
+        if tipo == EXATO:
+            return valor
+        if tipo == LIMITE_INFERIOR:
+            alfa = max(alfa, valor)
+        else:
+            beta = min(beta, valor)
+        if alfa >= beta:
+            return valor
+    melhor = -10
+    for casa_jogada in ORDEM_JOGADAS:
+        bit = 1 << casa_jogada
+        if vazias & bit:
+            valor = -negamax(adversario, jogador | bit, -beta, -alfa)
+            if valor > melhor:
+                melhor = valor
+                if valor > alfa:
+                    alfa = valor
+                    if alfa >= beta:
+                        break
+    if melhor <= alfa_inicial:
+        tipo = LIMITE_SUPERIOR
+    elif melhor >= beta:
+        tipo = LIMITE_INFERIOR
+    else:
+        tipo = EXATO
+    _transposicao[indice] = (melhor, tipo)
+    return melhor
+
+
+def melhorJogada(jogador, adversario):
+    """
+    Escolhe a jogada de quem joga com jogo perfeito (nunca perde e vence o
+    mais cedo possível). Calculada uma vez para cada forma canônica (e
+    trazida de volta pela simetria); depois é só uma consulta.
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :return: índice da casa (0 a 8) / None se não houver casa vazia.
+    """
+    jogador, adversario, simetria = canonica(jogador, adversario)
+    indice = chave(jogador, adversario)
+    if indice not in _melhores:
+        vazias = casasVazias(jogador, adversario)
+        melhor, escolhida = None, None
+        for casa_jogada in ORDEM_JOGADAS:
+            bit = 1 << casa_jogada
+            if vazias & bit:
+                valor = -negamax(adversario, jogador | bit)
+                if melhor is None or valor > melhor:
+                    melhor, escolhida = valor, casa_jogada
+        _melhores[indice] = escolhida
+    escolhida = _melhores[indice]
+    return None if escolhida is None else \
+        destransformarCasa(escolhida, simetria)
+
+
+def jogadaVencedora(jogador, adversario):
+    """
+    Procura uma casa vazia que complete uma linha de vitória do jogador.
+    :param jogador: máscara de quem completaria a linha.
+    :param adversario: máscara do outro jogador.
+    :return: índice da casa (a primeira, em ordem de índice) / None.
+    """
+    for casa_jogada in indicesVazios(jogador, adversario):
+        if venceu(jogador | 1 << casa_jogada):
+            return casa_jogada
+    return None
+
+
+ARQUIVO_TABELA = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "tabelaJogoDaVelha.bin")
+# Um byte por posição (3 ** 9 posições, casa a casa: 0 vazia, 1 de quem
+# joga, 2 do adversário): valor + 8 nos 4 bits altos e a jogada perfeita
+# nos 4 baixos (SEM_JOGADA nas posições finais). POSICAO_INVALIDA nas
+# posições que não ocorrem em uma partida.
+TAMANHO_TABELA = 3 ** 9
+SEM_JOGADA = 0xF
+POSICAO_INVALIDA = 0xFF
+# Valor em base 3 das casas de cada máscara (casa i vale 3 ** i).
+_BASE3 = tuple(sum(3 ** i for i in range(9) if mascara >> i & 1)
+               for mascara in range(512))
+_tabela = None
+
+
+def indiceTabela(jogador, adversario):
+    """
+    Retorna a posição na tabela pré-calculada.
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :return: índice (0 a 3 ** 9 - 1).
+    """
+    return _BASE3[jogador] + 2 * _BASE3[adversario]
+
+
+def posicoesAlcancaveis():
+    """
+    Enumera as posições que ocorrem em alguma partida, começando do
+    tabuleiro vazio, do ponto de vista de quem joga (serve para os dois
+    jogadores, comece quem começar).
+    :return: lista de (jogador, adversario), sem repetições.
+    """
+    vistas = {(0, 0)}
+    pendentes = [(0, 0)]
+    while pendentes:
+        jogador, adversario = pendentes.pop()
+        if venceu(adversario) or cheio(jogador, adversario):
+            continue
+        for casa_jogada in indicesVazios(jogador, adversario):
+            seguinte = (adversario, jogador | 1 << casa_jogada)
+            if seguinte not in vistas:
+                vistas.add(seguinte)
+                pendentes.append(seguinte)
+    return sorted(vistas)
+
+
+def gerarTabela():
+    """
+    Calcula a tabela completa com a busca (negamax / melhorJogada).
+    :return: bytes no formato de ARQUIVO_TABELA.
+    """
+    tabela = bytearray([POSICAO_INVALIDA]) * TAMANHO_TABELA
+    for jogador, adversario in posicoesAlcancaveis():
+        final = venceu(adversario) or cheio(jogador, adversario)
+        jogada = SEM_JOGADA if final else melhorJogada(jogador, adversario)
+        valor = negamax(jogador, adversario)
+        tabela[indiceTabela(jogador, adversario)] = (valor + 8) << 4 | jogada
+    return bytes(tabela)
+
+
+def carregarTabela(caminho=ARQUIVO_TABELA):
+    """
+    Retorna a tabela pré-calculada, lendo o arquivo na primeira chamada (ou
+    calculando-a, se o arquivo não existir ou estiver incompleto).
+    :param caminho: arquivo da tabela.
+    :return: bytes da tabela.
+    """
+    global _tabela
+    if _tabela is None:
+        try:
+            with open(caminho, "rb") as arquivo:
+                dados = arquivo.read()
+        except FileNotFoundError:
+            dados = b""
+        _tabela = dados if len(dados) == TAMANHO_TABELA else gerarTabela()
+    return _tabela
+
+
+def consultarTabela(jogador, adversario):
+    """
+    Consulta a posição na tabela pré-calculada.
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :return: (valor da posição, jogada perfeita ou None se a posição for
+    final) / None se a posição não ocorre em uma partida.
+    """
+    entrada = carregarTabela()[indiceTabela(jogador, adversario)]
+    if entrada == POSICAO_INVALIDA:
+        return None
+    jogada = entrada & 0xF
+    return (entrada >> 4) - 8, None if jogada == SEM_JOGADA else jogada
+
+
+def jogadaDaTabela(jogador, adversario):
+    """
+    Jogada perfeita de quem joga, consultada na tabela pré-calculada (ou
+    calculada pela busca, em posições que não ocorrem em uma partida).
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :return: índice da casa (0 a 8) / None se não houver casa vazia.
+    """
+    entrada = carregarTabela()[_BASE3[jogador] + 2 * _BASE3[adversario]]
+    if entrada == POSICAO_INVALIDA:
+        return melhorJogada(jogador, adversario)
+    jogada = entrada & 0xF
+    return None if jogada == SEM_JOGADA else jogada
+
+
+NIVEIS = ("easy", "medium", "hard")
+# Casas vazias (em ordem de índice) para cada máscara de casas marcadas.
+_VAZIAS = tuple(tuple(indice for indice in range(9)
+                      if not marcadas >> indice & 1)
+                for marcadas in range(512))
+# Casas que completariam alguma linha de vitória de cada máscara (as
+# linhas com 2 casas da máscara), ocupadas ou não.
+_AMEACAS = tuple(sum({linha & ~mascara for linha in LINHAS_VITORIA
+                      if bin(mascara & linha).count("1") == 2})
+                 for mascara in range(512))
+
+
+def jogadaFacil(jogador, adversario, sorteio=random):
+    """
+    Jogada do nível 'easy': uma casa vazia qualquer.
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :param sorteio: gerador de números aleatórios (random ou random.Random).
+    :return: índice da casa (0 a 8).
+    """
+    return sorteio.choice(_VAZIAS[jogador | adversario])
+
+
+def jogadaMedia(jogador, adversario, sorteio=random):
+    """
+    Jogada do nível 'medium': impede a vitória do adversário na próxima
+    jogada (a mesma casa de jogadaVencedora(adversario, jogador)) e, se não
+    houver o que impedir, joga em uma casa vazia qualquer.
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :param sorteio: gerador de números aleatórios (random ou random.Random).
+    :return: índice da casa (0 a 8).
+    """
+    bloqueios = _AMEACAS[adversario] & ~(jogador | adversario)
+    if bloqueios:
+        return (bloqueios & -bloqueios).bit_length() - 1
+    return sorteio.choice(_VAZIAS[jogador | adversario])
+
+
+def jogadaDificil(jogador, adversario, sorteio=None):
+    """
+    Jogada do nível 'hard': a jogada perfeita da tabela pré-calculada.
+    :param jogador: máscara de quem joga.
+    :param adversario: máscara do adversário.
+    :param sorteio: não usado (mesma assinatura dos outros níveis).
+    :return: índice da casa (0 a 8).
+    """
+    return jogadaDaTabela(jogador, adversario)
+
+
+# Jogada da máquina em cada nível: funcao(jogador, adversario, sorteio).
+BOTS = {"easy": jogadaFacil, "medium": jogadaMedia, "hard": jogadaDificil}
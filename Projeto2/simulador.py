@@ -0,0 +1,237 @@
+"""
+Simulador do jogo da velha sem interface (nada é lido nem impresso): joga
+partidas entre as jogadas da máquina de cada nível (motorJogoDaVelha.BOTS),
+jogadores roteirizados ou qualquer função funcao(jogador, adversario,
+sorteio) -> índice da casa, direto nos bitboards do motor.
+
+jogarPartida devolve o registro de uma partida (Partida); simular joga
+muitas partidas (alternando quem começa, como a interface) e devolve as
+vitórias, empates e derrotas de cada lado (Estatisticas).
+Uso: python simulador.py [nivelX] [nivelO] [partidas] [semente]
+"""
+import random
+import sys
+import time
+
+from motorJogoDaVelha import BOTS, CHEIO, JOGADORES, indicesVazios, venceu
+
+# Vitória de cada máscara, para conferir o fim da partida sem percorrer as
+# linhas de vitória a cada jogada.
+_VITORIAS = tuple(venceu(mascara) for mascara in range(512))
+
+
+class Partida(object):
+    """
+    Registro de uma partida: quem começou ('X' ou 'O'), as casas jogadas em
+    ordem (índices de 0 a 8) e o vencedor ('X', 'O' ou None no empate).
+    """
+    __slots__ = ('iniciou', 'jogadas', 'vencedor')
+
+    def __init__(self, iniciou: str, jogadas: tuple, vencedor: str = None):
+        self.iniciou = iniciou
+        self.jogadas = jogadas
+        self.vencedor = vencedor
+
+    def __repr__(self) -> str:
+        return f'Partida(iniciou={self.iniciou}, jogadas={self.jogadas}, ' \
+               f'vencedor={self.vencedor})'
+
+
+class Estatisticas(object):
+    """
+    Totais de uma simulação: partidas jogadas, vitórias de cada jogador e
+    empates. registros traz as partidas (Partida) quando a simulação foi
+    feita com registrar=True.
+    """
+
+    def __init__(self):
+        self.partidas = 0
+        self.vitorias = {'X': 0, 'O': 0}
+        self.empates = 0
+        self.registros = None
+
+    def adicionar(self, vencedor: str):
+        """
+        Conta o resultado de uma partida.
+        :param vencedor: 'X', 'O' ou None (empate).
+        """
+        self.partidas += 1
+        if vencedor is None:
+            self.empates += 1
+        else:
+            self.vitorias[vencedor] += 1
+
+    def derrotas(self, jogador: str) -> int:
+        """
+        :param jogador: 'X' ou 'O'.
+        :return: partidas que o jogador perdeu.
+        """
+        return self.partidas - self.empates - self.vitorias[jogador]
+
+    def paraDicionario(self) -> dict:
+        """
+        Vitórias, empates e derrotas de cada jogador, em número e em taxa.
+        :return: {'partidas': n, 'X': {...}, 'O': {...}}.
+        """
+        dicionario = {'partidas': self.partidas}
+        for jogador in JOGADORES:
+            totais = {'vitorias': self.vitorias[jogador],
+                      'empates': self.empates,
+                      'derrotas': self.derrotas(jogador)}
+            for chave, total in list(totais.items()):
+                totais['taxa' + chave.title()] = \
+                    total / self.partidas if self.partidas else 0.0
+            dicionario[jogador] = totais
+        return dicionario
+
+    def __repr__(self) -> str:
+        return f'Estatisticas(partidas={self.partidas}, ' \
+               f'X={self.vitorias["X"]}, O={self.vitorias["O"]}, ' \
+               f'empates={self.empates})'
+
+
+def jogadorRoteirizado(roteiro):
+    """
+    Monta um jogador que segue um roteiro: joga na primeira casa do roteiro
+    que ainda estiver vazia e, acabado o roteiro, na primeira casa vazia.
+    :param roteiro: sequência de índices de casas (0 a 8).
+    :return: funcao(jogador, adversario, sorteio) -> índice da casa.
+    """
+    roteiro = tuple(roteiro)
+
+    def jogada(jogador, adversario, sorteio=None):
+        marcadas = jogador | adversario
+        for indice in roteiro:
+            if not marcadas >> indice & 1:
+                return indice
+        return indicesVazios(jogador, adversario)[0]
+    return jogada
+
+
+def resolverJogador(jogador):
+    """
+    Converte a descrição de um jogador na função de jogada.
+    :param jogador: nível ('easy' é o jogador aleatório, 'medium', 'hard'),
+    roteiro (sequência de índices) ou função de jogada.
+    :return: funcao(jogador, adversario, sorteio) -> índice da casa.
+    """
+    if callable(jogador):
+        return jogador
+    if isinstance(jogador, str):
+        try:
+            return BOTS[jogador]
+        except KeyError:
+            raise ValueError(f'Nível inexistente: {jogador}') from None
+    return jogadorRoteirizado(jogador)
+
+
+def _jogar(jogadaX, jogadaO, vez, sorteio, jogadas=None):
+    """
+    Joga uma partida nos bitboards.
+    :param jogadaX: função de jogada do X.
+    :param jogadaO: função de jogada do O.
+    :param vez: quem começa (0 -> X | 1 -> O).
+    :param sorteio: gerador de números aleatórios repassado às jogadas.
+    :param jogadas: lista onde anotar as casas jogadas (opcional).
+    :return: 0 (X venceu) / 1 (O venceu) / None (empate).
+    """
+    x = o = 0
+    while True:
+        if vez == 0:
+            indice = jogadaX(x, o, sorteio)
+            bit = 1 << indice
+            if (x | o | ~CHEIO) & bit:
+                raise ValueError(f'Jogada inválida do X: {indice}')
+            x |= bit
+            if jogadas is not None:
+                jogadas.append(indice)
+            if _VITORIAS[x]:
+                return 0
+        else:
+            indice = jogadaO(o, x, sorteio)
+            bit = 1 << indice
+            if (x | o | ~CHEIO) & bit:
+                raise ValueError(f'Jogada inválida do O: {indice}')
+            o |= bit
+            if jogadas is not None:
+                jogadas.append(indice)
+            if _VITORIAS[o]:
+                return 1
+        if x | o == CHEIO:
+            return None
+        vez ^= 1
+
+
+def jogarPartida(jogadorX, jogadorO, iniciou='X', sorteio=random):
+    """
+    Joga uma partida entre dois jogadores.
+    :param jogadorX: jogador do X (ver resolverJogador).
+    :param jogadorO: jogador do O (ver resolverJogador).
+    :param iniciou: quem começa ('X' ou 'O').
+    :param sorteio: gerador de números aleatórios (random ou random.Random).
+    :return: Partida.
+    """
+    jogadas = []
+    vencedor = _jogar(resolverJogador(jogadorX), resolverJogador(jogadorO),
+                      JOGADORES.index(iniciou), sorteio, jogadas)
+    return Partida(iniciou, tuple(jogadas),
+                   None if vencedor is None else JOGADORES[vencedor])
+
+
+def simular(jogadorX, jogadorO, partidas, semente=None, iniciou='X',
+            alternar=True, registrar=False):
+    """
+    Joga várias partidas entre dois jogadores.
+    :param jogadorX: jogador do X (ver resolverJogador).
+    :param jogadorO: jogador do O (ver resolverJogador).
+    :param partidas: número de partidas.
+    :param semente: semente do sorteio (a mesma semente repete a simulação).
+    :param iniciou: quem começa a primeira partida ('X' ou 'O').
+    :param alternar: True (alterna quem começa a cada partida) / False.
+    :param registrar: True (guarda cada Partida em registros) / False.
+    :return: Estatisticas.
+    """
+    jogadaX = resolverJogador(jogadorX)
+    jogadaO = resolverJogador(jogadorO)
+    sorteio = random.Random(semente)
+    estatisticas = Estatisticas()
+    vitorias = [0, 0]
+    empates = 0
+    registros = [] if registrar else None
+    vez = JOGADORES.index(iniciou)
+    for _ in range(partidas):
+        if registrar:
+            jogadas = []
+            vencedor = _jogar(jogadaX, jogadaO, vez, sorteio, jogadas)
+            registros.append(Partida(
+                JOGADORES[vez], tuple(jogadas),
+                None if vencedor is None else JOGADORES[vencedor]))
+        else:
+            vencedor = _jogar(jogadaX, jogadaO, vez, sorteio)
+        if vencedor is None:
+            empates += 1
+        else:
+            vitorias[vencedor] += 1
+        if alternar:
+            vez ^= 1
+    estatisticas.partidas = partidas
+    estatisticas.vitorias = dict(zip(JOGADORES, vitorias))
+    estatisticas.empates = empates
+    estatisticas.registros = registros
+    return estatisticas
+
+
+if __name__ == '__main__':
+    nivelX = sys.argv[1] if len(sys.argv) > 1 else 'hard'
+    nivelO = sys.argv[2] if len(sys.argv) > 2 else 'easy'
+    total = int(sys.argv[3]) if len(sys.argv) > 3 else 100000
+    semente = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    inicio = time.perf_counter()
+    resultado = simular(nivelX, nivelO, total, semente)
+    duracao = time.perf_counter() - inicio
+    for jogador, nivel in zip(JOGADORES, (nivelX, nivelO)):
+        totais = resultado.paraDicionario()[jogador]
+        print(f'{jogador} ({nivel}): {totais["vitorias"]} vitórias, '
+              f'{totais["empates"]} empates, {totais["derrotas"]} derrotas')
+    print(f'{total} partidas em {duracao:.2f} s '
+          f'({total / duracao:.0f} partidas/s).')
@@ -0,0 +1,188 @@
+from functools import lru_cache
+from itertools import product
+from motorJogoDaVelha import ARQUIVO_TABELA, CHEIO, POSICAO_INVALIDA, \
+    canonica, canonicaTabuleiro, casa, casaOriginal, casasVazias, cheio, \
+    consultarTabela, coordenada, deTabuleiro, destransformarCasa, \
+    gerarTabela, indicesVazios, jogadaDaTabela, jogadaVencedora, \
+    melhorJogada, negamax, paraTabuleiro, posicoesAlcancaveis, \
+    posicoesCanonicas, transformarCasa, transformarMascara, \
+    transformarSequencia, venceu
+import motorJogoDaVelha
+from unittest import TestCase, main
+
+
+def todosTabuleiros():
+    for marcas in product(["", "X", "O"], repeat=9):
+        yield {" ": ["1", "2", "3"], "A": list(marcas[0:3]),
+               "B": list(marcas[3:6]), "C": list(marcas[6:9])}
+
+
+def venceuNoDicionario(tabuleiro, jogador):
+    colunas = any(tabuleiro[col].count(jogador) == 3 for col in "ABC")
+    linhas = any(tabuleiro["A"][i] == tabuleiro["B"][i] ==
+                 tabuleiro["C"][i] == jogador for i in range(3))
+    return colunas or linhas or \
+        jogador == tabuleiro["A"][0] == tabuleiro["B"][1] == \
+        tabuleiro["C"][2] or \
+        jogador == tabuleiro["A"][2] == tabuleiro["B"][1] == tabuleiro["C"][0]
+
+
+@lru_cache(maxsize=None)
+def minimax(jogador, adversario):
+    # Busca completa, sem poda: referência para a tabela.
+    vazias = indicesVazios(jogador, adversario)
+    if venceu(adversario):
+        return -1 - len(vazias)
+    if not vazias:
+        return 0
+    return max(-minimax(adversario, jogador | 1 << jogada)
+               for jogada in vazias)
+
+
+class TestesMotorJogoDaVelha(TestCase):
+
+    def test01CasaECoordenada(self):
+        self.assertEqual(casa("A", 0), 0)
+        self.assertEqual(casa("B", 1), 4)
+        self.assertEqual(casa("C", 2), 8)
+        for indice in range(9):
+            self.assertEqual(casa(*coordenada(indice)), indice)
+
+    def test02IgualAoDicionarioEmTodosOsTabuleiros(self):
+        for tabuleiro in todosTabuleiros():
+            x, o = deTabuleiro(tabuleiro)
+            self.assertEqual(venceu(x), venceuNoDicionario(tabuleiro, "X"))
+            self.assertEqual(venceu(o), venceuNoDicionario(tabuleiro, "O"))
+            vazias = [casa(col, lin) for col in "ABC" for lin in range(3)
+                      if tabuleiro[col][lin] == ""]
+            self.assertEqual(indicesVazios(x, o), vazias)
+            self.assertEqual(cheio(x, o), not vazias)
+            self.assertEqual(paraTabuleiro(x, o), tabuleiro)
+
+    def test03AtualizaTabuleiroExistente(self):
+        tabuleiro = {" ": ["1", "2", "3"], "A": ["", "", ""],
+                     "B": ["", "", ""], "C": ["", "", ""]}
+        x = 1 << casa("B", 1)
+        o = 1 << casa("A", 2)
+        self.assertIs(paraTabuleiro(x, o, tabuleiro), tabuleiro)
+        self.assertEqual(tabuleiro["B"], ["", "X", ""])
+        self.assertEqual(tabuleiro["A"], ["", "", "O"])
+        self.assertEqual(casasVazias(x, o), CHEIO & ~(x | o))
+
+    def test04MotorNuncaPerde(self):
+        # Percorre todas as respostas possíveis do adversário, com o motor
+        # começando ou não.
+        def partidas(motor, adversario, vez_do_motor):
+            self.assertFalse(venceu(adversario), 'o motor perdeu')
+            if venceu(motor) or cheio(motor, adversario):
+                return 1
+            if vez_do_motor:
+                jogada = melhorJogada(motor, adversario)
+                self.assertIn(jogada, indicesVazios(motor, adversario))
+                return partidas(motor | 1 << jogada, adversario, False)
+            return sum(partidas(motor, adversario | 1 << jogada, True)
+                       for jogada in indicesVazios(motor, adversario))
+
+        self.assertGreater(partidas(0, 0, True), 0)
+        self.assertGreater(partidas(0, 0, False), 0)
+
+    def test05ValoresDaBusca(self):
+        self.assertEqual(negamax(0, 0), 0)
+        # X em A1 e A2 vence em A3; O precisa bloquear.
+        x = 1 << casa("A", 0) | 1 << casa("A", 1)
+        o = 1 << casa("B", 1)
+        self.assertEqual(melhorJogada(x, o), casa("A", 2))
+        self.assertEqual(jogadaVencedora(x, o), casa("A", 2))
+        self.assertEqual(melhorJogada(o, x), casa("A", 2))
+        # Vez do X: vence na hora (5 casas vazias depois da jogada).
+        self.assertEqual(negamax(x, o), 6)
+        # Vez do O: bloqueando, o jogo empata.
+        self.assertEqual(negamax(o, x), 0)
+
+    def test06TabelaIgualABusca(self):
+        posicoes = posicoesAlcancaveis()
+        self.assertEqual(len(posicoes), 5478)
+        for jogador, adversario in posicoes:
+            valor, jogada = consultarTabela(jogador, adversario)
+            self.assertEqual(valor, minimax(jogador, adversario))
+            if jogada is None:
+                self.assertTrue(venceu(adversario) or
+                                cheio(jogador, adversario))
+            else:
+                self.assertIn(jogada, indicesVazios(jogador, adversario))
+                self.assertEqual(
+                    -minimax(adversario, jogador | 1 << jogada), valor)
+                self.assertEqual(jogadaDaTabela(jogador, adversario), jogada)
+
+    def test07ArquivoAtualizado(self):
+        with open(ARQUIVO_TABELA, "rb") as arquivo:
+            self.assertEqual(arquivo.read(), gerarTabela())
+        # Posição impossível (X com 3 marcas a mais): fora da tabela, a
+        # jogada vem da busca.
+        x = 0b000000111
+        self.assertIsNone(consultarTabela(0, x))
+        self.assertEqual(jogadaDaTabela(0, x), melhorJogada(0, x))
+        self.assertEqual(gerarTabela().count(POSICAO_INVALIDA),
+                         3 ** 9 - 5478)
+
+    def test08SimetriasIdaEVolta(self):
+        imagens = set()
+        for simetria in range(8):
+            casas = [transformarCasa(i, simetria) for i in range(9)]
+            self.assertEqual(sorted(casas), list(range(9)))
+            imagens.add(tuple(casas))
+            for indice in range(9):
+                self.assertEqual(destransformarCasa(
+                    transformarCasa(indice, simetria), simetria), indice)
+            for mascara in range(512):
+                self.assertEqual(venceu(transformarMascara(mascara,
+                                                           simetria)),
+                                 venceu(mascara))
+            # O centro fica no lugar e os cantos continuam cantos.
+            self.assertEqual(casas[4], 4)
+            self.assertEqual({casas[i] for i in (0, 2, 6, 8)}, {0, 2, 6, 8})
+        self.assertEqual(len(imagens), 8)
+        self.assertEqual(transformarSequencia("XO       ", 1), "  X  O   ")
+        self.assertEqual(transformarSequencia(list("XO       "), 0),
+                         list("XO       "))
+
+    def test09FormaCanonica(self):
+        posicoes = posicoesAlcancaveis()
+        for jogador, adversario in posicoes:
+            x, o, simetria = canonica(jogador, adversario)
+            self.assertEqual(transformarMascara(jogador, simetria), x)
+            self.assertEqual(transformarMascara(adversario, simetria), o)
+            for outra in range(8):
+                self.assertEqual(
+                    canonica(transformarMascara(jogador, outra),
+                             transformarMascara(adversario, outra))[:2],
+                    (x, o))
+            if not (venceu(adversario) or cheio(jogador, adversario)):
+                jogada = melhorJogada(jogador, adversario)
+                self.assertEqual(-minimax(adversario, jogador | 1 << jogada),
+                                 minimax(jogador, adversario))
+        canonicas = posicoesCanonicas(posicoes)
+        self.assertEqual(len(canonicas), 765)
+        gerarTabela()
+        self.assertLessEqual(len(motorJogoDaVelha._transposicao),
+                             len(canonicas))
+
+    def test10TabuleiroCanonico(self):
+        tabuleiro = {" ": ["1", "2", "3"], "A": ["", "", ""],
+                     "B": ["", "X", ""], "C": ["O", "", "X"]}
+        canonico, simetria = canonicaTabuleiro(tabuleiro)
+        for col in "ABC":
+            for lin in range(3):
+                original = casaOriginal(col, lin, simetria)
+                self.assertEqual(canonico[col][lin],
+                                 tabuleiro[original[0]][original[1]])
+        # As 8 versões do tabuleiro têm o mesmo tabuleiro canônico.
+        for outra in range(8):
+            x, o = deTabuleiro(tabuleiro)
+            girado = paraTabuleiro(transformarMascara(x, outra),
+                                   transformarMascara(o, outra))
+            self.assertEqual(canonicaTabuleiro(girado)[0], canonico)
+
+
+if __name__ == '__main__':
+    main()
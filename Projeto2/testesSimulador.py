@@ -0,0 +1,93 @@
+from motorJogoDaVelha import BOTS, CHEIO, casa, jogadaVencedora, venceu
+from simulador import Estatisticas, jogadorRoteirizado, jogarPartida, \
+    simular
+import random
+from unittest import TestCase, main
+
+
+class TestesSimulador(TestCase):
+
+    def test01HardNuncaPerde(self):
+        for adversario in ('easy', 'medium', 'hard'):
+            with self.subTest(adversario=adversario):
+                estatisticas = simular('hard', adversario, 2000, semente=1)
+                self.assertEqual(estatisticas.vitorias['O'], 0)
+                self.assertEqual(estatisticas.derrotas('X'), 0)
+        self.assertEqual(simular('hard', 'hard', 100).empates, 100)
+
+    def test02TotaisFecham(self):
+        estatisticas = simular('medium', 'easy', 3000, semente=7)
+        dicionario = estatisticas.paraDicionario()
+        self.assertEqual(dicionario['partidas'], 3000)
+        for jogador, outro in (('X', 'O'), ('O', 'X')):
+            totais = dicionario[jogador]
+            self.assertEqual(totais['vitorias'] + totais['empates'] +
+                             totais['derrotas'], 3000)
+            self.assertEqual(totais['derrotas'],
+                             dicionario[outro]['vitorias'])
+            self.assertAlmostEqual(totais['taxaVitorias'] +
+                                   totais['taxaEmpates'] +
+                                   totais['taxaDerrotas'], 1.0)
+        self.assertIsNone(estatisticas.registros)
+        # A mesma semente repete a simulação.
+        self.assertEqual(simular('medium', 'easy', 3000, semente=7)
+                         .paraDicionario(), dicionario)
+
+    def test03RegistrosDasPartidas(self):
+        estatisticas = simular('easy', 'easy', 500, semente=3,
+                               registrar=True)
+        self.assertEqual(len(estatisticas.registros), 500)
+        refeitas = Estatisticas()
+        for numero, partida in enumerate(estatisticas.registros):
+            self.assertEqual(partida.iniciou, 'XO'[numero % 2])
+            self.assertEqual(len(set(partida.jogadas)),
+                             len(partida.jogadas))
+            marcas = {'X': 0, 'O': 0}
+            vez = partida.iniciou
+            for indice in partida.jogadas:
+                marcas[vez] |= 1 << indice
+                vez = 'O' if vez == 'X' else 'X'
+            if partida.vencedor is None:
+                self.assertEqual(len(partida.jogadas), 9)
+                self.assertFalse(venceu(marcas['X']) or venceu(marcas['O']))
+            else:
+                self.assertTrue(venceu(marcas[partida.vencedor]))
+            refeitas.adicionar(partida.vencedor)
+        self.assertEqual(refeitas.paraDicionario(),
+                         estatisticas.paraDicionario())
+
+    def test04JogadoresRoteirizados(self):
+        # X joga a coluna A, O joga a coluna B: X vence na 5ª jogada.
+        partida = jogarPartida([0, 1, 2], [3, 4, 5])
+        self.assertEqual(partida.jogadas, (0, 3, 1, 4, 2))
+        self.assertEqual(partida.vencedor, 'X')
+        # Começando pelo O, o roteiro dele vence primeiro.
+        self.assertEqual(jogarPartida([0, 1, 2], [3, 4, 5], 'O').vencedor,
+                         'O')
+        # Roteiro ocupado: joga na primeira casa vazia.
+        self.assertEqual(jogadorRoteirizado([4])(1 << 4, 0), 0)
+        with self.assertRaises(ValueError):
+            jogarPartida(lambda jogador, adversario, sorteio: 9, 'easy')
+        with self.assertRaises(ValueError):
+            simular('impossivel', 'easy', 1)
+
+    def test05MediumImpedeVitoria(self):
+        sorteio = random.Random(0)
+        # Posições em que o adversário ainda não venceu (as da partida).
+        for adversario in range(512):
+            for jogador in range(512):
+                if jogador & adversario or jogador | adversario == CHEIO \
+                        or venceu(adversario):
+                    continue
+                bloqueio = jogadaVencedora(adversario, jogador)
+                jogada = BOTS['medium'](jogador, adversario, sorteio)
+                if bloqueio is not None:
+                    self.assertEqual(jogada, bloqueio)
+                else:
+                    self.assertFalse((jogador | adversario) >> jogada & 1)
+        x = 1 << casa('A', 0) | 1 << casa('A', 1)
+        self.assertEqual(BOTS['medium'](0, x), casa('A', 2))
+
+
+if __name__ == '__main__':
+    main()
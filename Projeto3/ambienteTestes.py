@@ -191,6 +191,31 @@ class Testes(TestCase):
             ' nome ja exitente.', 'green')
         self.assertTrue(self.cliLucas.finalizarConta('21/06/2021 20'))
 
+    def test15PedidosEFechamentosEmLote(self):
+        # Lote validado contra o mesmo estado, descontando estoque em ordem.
+        # OBS: Estoque disponível atualmente aqui = 9
+        mostrar('Recebe um lote de pedidos e informa o resultado de cada um.',
+                'green')
+        relatorio = Loja().receberPedidos([
+            ('Carla', 4, 'hora', '01/10/2021 08'),
+            ('Carla', 1, 'hora', '01/10/2021 09'),
+            ('Davi', 3, 'dia', '01/10/2021 08'),
+            ('Eva', 3, 'hora', '01/10/2021 08'),
+            ('Fabio', 2, 'anual', '01/10/2021 08')])
+        self.assertEqual([pedido['sucesso'] for pedido in relatorio],
+                         [True, False, True, False, False])
+        self.assertIn('Temos 2 bicicletas', relatorio[3]['erro'])
+        mostrar('Finaliza um lote de contas com o valor de cada uma.',
+                'green')
+        relatorio = Loja().finalizarContas([
+            ('Carla', '01/10/2021 10'),
+            ('Carla', '01/10/2021 11'),
+            ('Davi', '30/09/2021 08'),
+            ('Davi', '02/10/2021 08')])
+        self.assertEqual([pedido['valor'] for pedido in relatorio],
+                         [28.0, None, None, 52.5])  # 4*2*5*0.7 | 3*25*0.7
+        self.assertEqual(Loja().mostrarEstoque(), 9)
+
 
 if __name__ == '__main__':
     main()
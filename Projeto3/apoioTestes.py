@@ -0,0 +1,31 @@
+"""
+Apoio comum aos arquivos de testes: horas() e a mistura PastaTemporaria,
+que dá a cada teste o seu próprio clientes.csv.
+"""
+from datas import paraHorasEpoch
+from datetime import datetime
+import os
+import tempfile
+
+
+def horas(*data) -> int:
+    """
+    Converte uma data em horas desde a época, como gravadas no registro.
+    :param data: argumentos de datetime (ano, mês, dia, hora...).
+    :return: horas desde a época.
+    """
+    return paraHorasEpoch(datetime(*data))
+
+
+class PastaTemporaria(object):
+    """
+    Mistura para TestCase (ou IsolatedAsyncioTestCase), antes dele nas
+    bases: cria uma pasta temporária por teste, com self.arquivo apontando
+    para um clientes.csv dentro dela, e a apaga depois do tearDown.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+        self.arquivo = os.path.join(self.pasta.name, 'clientes.csv')
@@ -0,0 +1,189 @@
+from contextlib import contextmanager
+
+from cadastroClientes import formatarCodigo
+
+CABECALHO = ['Cliente', 'Quantidade_Alugada', 'Plano', 'Data_Inicial',
+             'Data_Final', 'Total', 'Estacao_Retirada', 'Estacao_Devolucao',
+             'Data_Prevista']
+
+
+class Aluguel(object):
+    """
+    Um aluguel do registro (uma linha do arquivo de clientes). O cliente é
+    o código dele no cadastro (cadastroClientes.CadastroClientes). Datas em
+    horas inteiras desde a época (datas.paraHorasEpoch); data_fim é None
+    enquanto o aluguel estiver aberto e data_prevista (devolução prevista)
+    é None se o cliente não informou. Estações de retirada e devolução
+    vazias ('') em lojas sem estações e nos registros antigos.
+    """
+    __slots__ = ('cliente', 'qnt_bikes', 'plano', 'data_ini', 'data_fim',
+                 'total', 'estacao_ini', 'estacao_fim', 'data_prevista')
+
+    def __init__(self, cliente, qnt_bikes, plano, data_ini, data_fim=None,
+                 total='0', estacao_ini='', estacao_fim='',
+                 data_prevista=None):
+        self.cliente = cliente
+        self.qnt_bikes = qnt_bikes
+        self.plano = plano
+        self.data_ini = data_ini
+        self.data_fim = data_fim
+        self.total = total
+        self.estacao_ini = estacao_ini
+        self.estacao_fim = estacao_fim
+        self.data_prevista = data_prevista
+
+    def linha(self) -> list:
+        """
+        Devolve o aluguel no formato de uma linha do arquivo csv.
+        :return: lista com os campos na ordem do cabecalho.
+        """
+        return [formatarCodigo(self.cliente), self.qnt_bikes, self.plano,
+                self.data_ini, 0 if self.data_fim is None else self.data_fim,
+                self.total, self.estacao_ini, self.estacao_fim,
+                0 if self.data_prevista is None else self.data_prevista]
+
+
+class Armazenamento(object):
+    """
+    Interface dos backends de armazenamento do registro de aluguéis usados
+    pela Loja (RegistroAlugueis para csv, ArmazenamentoSQLite para sqlite).
+    Cada backend guarda o caminho do seu arquivo em self.arquivo e o
+    cadastro dos clientes (CadastroClientes) em self.clientes.
+    """
+
+    @contextmanager
+    def transacao(self):
+        """
+        Seção crítica reentrante do backend: o que for lido e gravado dentro
+        dela acontece de forma atômica em relação a outras threads e outros
+        processos que usam o mesmo arquivo.
+        """
+        yield self
+
+    def sincronizar(self) -> bool:
+        """
+        Atualiza o estado em memória caso o arquivo tenha sido alterado por
+        fora.
+        :return: True (se recarregou)/ False (se ja estava em dia).
+        """
+        return False
+
+    def versaoExterna(self) -> int:
+        """
+        Retorna um valor que muda sempre que o registro é alterado por fora
+        (outro processo, outra conexão ou outro objeto do mesmo arquivo),
+        para invalidar o que foi calculado a partir dele.
+        :return: versão.
+        """
+        return 0
+
+    def buscarAberto(self, cliente: int) -> Aluguel | None:
+        """
+        Busca o aluguel em aberto do cliente.
+        :param cliente: código do cliente.
+        :return: Aluguel em aberto / None se o cliente nao tiver aluguel aberto.
+        """
+        raise NotImplementedError
+
+    def alugueisAbertos(self):
+        """
+        Percorre os aluguéis em aberto.
+        :return: iteravel de Aluguel.
+        """
+        return (aluguel for aluguel in self.linhas()
+                if aluguel.data_fim is None)
+
+    def contarBicicletasAlugadas(self) -> int:
+        """
+        Retorna a quantidade de bicicletas em aluguéis ainda em aberto.
+        :return: quantidade de bicicletas alugadas.
+        """
+        raise NotImplementedError
+
+    def saldoEstacao(self, estacao: str) -> int:
+        """
+        Retorna quanto o estoque da estação mudou pelos aluguéis do
+        registro: bicicletas devolvidas nela menos bicicletas retiradas dela.
+        :param estacao: código da estação.
+        :return: saldo de bicicletas da estação.
+        """
+        raise NotImplementedError
+
+    def registrarAbertura(self, cliente: int, qnt_bikes: int, plano: str,
+                          data_ini, estacao: str = '',
+                          data_prevista=None) -> Aluguel:
+        """
+        Grava um novo aluguel em aberto.
+        :param cliente: código do cliente.
+        :param qnt_bikes: quantidade de bicicletas alugadas.
+        :param plano: plano.
+        :param data_ini: data inicial do aluguel (horas desde a época).
+        :param estacao: estação de retirada.
+        :param data_prevista: devolução prevista (horas desde a época).
+        :return: Aluguel registrado.
+        """
+        raise NotImplementedError
+
+    def registrarFechamento(self, cliente: int, data_fim, valor: float,
+                            estacao: str = None) -> None:
+        """
+        Grava o fechamento do aluguel em aberto do cliente.
+        :param cliente: código do cliente.
+        :param data_fim: data de entrega das bicicletas (horas desde a época).
+        :param valor: valor total da conta.
+        :param estacao: estação de devolução (padrao: a de retirada).
+        """
+        raise NotImplementedError
+
+    def registrarAberturas(self, pedidos: list) -> None:
+        """
+        Grava um lote de aluguéis em aberto.
+        :param pedidos: lista de (cliente, qnt_bikes, plano, data_ini), com
+        estacao e data_prevista opcionais ao final.
+        """
+        with self.transacao():
+            for pedido in pedidos:
+                self.registrarAbertura(*pedido)
+
+    def registrarFechamentos(self, fechamentos: list) -> None:
+        """
+        Grava um lote de fechamentos.
+        :param fechamentos: lista de (cliente, data_fim, valor) ou
+        (cliente, data_fim, valor, estacao).
+        """
+        with self.transacao():
+            for fechamento in fechamentos:
+                self.registrarFechamento(*fechamento)
+
+    def linhas(self):
+        """
+        Percorre todos os aluguéis do registro, abertos e fechados, na ordem
+        em que foram abertos.
+        :return: gerador de Aluguel.
+        """
+        raise NotImplementedError
+
+    def historico(self, de: int = None, ate: int = None):
+        """
+        Percorre os aluguéis fechados devolvidos em [de, ate).
+        :param de: início do intervalo (horas desde a época; None: sem
+        início).
+        :param ate: fim do intervalo, exclusivo (None: sem fim).
+        :return: iteravel de Aluguel.
+        """
+        return (aluguel for aluguel in self.linhas()
+                if aluguel.data_fim is not None and
+                (de is None or aluguel.data_fim >= de) and
+                (ate is None or aluguel.data_fim < ate))
+
+    def descarregar(self) -> None:
+        """
+        Grava no disco o que o backend ainda guarda apenas em memória
+        (escritas adiadas). Sem efeito nos backends que gravam a cada
+        operação.
+        """
+
+    def fechar(self) -> None:
+        """
+        Libera os recursos do backend (conexões, arquivos abertos).
+        """
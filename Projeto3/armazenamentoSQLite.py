@@ -0,0 +1,354 @@
+from contextlib import contextmanager
+import argparse
+import sqlite3
+import threading
+
+from armazenamento import Aluguel, Armazenamento
+from cadastroClientes import CadastroClientes
+from datas import lerHorasGravadas, lerHorasOpcionais
+from metricas import cronometrado, medir
+from registroAlugueis import RegistroAlugueis
+
+# Tabela dos aluguéis ({tabela}: 'alugueis' ou a tabela temporária da
+# migração da coluna cliente, ver _migrarClientes).
+TABELA_ALUGUEIS = """
+CREATE TABLE IF NOT EXISTS {tabela} (
+    id INTEGER PRIMARY KEY,
+    cliente INTEGER NOT NULL,
+    quantidade INTEGER NOT NULL,
+    plano TEXT NOT NULL,
+    data_inicial INTEGER NOT NULL,
+    data_final INTEGER NOT NULL DEFAULT 0,
+    total TEXT NOT NULL DEFAULT '0',
+    aberto INTEGER NOT NULL DEFAULT 1,
+    estacao_inicial TEXT NOT NULL DEFAULT '',
+    estacao_final TEXT NOT NULL DEFAULT '',
+    data_prevista INTEGER NOT NULL DEFAULT 0
+)"""
+INDICES_ALUGUEIS = (
+    # Historico por cliente.
+    'CREATE INDEX IF NOT EXISTS idx_alugueis_cliente ON alugueis (cliente)',
+    # No maximo um aluguel aberto por cliente; tambem atende buscarAberto.
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_alugueis_cliente_aberto '
+    'ON alugueis (cliente) WHERE aberto = 1',
+    # Indice de cobertura para o SUM das bicicletas em aberto.
+    'CREATE INDEX IF NOT EXISTS idx_alugueis_aberto '
+    'ON alugueis (aberto, quantidade)',
+    # Historico por data de devolução.
+    'CREATE INDEX IF NOT EXISTS idx_alugueis_devolucao '
+    'ON alugueis (data_final) WHERE aberto = 0',
+)
+ESQUEMA = TABELA_ALUGUEIS.format(tabela='alugueis') + """;
+-- Saldo de cada estação (devoluções menos retiradas), atualizado junto com
+-- os aluguéis para que o estoque de uma estação seja uma busca pela chave.
+CREATE TABLE IF NOT EXISTS saldo_estacoes (
+    estacao TEXT PRIMARY KEY,
+    saldo INTEGER NOT NULL
+) WITHOUT ROWID;
+""" + ''.join(indice + ';\n' for indice in INDICES_ALUGUEIS)
+
+# Colunas acrescentadas depois da primeira versão do ESQUEMA.
+COLUNAS_NOVAS = {
+    'estacao_inicial': "TEXT NOT NULL DEFAULT ''",
+    'estacao_final': "TEXT NOT NULL DEFAULT ''",
+    'data_prevista': 'INTEGER NOT NULL DEFAULT 0',
+}
+
+# Colunas lidas para montar um Aluguel (ver _paraAluguel).
+COLUNAS_ALUGUEL = ('cliente, quantidade, plano, data_inicial, data_final, '
+                   'total, aberto, estacao_inicial, estacao_final, '
+                   'data_prevista')
+
+MOVER_ESTACAO = (
+    'INSERT INTO saldo_estacoes (estacao, saldo) VALUES (?, ?) '
+    'ON CONFLICT (estacao) DO UPDATE SET saldo = saldo + excluded.saldo')
+# Devolução: a estação (ou, se nula ou vazia, a de retirada) recebe as
+# bicicletas do aluguel em aberto do cliente.
+DEVOLVER_ESTACAO = (
+    'INSERT INTO saldo_estacoes (estacao, saldo) '
+    "SELECT COALESCE(NULLIF(?, ''), estacao_inicial), quantidade "
+    'FROM alugueis '
+    "WHERE cliente = ? AND aberto = 1 AND estacao_inicial != '' "
+    'ON CONFLICT (estacao) DO UPDATE SET saldo = saldo + excluded.saldo')
+FECHAR = (
+    'UPDATE alugueis SET data_final = ?, total = ?, aberto = 0, '
+    "estacao_final = CASE WHEN estacao_inicial = '' THEN '' "
+    "ELSE COALESCE(NULLIF(?, ''), estacao_inicial) END "
+    'WHERE cliente = ? AND aberto = 1')
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """
+    Registro de aluguéis em um banco sqlite local. As consultas da Loja
+    (cliente com aluguel aberto, bicicletas alugadas, saldo das estações)
+    usam os índices do ESQUEMA em vez de percorrer o historico. Datas em
+    horas desde a época; bancos gravados com datas em texto continuam
+    legíveis. A coluna cliente guarda o código do cliente no cadastro
+    '<arquivo>.clientes' (bancos gravados com nomes são convertidos ao
+    abrir).
+
+    A conexão fica em modo autocommit e transacao() abre um BEGIN IMMEDIATE,
+    que reserva o banco para escrita contra outros processos; entre threads
+    do mesmo processo a conexão é protegida por uma trava.
+    """
+
+    def __init__(self, arquivo='clientes.db', espera=30.0):
+        self.arquivo = arquivo
+        self.conexao = sqlite3.connect(arquivo, timeout=espera,
+                                       isolation_level=None,
+                                       check_same_thread=False)
+        self._migrar()
+        self.conexao.executescript(ESQUEMA)
+        self._trava = threading.RLock()
+        self._profundidade = 0
+        self.clientes = CadastroClientes(arquivo + '.clientes')
+        self._migrarClientes()
+
+    @contextmanager
+    def transacao(self):
+        with self._trava:
+            externa = self._profundidade == 0
+            if externa:
+                with medir('sqlite.esperaTrava'):
+                    self.conexao.execute('BEGIN IMMEDIATE')
+            self._profundidade += 1
+            try:
+                yield self
+            except BaseException:
+                if externa:
+                    self.conexao.execute('ROLLBACK')
+                raise
+            else:
+                if externa:
+                    self.conexao.execute('COMMIT')
+            finally:
+                self._profundidade -= 1
+
+    def versaoExterna(self) -> int:
+        # Muda quando outra conexão confirma uma alteração no banco.
+        with self._trava:
+            return self.conexao.execute('PRAGMA data_version').fetchone()[0]
+
+    def buscarAberto(self, cliente: int) -> Aluguel | None:
+        with self._trava:
+            row = self.conexao.execute(
+                f'SELECT {COLUNAS_ALUGUEL} FROM alugueis '
+                'WHERE cliente = ? AND aberto = 1', (cliente,)).fetchone()
+        return None if row is None else _paraAluguel(row)
+
+    def alugueisAbertos(self):
+        with self._trava:
+            return [_paraAluguel(row) for row in self.conexao.execute(
+                f'SELECT {COLUNAS_ALUGUEL} FROM alugueis WHERE aberto = 1')]
+
+    def contarBicicletasAlugadas(self) -> int:
+        with self._trava:
+            return self.conexao.execute(
+                'SELECT COALESCE(SUM(quantidade), 0) FROM alugueis '
+                'WHERE aberto = 1').fetchone()[0]
+
+    def saldoEstacao(self, estacao: str) -> int:
+        with self._trava:
+            row = self.conexao.execute(
+                'SELECT saldo FROM saldo_estacoes WHERE estacao = ?',
+                (estacao,)).fetchone()
+        return 0 if row is None else row[0]
+
+    @cronometrado('sqlite.registrarAbertura')
+    def registrarAbertura(self, cliente: int, qnt_bikes: int, plano: str,
+                          data_ini, estacao: str = '',
+                          data_prevista=None) -> Aluguel:
+        aluguel = Aluguel(cliente, qnt_bikes, plano, data_ini,
+                          estacao_ini=estacao, data_prevista=data_prevista)
+        self.registrarAberturas([(cliente, qnt_bikes, plano, data_ini,
+                                  estacao, data_prevista)])
+        return aluguel
+
+    @cronometrado('sqlite.registrarFechamento')
+    def registrarFechamento(self, cliente: int, data_fim, valor: float,
+                            estacao: str = None) -> None:
+        self.registrarFechamentos([(cliente, data_fim, valor, estacao)])
+
+    @cronometrado('sqlite.registrarAberturas')
+    def registrarAberturas(self, pedidos: list) -> None:
+        pedidos = [(cliente, qnt_bikes, plano, data_ini,
+                    extras[0] if extras else '',
+                    (extras[1] or 0) if len(extras) > 1 else 0)
+                   for cliente, qnt_bikes, plano, data_ini, *extras
+                   in pedidos]
+        with self.transacao():
+            self.conexao.executemany(
+                'INSERT INTO alugueis (cliente, quantidade, plano, '
+                'data_inicial, estacao_inicial, data_prevista) '
+                'VALUES (?, ?, ?, ?, ?, ?)', pedidos)
+            self.conexao.executemany(
+                MOVER_ESTACAO, ((estacao, -qnt_bikes)
+                                for _, qnt_bikes, _, _, estacao, _ in pedidos
+                                if estacao))
+
+    @cronometrado('sqlite.registrarFechamentos')
+    def registrarFechamentos(self, fechamentos: list) -> None:
+        fechamentos = [(cliente, data_fim, valor,
+                        estacao[0] if estacao else None)
+                       for cliente, data_fim, valor, *estacao
+                       in fechamentos]
+        with self.transacao():
+            self.conexao.executemany(
+                DEVOLVER_ESTACAO, ((estacao, cliente)
+                                   for cliente, _, _, estacao in fechamentos))
+            self.conexao.executemany(
+                FECHAR, ((data_fim, str(valor), estacao, cliente)
+                         for cliente, data_fim, valor, estacao
+                         in fechamentos))
+
+    def linhas(self, tamanho_pagina=1000):
+        """
+        Percorre os aluguéis em páginas pela chave primária, sem manter o
+        resultado inteiro (nem um cursor aberto) em memória.
+        :param tamanho_pagina: aluguéis lidos por consulta.
+        :return: gerador de Aluguel.
+        """
+        ultimo = 0
+        while True:
+            with self._trava:
+                pagina = self.conexao.execute(
+                    f'SELECT id, {COLUNAS_ALUGUEL} FROM alugueis '
+                    'WHERE id > ? ORDER BY id LIMIT ?',
+                    (ultimo, tamanho_pagina)).fetchall()
+            for row in pagina:
+                ultimo = row[0]
+                yield _paraAluguel(row[1:])
+            if len(pagina) < tamanho_pagina:
+                return
+
+    def historico(self, de: int = None, ate: int = None):
+        """
+        Percorre os aluguéis fechados devolvidos em [de, ate) pelo índice
+        da data de devolução.
+        :param de: início do intervalo (horas desde a época; None: sem
+        início).
+        :param ate: fim do intervalo, exclusivo (None: sem fim).
+        :return: lista de Aluguel, em ordem de devolução.
+        """
+        with self._trava:
+            rows = self.conexao.execute(
+                f'SELECT {COLUNAS_ALUGUEL} FROM alugueis '
+                'WHERE aberto = 0 AND data_final >= ? AND data_final < ? '
+                'ORDER BY data_final',
+                (-2 ** 63 if de is None else de,
+                 2 ** 63 - 1 if ate is None else ate)).fetchall()
+        return [_paraAluguel(row) for row in rows]
+
+    def fechar(self) -> None:
+        self.conexao.close()
+
+    def _migrar(self) -> None:
+        """
+        Acrescenta a um banco criado por uma versão anterior do ESQUEMA as
+        colunas que ele ainda não tem.
+        """
+        existentes = {coluna[1] for coluna in self.conexao.execute(
+            'PRAGMA table_info(alugueis)')}
+        if not existentes:
+            return
+        for coluna, definicao in COLUNAS_NOVAS.items():
+            if coluna not in existentes:
+                self.conexao.execute(
+                    f'ALTER TABLE alugueis ADD COLUMN {coluna} {definicao}')
+
+    def _migrarClientes(self) -> None:
+        """
+        Converte a coluna cliente dos bancos gravados por versões
+        anteriores (uma única vez por banco, marcada no user_version): no
+        user_version 0, anterior ao cadastro, ela guarda o nome do cliente
+        (mesmo que só tenha dígitos), trocado pelo código do cadastro; no 1,
+        o código como texto. A tabela é recriada com a coluna INTEGER.
+        """
+        with self.transacao():
+            versao = self.conexao.execute('PRAGMA user_version').fetchone()[0]
+            if versao >= 2:
+                return
+            if versao == 0:
+                self.conexao.execute(
+                    'CREATE TEMP TABLE codigos_migracao '
+                    '(nome TEXT PRIMARY KEY, codigo INTEGER NOT NULL)')
+                # Cadastrados na ordem em que aparecem no banco.
+                nomes = [row[0] for row in self.conexao.execute(
+                    'SELECT cliente FROM alugueis GROUP BY cliente '
+                    'ORDER BY MIN(id)')]
+                with self.clientes.emLote():
+                    self.conexao.executemany(
+                        'INSERT INTO codigos_migracao VALUES (?, ?)',
+                        [(nome, self.clientes.codigoDoNome(str(nome)))
+                         for nome in nomes])
+                cliente = '(SELECT codigo FROM codigos_migracao ' \
+                          'WHERE nome = alugueis.cliente)'
+            else:
+                cliente = 'CAST(cliente AS INTEGER)'
+            self.conexao.execute(
+                TABELA_ALUGUEIS.format(tabela='alugueis_migracao'))
+            demais = COLUNAS_ALUGUEL.split(', ', 1)[1]
+            self.conexao.execute(
+                f'INSERT INTO alugueis_migracao (id, {COLUNAS_ALUGUEL}) '
+                f'SELECT id, {cliente}, {demais} FROM alugueis')
+            self.conexao.execute('DROP TABLE alugueis')
+            self.conexao.execute(
+                'ALTER TABLE alugueis_migracao RENAME TO alugueis')
+            for indice in INDICES_ALUGUEIS:
+                self.conexao.execute(indice)
+            if versao == 0:
+                self.conexao.execute('DROP TABLE codigos_migracao')
+            self.conexao.execute('PRAGMA user_version = 2')
+
+
+def _paraAluguel(row) -> Aluguel:
+    cliente, qnt_bikes, plano, data_ini, data_fim, total, aberto, \
+        estacao_ini, estacao_fim, data_prevista = row
+    return Aluguel(int(cliente), qnt_bikes, plano, lerHorasGravadas(data_ini),
+                   None if aberto else lerHorasGravadas(data_fim), total,
+                   estacao_ini, estacao_fim, lerHorasOpcionais(data_prevista))
+
+
+def importarCSV(arquivo_csv: str, arquivo_db: str) -> int:
+    """
+    Importa para o banco sqlite todos os aluguéis de um arquivo csv de
+    clientes (snapshot, historico arquivado e diario) e o cadastro de
+    clientes, em uma única transação.
+    :param arquivo_csv: arquivo csv de origem.
+    :param arquivo_db: banco sqlite de destino (criado se nao existir).
+    :return: quantidade de aluguéis importados.
+    """
+    origem = RegistroAlugueis(arquivo_csv)
+    destino = ArmazenamentoSQLite(arquivo_db)
+    try:
+        with destino.transacao():
+            # Os aluguéis guardam o código do cliente: o cadastro vai junto.
+            with destino.clientes.emLote():
+                for ficha in origem.clientes:
+                    destino.clientes.incluir(ficha.codigo, ficha.nome)
+            cursor = destino.conexao.executemany(
+                'INSERT INTO alugueis (cliente, quantidade, plano, '
+                'data_inicial, data_final, total, aberto, estacao_inicial, '
+                'estacao_final, data_prevista) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((aluguel.cliente, aluguel.qnt_bikes, aluguel.plano,
+                  aluguel.data_ini, aluguel.linha()[4], aluguel.total,
+                  int(aluguel.data_fim is None), aluguel.estacao_ini,
+                  aluguel.estacao_fim, aluguel.linha()[8])
+                 for aluguel in origem.linhas()))
+            importados = cursor.rowcount
+            destino.conexao.executemany(
+                MOVER_ESTACAO, ((estacao, saldo) for estacao, saldo
+                                in origem.saldoEstacoes.items()))
+        return importados
+    finally:
+        destino.fechar()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Importa um clientes.csv para um banco sqlite.')
+    parser.add_argument('csv', nargs='?', default='clientes.csv')
+    parser.add_argument('db', nargs='?', default='clientes.db')
+    args = parser.parse_args()
+    print(f'{importarCSV(args.csv, args.db)} aluguéis importados.')
@@ -0,0 +1,157 @@
+from datetime import datetime
+import csv
+import os
+
+from armazenamento import Aluguel, CABECALHO
+from cadastroClientes import lerCodigo
+from datas import deHorasEpoch, lerHorasGravadas, lerHorasOpcionais, \
+    paraHorasEpoch
+
+
+def mesDoFechamento(data_fim: int) -> str:
+    """
+    Retorna a partição (mês da devolução, 'AAAA-MM') de um aluguel fechado.
+    :param data_fim: data de devolução (horas desde a época).
+    :return: nome da partição.
+    """
+    data = deHorasEpoch(data_fim)
+    return f'{data.year:04d}-{data.month:02d}'
+
+
+def _limitesDoMes(mes: str) -> tuple[int, int]:
+    ano, numero = int(mes[:4]), int(mes[5:7])
+    seguinte = (ano + 1, 1) if numero == 12 else (ano, numero + 1)
+    return (paraHorasEpoch(datetime(ano, numero, 1)),
+            paraHorasEpoch(datetime(*seguinte, 1)))
+
+
+class ArquivoHistorico(object):
+    """
+    Aluguéis fechados retirados do snapshot do registro, em uma pasta com
+    um csv por mês de devolução ('AAAA-MM.csv', com o CABECALHO do
+    registro). As partições só recebem linhas acrescentadas no fim.
+
+    O arquivamento tem duas etapas para poder ser refeito depois de uma
+    queda: prepararArquivamento grava as linhas em um arquivo de
+    preparação, junto com o tamanho de cada partição antes delas, e
+    concluirArquivamento as distribui pelas partições (cortando cada uma de
+    volta ao tamanho anotado antes de acrescentar, de modo que concluir de
+    novo não duplica linhas) e apaga a preparação.
+
+    lerCliente converte a coluna Cliente lida no código do cliente (ver
+    CadastroClientes.lerCliente).
+    """
+
+    def __init__(self, pasta: str, lerCliente=lerCodigo):
+        self.pasta = pasta
+        self.lerCliente = lerCliente
+
+    def particoes(self) -> list[str]:
+        """
+        Retorna os meses com partição, em ordem.
+        :return: lista de 'AAAA-MM'.
+        """
+        try:
+            nomes = os.listdir(self.pasta)
+        except FileNotFoundError:
+            return []
+        return sorted(nome[:-4] for nome in nomes if nome.endswith('.csv'))
+
+    def ler(self, de: int = None, ate: int = None):
+        """
+        Percorre os aluguéis arquivados devolvidos em [de, ate), lendo só as
+        partições dos meses do intervalo.
+        :param de: início do intervalo (horas desde a época; None: sem
+        início).
+        :param ate: fim do intervalo, exclusivo (None: sem fim).
+        :return: gerador de Aluguel, partição por partição em ordem de mês
+        e, dentro de cada uma, na ordem em que foram arquivados.
+        """
+        for mes in self.particoes():
+            inicio, fim = _limitesDoMes(mes)
+            if (de is not None and fim <= de) or \
+                    (ate is not None and inicio >= ate):
+                continue
+            with open(self._caminho(mes), 'r', encoding='utf-8') as particao:
+                for row in csv.DictReader(particao):
+                    aluguel = Aluguel(
+                        self.lerCliente(row['Cliente']),
+                        int(row['Quantidade_Alugada']),
+                        row['Plano'], lerHorasGravadas(row['Data_Inicial']),
+                        lerHorasGravadas(row['Data_Final']), row['Total'],
+                        row['Estacao_Retirada'], row['Estacao_Devolucao'],
+                        lerHorasOpcionais(row['Data_Prevista']))
+                    if (de is None or aluguel.data_fim >= de) and \
+                            (ate is None or aluguel.data_fim < ate):
+                        yield aluguel
+
+    def prepararArquivamento(self, preparacao: str, alugueis) -> int:
+        """
+        Grava no arquivo de preparação os aluguéis fechados a arquivar.
+        :param preparacao: caminho do arquivo de preparação.
+        :param alugueis: iteravel de Aluguel fechado.
+        :return: quantidade de aluguéis preparados.
+        """
+        tamanhos = []
+        for mes in self.particoes():
+            tamanhos += [mes, os.path.getsize(self._caminho(mes))]
+        quantidade = 0
+        with open(preparacao, 'w', encoding='utf-8', newline='') as destino:
+            escrita = csv.writer(destino, lineterminator='\n')
+            escrita.writerow(tamanhos)
+            for aluguel in alugueis:
+                escrita.writerow([mesDoFechamento(aluguel.data_fim)] +
+                                 aluguel.linha())
+                quantidade += 1
+            destino.flush()
+            os.fsync(destino.fileno())
+        return quantidade
+
+    def concluirArquivamento(self, preparacao: str) -> None:
+        """
+        Distribui as linhas do arquivo de preparação pelas partições e o
+        apaga. Pode ser chamado de novo sobre a mesma preparação.
+        :param preparacao: caminho do arquivo de preparação.
+        """
+        abertas = {}
+        escritas = {}
+        try:
+            with open(preparacao, 'r', encoding='utf-8', newline='') as origem:
+                leitura = csv.reader(origem)
+                tamanhos = next(leitura, [])
+                tamanhos = dict(zip(tamanhos[::2], map(int, tamanhos[1::2])))
+                for mes, *linha in leitura:
+                    if mes not in escritas:
+                        abertas[mes] = self._abrirParticao(mes,
+                                                           tamanhos.get(mes))
+                        escritas[mes] = csv.writer(abertas[mes],
+                                                   lineterminator='\n')
+                    escritas[mes].writerow(linha)
+            for particao in abertas.values():
+                particao.flush()
+                os.fsync(particao.fileno())
+        finally:
+            for particao in abertas.values():
+                particao.close()
+        os.remove(preparacao)
+
+    def _abrirParticao(self, mes: str, tamanho: int | None):
+        """
+        Abre a partição para acrescentar linhas, cortada ao tamanho que
+        tinha antes da preparação (ou criada só com o cabecalho se não
+        existia).
+        """
+        if tamanho is None:
+            os.makedirs(self.pasta, exist_ok=True)
+            particao = open(self._caminho(mes), 'w', encoding='utf-8',
+                            newline='')
+            csv.writer(particao, lineterminator='\n').writerow(CABECALHO)
+            return particao
+        particao = open(self._caminho(mes), 'r+', encoding='utf-8',
+                        newline='')
+        particao.truncate(tamanho)
+        particao.seek(0, os.SEEK_END)
+        return particao
+
+    def _caminho(self, mes: str) -> str:
+        return os.path.join(self.pasta, mes + '.csv')
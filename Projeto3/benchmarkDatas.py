@@ -0,0 +1,43 @@
+"""
+Micro-benchmark da conversão de datas: datetime.strptime (caminho antigo)
+contra os conversores de datas.py, sem cache (__wrapped__) e com cache.
+Uso: python benchmarkDatas.py [repeticoes]
+"""
+from datas import converterDataEntrada, converterDataGravada
+from datetime import datetime
+import sys
+import timeit
+
+ENTRADA = '11/02/2021 12'
+GRAVADA = '2021-02-11 12:00:00'
+
+
+def medir(nome, funcao, repeticoes, base=None):
+    segundos = min(timeit.repeat(funcao, number=repeticoes, repeat=5))
+    ganho = f'  ({base / segundos:.1f}x)' if base else ''
+    print(f'{nome:<34} {segundos / repeticoes * 1e6:8.3f} us/chamada{ganho}')
+    return segundos
+
+
+if __name__ == '__main__':
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print('Entrada (dd/mm/yyyy H):')
+    base = medir('  strptime', lambda: datetime.strptime(ENTRADA,
+                                                          '%d/%m/%Y %H'),
+                 repeticoes)
+    for nome, funcao in (
+            ('  converterDataEntrada sem cache',
+             lambda: converterDataEntrada.__wrapped__(ENTRADA)),
+            ('  converterDataEntrada com cache',
+             lambda: converterDataEntrada(ENTRADA))):
+        medir(nome, funcao, repeticoes, base)
+    print('Gravada (str(datetime)):')
+    base = medir('  strptime', lambda: datetime.strptime(GRAVADA[:13],
+                                                          '%Y-%m-%d %H'),
+                 repeticoes)
+    for nome, funcao in (
+            ('  converterDataGravada sem cache',
+             lambda: converterDataGravada.__wrapped__(GRAVADA)),
+            ('  converterDataGravada com cache',
+             lambda: converterDataGravada(GRAVADA))):
+        medir(nome, funcao, repeticoes, base)
@@ -0,0 +1,179 @@
+"""
+Benchmark da Loja sobre registros sintéticos de 10 mil, 100 mil e 1 milhão
+de aluguéis. Mede vazão (operações por segundo) e latências p50/p99 de
+Loja(), receberPedido, finalizarConta e calcularBicicletasAlugadas, e das
+versões silenciosas efetuarPedido e efetuarFechamento (sem as mensagens
+do console), e grava os resultados em json, para comparar mudanças de
+armazenamento ou índices com uma execução de referência. A compactação
+automática do diario fica desligada durante as medidas: o diario é
+compactado antes de cada operação medida, fora do tempo, para que nenhuma
+delas pague uma compactação que caiu por acaso na sua vez.
+Uso: python benchmarkLoja.py [--tamanhos 10000 100000] [--operacoes 2000]
+                             [--durabilidade escrita|intervalo|fechamento]
+                             [--saida benchmarkLoja.json] [--metricas]
+Com --metricas, grava também as métricas internas (metricas.METRICAS) de
+cada tamanho, para ver em que etapa o tempo de cada operação é gasto.
+"""
+from armazenamento import CABECALHO
+from cadastroClientes import CABECALHO_CLIENTES
+from contextlib import redirect_stdout
+from datas import paraHorasEpoch
+from datetime import datetime
+from emprestimoBicicletas import Loja
+from metricas import METRICAS
+from registroAlugueis import DURABILIDADE_ESCRITA, RegistroAlugueis
+from time import perf_counter
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import tempfile
+
+TAMANHOS = [10000, 100000, 1000000]
+PLANOS = ['hora', 'dia', 'semana']
+# Aluguéis abertos no registro sintético; o estoque da loja fica acima
+# disso para que os pedidos medidos sejam aceitos.
+ABERTOS = 100
+INICIO = paraHorasEpoch(datetime(2020, 1, 1))
+
+
+def gerarRegistro(arquivo: str, linhas: int, semente=0) -> int:
+    """
+    Grava um clientes.csv sintético com a quantidade pedida de aluguéis, os
+    últimos ABERTOS deles ainda em aberto, e o cadastro com um cliente por
+    aluguel.
+    :param arquivo: caminho do csv.
+    :param linhas: quantidade de aluguéis.
+    :param semente: semente do gerador, para registros reproduzíveis.
+    :return: bicicletas em aberto no registro gerado.
+    """
+    sorteio = random.Random(semente)
+    alugadas = 0
+    with open(arquivo + '.clientes', 'w', newline='',
+              encoding='utf-8') as cadastro:
+        escritor = csv.writer(cadastro, lineterminator='\n')
+        escritor.writerow(CABECALHO_CLIENTES)
+        escritor.writerows([i + 1, f'Cliente{i}'] for i in range(linhas))
+    with open(arquivo, 'w', newline='', encoding='utf-8') as saida:
+        escritor = csv.writer(saida, lineterminator='\n')
+        escritor.writerow(CABECALHO)
+        for i in range(linhas):
+            qnt = sorteio.randint(1, 3)
+            plano = sorteio.choice(PLANOS)
+            inicio = INICIO + i // 10
+            if i >= linhas - ABERTOS:
+                alugadas += qnt
+                escritor.writerow([i + 1, qnt, plano, inicio, 0, 0])
+            else:
+                escritor.writerow([i + 1, qnt, plano, inicio,
+                                   inicio + sorteio.randint(1, 200),
+                                   sorteio.randint(5, 500)])
+    return alugadas
+
+
+def resumir(tempos: list) -> dict:
+    """
+    Resume uma lista de latências (em segundos).
+    :param tempos: duração de cada operação.
+    :return: operacoes, vazao (op/s), p50_ms, p99_ms e max_ms.
+    """
+    ordenados = sorted(tempos)
+    return {'operacoes': len(ordenados),
+            'vazao': len(ordenados) / sum(ordenados),
+            'p50_ms': ordenados[int(0.50 * (len(ordenados) - 1))] * 1e3,
+            'p99_ms': ordenados[int(0.99 * (len(ordenados) - 1))] * 1e3,
+            'max_ms': ordenados[-1] * 1e3}
+
+
+def medir(funcao, argumentos) -> list:
+    tempos = []
+    for argumento in argumentos:
+        inicio = perf_counter()
+        funcao(*argumento)
+        tempos.append(perf_counter() - inicio)
+    return tempos
+
+
+def medirTamanho(pasta: str, linhas: int, operacoes: int, construcoes: int,
+                 durabilidade=DURABILIDADE_ESCRITA) -> dict:
+    """
+    Gera um registro com a quantidade de linhas pedida e mede as operações
+    da Loja sobre ele.
+    :return: resumo (ver resumir) de cada operação.
+    """
+    arquivo = os.path.join(pasta, f'clientes{linhas}.csv')
+    estoque = gerarRegistro(arquivo, linhas) + 3 * operacoes
+    resultados = {}
+    with redirect_stdout(io.StringIO()):
+        lojas = []
+        resultados['Loja()'] = resumir(medir(
+            lambda: lojas.append(Loja(estoque, arquivo)),
+            [()] * construcoes))
+        for loja in lojas:
+            loja.fechar()
+        # Sem compactação automática (ver o início do módulo).
+        loja = Loja(estoque, armazenamento=RegistroAlugueis(
+            arquivo, durabilidade=durabilidade, limite_diario=float('inf')))
+        nomes = [f'Novo{i}' for i in range(operacoes)]
+        silenciosos = [f'Silencioso{i}' for i in range(operacoes)]
+        for operacao, funcao, argumentos in (
+                ('receberPedido', loja.receberPedido,
+                 [(nome, 1 + i % 3, PLANOS[i % 3], '11/02/2021 12')
+                  for i, nome in enumerate(nomes)]),
+                ('calcularBicicletasAlugadas',
+                 loja.calcularBicicletasAlugadas, [()] * operacoes),
+                ('finalizarConta', loja.finalizarConta,
+                 [(nome, '12/02/2021 15') for nome in nomes]),
+                ('efetuarPedido', loja.efetuarPedido,
+                 [(nome, 1 + i % 3, PLANOS[i % 3], '11/02/2021 12')
+                  for i, nome in enumerate(silenciosos)]),
+                ('efetuarFechamento', loja.efetuarFechamento,
+                 [(nome, '12/02/2021 15') for nome in silenciosos])):
+            loja.registro.compactar()
+            resultados[operacao] = resumir(medir(funcao, argumentos))
+        loja.fechar()
+    os.remove(arquivo)
+    for resto in (arquivo + '.diario', arquivo + '.lock', arquivo + '.bin',
+                  arquivo + '.clientes'):
+        if os.path.exists(resto):
+            os.remove(resto)
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark da Loja sobre registros sintéticos.')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS)
+    parser.add_argument('--operacoes', type=int, default=2000)
+    parser.add_argument('--construcoes', type=int, default=5)
+    parser.add_argument('--durabilidade', default=DURABILIDADE_ESCRITA)
+    parser.add_argument('--saida', default='benchmarkLoja.json')
+    parser.add_argument('--metricas', action='store_true')
+    args = parser.parse_args()
+    if args.metricas:
+        METRICAS.ativar()
+    resultado = {'python': platform.python_version(),
+                 'plataforma': platform.platform(),
+                 'operacoes': args.operacoes,
+                 'durabilidade': args.durabilidade,
+                 'tamanhos': {},
+                 'metricas': {}}
+    with tempfile.TemporaryDirectory() as pasta:
+        for linhas in args.tamanhos:
+            METRICAS.limpar()
+            medidas = medirTamanho(pasta, linhas, args.operacoes,
+                                   args.construcoes, args.durabilidade)
+            resultado['tamanhos'][str(linhas)] = medidas
+            if args.metricas:
+                resultado['metricas'][str(linhas)] = METRICAS.paraDicionario()
+            for operacao, resumo in medidas.items():
+                print(f'{linhas:>8} {operacao:<28} '
+                      f'{resumo["vazao"]:>12.0f} op/s  '
+                      f'p50 {resumo["p50_ms"]:8.3f} ms  '
+                      f'p99 {resumo["p99_ms"]:8.3f} ms')
+    with open(args.saida, 'w', encoding='utf-8') as saida:
+        json.dump(resultado, saida, indent=2)
+    print(f'Resultados gravados em {args.saida}.')
@@ -0,0 +1,75 @@
+"""
+Teste de carga do ServicoAssincrono: terminais simulados alugam e devolvem
+bicicletas ao mesmo tempo, primeiro pela API síncrona (um terminal por
+thread, chamando Loja.receberPedido / Loja.finalizarConta) e depois pela
+API assíncrona (um terminal por corrotina), e o script compara a vazão.
+Uso: python benchmarkServico.py [terminais] [operacoes_por_terminal]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from emprestimoBicicletas import Loja
+from servicoAssincrono import ServicoAssincrono
+from time import perf_counter
+import asyncio
+import io
+import os
+import sys
+import tempfile
+
+# Estoque grande o bastante para que nenhum pedido seja recusado.
+ESTOQUE = 10 ** 6
+
+
+def terminalSincrono(loja, terminal, operacoes):
+    for i in range(operacoes):
+        nome = f'Terminal{terminal}Cliente{i}'
+        loja.receberPedido(nome, 1, 'hora', '11/02/2021 12')
+        loja.finalizarConta(nome, '11/02/2021 15')
+
+
+async def terminalAssincrono(servico, terminal, operacoes):
+    for i in range(operacoes):
+        nome = f'Terminal{terminal}Cliente{i}'
+        await servico.alugar(nome, 1, 'hora', '11/02/2021 12')
+        await servico.finalizar(nome, '11/02/2021 15')
+
+
+def medirSincrono(arquivo, terminais, operacoes) -> float:
+    loja = Loja(ESTOQUE, arquivo)
+    inicio = perf_counter()
+    with redirect_stdout(io.StringIO()), \
+            ThreadPoolExecutor(max_workers=terminais) as executor:
+        for tarefa in [executor.submit(terminalSincrono, loja, terminal,
+                                       operacoes)
+                       for terminal in range(terminais)]:
+            tarefa.result()
+    segundos = perf_counter() - inicio
+    loja.fechar()
+    return segundos
+
+
+async def medirAssincrono(arquivo, terminais, operacoes) -> float:
+    loja = Loja(ESTOQUE, arquivo)
+    inicio = perf_counter()
+    async with ServicoAssincrono(loja) as servico:
+        await asyncio.gather(*(terminalAssincrono(servico, terminal,
+                                                  operacoes)
+                               for terminal in range(terminais)))
+    segundos = perf_counter() - inicio
+    loja.fechar()
+    return segundos
+
+
+if __name__ == '__main__':
+    terminais = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    operacoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    total = 2 * terminais * operacoes
+    with tempfile.TemporaryDirectory() as pasta:
+        sincrono = medirSincrono(os.path.join(pasta, 'sincrono.csv'),
+                                 terminais, operacoes)
+        assincrono = asyncio.run(medirAssincrono(
+            os.path.join(pasta, 'assincrono.csv'), terminais, operacoes))
+    print(f'{terminais} terminais, {total} operações')
+    print(f'  síncrono (threads)   {total / sincrono:10.0f} op/s')
+    print(f'  assíncrono (lotes)   {total / assincrono:10.0f} op/s  '
+          f'({sincrono / assincrono:.1f}x)')
@@ -0,0 +1,230 @@
+from contextlib import contextmanager
+import csv
+import os
+import sys
+
+CABECALHO_CLIENTES = ['Codigo', 'Nome']
+# Prefixo dos códigos de cliente gravados como texto no registro de
+# aluguéis (csv, diario e historico). Sem ele o valor é o nome de um
+# registro anterior ao cadastro, mesmo que só tenha dígitos.
+MARCA_CODIGO = '#'
+
+
+class FichaCliente(object):
+    """
+    Um cliente do cadastro: código numérico (a identidade do cliente no
+    registro de aluguéis) e nome normalizado.
+    """
+    __slots__ = ('codigo', 'nome')
+
+    def __init__(self, codigo: int, nome: str):
+        self.codigo = codigo
+        self.nome = nome
+
+
+def normalizarNome(nome: str) -> str:
+    """
+    Normaliza o nome de um cliente (sem espaços nas pontas, iniciais
+    maiúsculas) e o interna, para que cada nome fique uma única vez na
+    memória.
+    :param nome: nome informado.
+    :return: nome normalizado.
+    """
+    return sys.intern(nome.strip().title())
+
+
+def formatarCodigo(codigo: int) -> str:
+    """
+    Formata o código de um cliente para gravação em texto no registro de
+    aluguéis.
+    :param codigo: código do cliente.
+    :return: código com a MARCA_CODIGO (ex.: '#12').
+    """
+    return f'{MARCA_CODIGO}{codigo}'
+
+
+def lerCodigo(valor) -> int:
+    """
+    Lê um código gravado por formatarCodigo.
+    :param valor: código (int ou texto com a MARCA_CODIGO).
+    :return: código do cliente.
+    """
+    if isinstance(valor, int):
+        return valor
+    if not valor.startswith(MARCA_CODIGO):
+        raise ValueError(f'Código de cliente inválido: {valor!r}')
+    return int(valor[len(MARCA_CODIGO):])
+
+
+class CadastroClientes(object):
+    """
+    Cadastro dos clientes de um registro de aluguéis, em um csv (Codigo,
+    Nome) que só recebe linhas acrescentadas no fim. Cada cliente recebe um
+    código próprio, mesmo que tenha o nome de outro; o registro de aluguéis
+    guarda só o código.
+
+    As gravações (cadastrar) devem acontecer dentro da transação do
+    registro, que serializa as escritas entre processos; sincronizar()
+    relê o arquivo se outro processo cadastrou clientes. O arquivo só é
+    lido no primeiro uso, para não pesar na abertura do registro.
+    """
+
+    def __init__(self, arquivo: str):
+        self.arquivo = arquivo
+        self.fichas = {}
+        # Códigos de cada nome normalizado, em ordem de cadastro.
+        self.codigosNome = {}
+        self.proximoCodigo = 1
+        self.assinatura = None
+        self._pendentes = None
+        self._carregado = False
+
+    def __len__(self) -> int:
+        self._carregar()
+        return len(self.fichas)
+
+    def __iter__(self):
+        self._carregar()
+        return iter(self.fichas.values())
+
+    def sincronizar(self) -> bool:
+        """
+        Relê o arquivo se ele foi alterado desde a ultima leitura ou
+        escrita deste cadastro.
+        :return: True (se recarregou)/ False (se ja estava em dia).
+        """
+        if self._carregado and self._assinatura() == self.assinatura:
+            return False
+        self._carregado = True
+        self.fichas = {}
+        self.codigosNome = {}
+        self.proximoCodigo = 1
+        try:
+            arquivo = open(self.arquivo, 'r', encoding='utf-8', newline='')
+        except FileNotFoundError:
+            pass
+        else:
+            with arquivo:
+                linhas = arquivo.readlines()
+            # Última linha sem '\n': escrita interrompida.
+            if linhas and not linhas[-1].endswith('\n'):
+                linhas.pop()
+            for codigo, nome in csv.reader(linhas[1:]):
+                self._incluir(int(codigo), nome)
+        self.assinatura = self._assinatura()
+        return True
+
+    def buscar(self, codigo: int) -> FichaCliente | None:
+        self._carregar()
+        return self.fichas.get(codigo)
+
+    def codigosDoNome(self, nome: str) -> list[int]:
+        """
+        Retorna os códigos dos clientes com o nome.
+        :param nome: nome (normalizado aqui).
+        :return: lista de códigos, em ordem de cadastro.
+        """
+        self._carregar()
+        return list(self.codigosNome.get(normalizarNome(nome), ()))
+
+    def cadastrar(self, nome: str) -> FichaCliente:
+        """
+        Cadastra um novo cliente, com um novo código.
+        :param nome: nome do cliente.
+        :return: ficha do cliente.
+        """
+        self._carregar()
+        ficha = self._incluir(self.proximoCodigo, normalizarNome(nome))
+        self._gravar([ficha])
+        return ficha
+
+    def incluir(self, codigo: int, nome: str) -> FichaCliente:
+        """
+        Cadastra um cliente com um código ja definido (ex.: importado de
+        outro cadastro).
+        :param codigo: código do cliente.
+        :param nome: nome do cliente.
+        :return: ficha do cliente.
+        """
+        self._carregar()
+        ficha = self.fichas.get(codigo)
+        if ficha is not None:
+            if ficha.nome != normalizarNome(nome):
+                raise ValueError(f'Código {codigo} ja cadastrado para '
+                                 f'{ficha.nome}')
+            return ficha
+        ficha = self._incluir(codigo, normalizarNome(nome))
+        self._gravar([ficha])
+        return ficha
+
+    def lerCliente(self, valor) -> int:
+        """
+        Lê o cliente de uma linha do registro: o código (com a
+        MARCA_CODIGO, ver formatarCodigo) ou, nos registros gravados antes
+        do cadastro (quando o nome era a identidade do cliente), o nome
+        (ver codigoDoNome).
+        :param valor: código (int ou texto com a marca) ou nome.
+        :return: código do cliente.
+        """
+        if isinstance(valor, int) or valor.startswith(MARCA_CODIGO):
+            return lerCodigo(valor)
+        return self.codigoDoNome(valor)
+
+    def codigoDoNome(self, nome: str) -> int:
+        """
+        Retorna o código do primeiro cliente com o nome, cadastrando-o se
+        ainda não existir.
+        :param nome: nome (normalizado aqui).
+        :return: código do cliente.
+        """
+        self.sincronizar()
+        codigos = self.codigosNome.get(normalizarNome(nome))
+        return codigos[0] if codigos else self.cadastrar(nome).codigo
+
+    @contextmanager
+    def emLote(self):
+        """
+        Junta as gravações dos clientes cadastrados dentro do bloco em uma
+        única escrita no fim dele.
+        """
+        if self._pendentes is not None:
+            yield self
+            return
+        self._pendentes = []
+        try:
+            yield self
+        finally:
+            pendentes, self._pendentes = self._pendentes, None
+            self._gravar(pendentes)
+
+    def _carregar(self) -> None:
+        if not self._carregado:
+            self.sincronizar()
+
+    def _incluir(self, codigo: int, nome: str) -> FichaCliente:
+        nome = sys.intern(nome)
+        ficha = self.fichas[codigo] = FichaCliente(codigo, nome)
+        self.codigosNome.setdefault(nome, []).append(codigo)
+        self.proximoCodigo = max(self.proximoCodigo, codigo + 1)
+        return ficha
+
+    def _gravar(self, fichas: list[FichaCliente]) -> None:
+        if self._pendentes is not None:
+            self._pendentes += fichas
+            return
+        if not fichas:
+            return
+        novo = not os.path.exists(self.arquivo)
+        with open(self.arquivo, 'a', encoding='utf-8', newline='') as arquivo:
+            escrita = csv.writer(arquivo, lineterminator='\n')
+            if novo:
+                escrita.writerow(CABECALHO_CLIENTES)
+            escrita.writerows([ficha.codigo, ficha.nome] for ficha in fichas)
+        self.assinatura = self._assinatura()
+
+    def _assinatura(self) -> tuple | None:
+        try:
+            estado = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return None
+        return estado.st_ino, estado.st_size, estado.st_mtime_ns
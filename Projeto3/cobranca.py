@@ -0,0 +1,58 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Quantas horas cada plano cobra como um período.
+PERIODOS = {'hora': 1, 'dia': 24, 'semana': 168}
+
+
+def calcularValoresLote(planos, qnt_bikes, qnt_horas, precos: dict):
+    """
+    Calcula em lote o mesmo valor de Loja.calcularValorConta para colunas
+    de aluguéis (períodos arredondados para cima e desconto de 30% para mais
+    de 2 bikes). Usa numpy quando instalado; senão percorre as colunas com
+    o modulo array.
+    :param planos: sequencia de planos ('hora', 'dia', 'semana').
+    :param qnt_bikes: sequencia de quantidades de bikes.
+    :param qnt_horas: sequencia de durações em horas.
+    :param precos: preço de um período de cada plano (Loja.planos).
+    :return: valores na ordem das colunas (numpy.ndarray ou array('d')).
+    """
+    if numpy is not None:
+        return _calcularComNumpy(planos, qnt_bikes, qnt_horas, precos)
+    return _calcularComArray(planos, qnt_bikes, qnt_horas, precos)
+
+
+def _calcularComNumpy(planos, qnt_bikes, qnt_horas, precos: dict):
+    planos = numpy.asarray(planos)
+    bikes = numpy.asarray(qnt_bikes, dtype=numpy.int64)
+    horas = numpy.asarray(qnt_horas, dtype=numpy.int64)
+    periodos = numpy.zeros(len(planos), dtype=numpy.int64)
+    preco = numpy.zeros(len(planos), dtype=numpy.float64)
+    for plano, valor in precos.items():
+        selecionados = planos == plano
+        periodos[selecionados] = PERIODOS[plano]
+        preco[selecionados] = valor
+    if not periodos.all():
+        raise ValueError('Plano inexistente.')
+    # Divisao inteira arredondada para cima, igual ao ceil(horas / periodo).
+    valores = preco * bikes * -(-horas // periodos)
+    return numpy.where(bikes > 2, valores * 0.7, valores)
+
+
+def _calcularComArray(planos, qnt_bikes, qnt_horas, precos: dict):
+    try:
+        tabela = {plano: (valor, PERIODOS[plano])
+                  for plano, valor in precos.items()}
+        valores = array('d', (
+            tabela[plano][0] * bikes * -(-horas // tabela[plano][1])
+            for plano, bikes, horas in zip(planos, qnt_bikes, qnt_horas)))
+    except KeyError:
+        raise ValueError('Plano inexistente.') from None
+    for i, bikes in enumerate(qnt_bikes):
+        if bikes > 2:
+            valores[i] *= 0.7
+    return valores
@@ -0,0 +1,97 @@
+from datetime import datetime
+from functools import lru_cache
+import re
+
+# Mesmas expressões que o datetime.strptime monta para '%d/%m/%Y %H' (o
+# espaço do formato vira \s+), para aceitar e recusar exatamente as mesmas
+# entradas.
+_PADRAO_ENTRADA = re.compile(
+    r'(3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])/(1[0-2]|0[1-9]|[1-9])/'
+    r'(\d\d\d\d)\s+(2[0-3]|[0-1]\d|\d)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def converterDataEntrada(data: str) -> datetime:
+    """
+    Equivalente rápido de datetime.strptime(data, '%d/%m/%Y %H'), com as
+    mesmas mensagens de erro ('does not match format', 'unconverted data
+    remains', 'day is out of range for month').
+    :param data: data no padrao 'dd/mm/yyyy H'.
+    :return: datetime.
+    """
+    if not isinstance(data, str):
+        raise TypeError('strptime() argument 1 must be str, not '
+                        f'{type(data).__name__}')
+    encontrado = _PADRAO_ENTRADA.match(data)
+    if encontrado is None:
+        raise ValueError(f'time data {data!r} does not match format '
+                         "'%d/%m/%Y %H'")
+    if encontrado.end() != len(data):
+        raise ValueError('unconverted data remains: '
+                         f'{data[encontrado.end():]}')
+    dia, mes, ano, hora = encontrado.groups()
+    return datetime(int(ano), int(mes), int(dia), int(hora))
+
+
+@lru_cache(maxsize=4096)
+def converterDataGravada(data: str) -> datetime:
+    """
+    Converte uma data no formato antigo do registro (str(datetime), ex.:
+    '2021-02-11 12:00:00') lendo as posições fixas de ano, mês, dia e hora,
+    sem passar pelo strptime.
+    :param data: data gravada.
+    :return: datetime.
+    """
+    return datetime(int(data[0:4]), int(data[5:7]), int(data[8:10]),
+                    int(data[11:13]))
+
+
+# Dia ordinal (datetime.toordinal) de 01/01/1970.
+_ORDINAL_EPOCA = 719163
+
+
+def paraHorasEpoch(data: datetime) -> int:
+    """
+    Converte uma data (sem fuso, tratada como UTC) em horas inteiras desde
+    01/01/1970 00h, a representação gravada no registro de aluguéis.
+    :param data: datetime.
+    :return: horas desde a época.
+    """
+    return (data.toordinal() - _ORDINAL_EPOCA) * 24 + data.hour
+
+
+def deHorasEpoch(horas: int) -> datetime:
+    """
+    Inverso de paraHorasEpoch.
+    :param horas: horas desde a época.
+    :return: datetime.
+    """
+    dias, hora = divmod(horas, 24)
+    return datetime.fromordinal(dias + _ORDINAL_EPOCA).replace(hour=hora)
+
+
+def lerHorasGravadas(valor) -> int:
+    """
+    Lê uma data gravada no registro em horas desde a época. Aceita também o
+    formato antigo (str(datetime), ex.: '2021-02-11 12:00:00') dos arquivos
+    gravados antes da mudança.
+    :param valor: horas (int ou texto) ou data no formato antigo.
+    :return: horas desde a época.
+    """
+    if isinstance(valor, int):
+        return valor
+    if valor.lstrip('-').isdigit():
+        return int(valor)
+    return paraHorasEpoch(converterDataGravada(valor))
+
+
+def lerHorasOpcionais(valor) -> int | None:
+    """
+    Como lerHorasGravadas, para campos opcionais gravados como 0 (ou
+    ausentes) quando não informados.
+    :param valor: horas, data no formato antigo, 0, '' ou None.
+    :return: horas desde a época / None.
+    """
+    if valor in (None, '', '0', 0):
+        return None
+    return lerHorasGravadas(valor)
@@ -0,0 +1,180 @@
+import heapq
+
+# Horas cobertas pelo índice: [0, 2 ** HORIZONTE_BITS) desde a época, ou
+# seja, de 1970 até cerca de 2448.
+HORIZONTE_BITS = 22
+
+
+class ArvoreOcupacao(object):
+    """
+    Árvore de segmentos dinâmica sobre as horas desde a época: cada nó
+    guarda o máximo de bicicletas comprometidas no seu intervalo e o quanto
+    foi somado ao intervalo inteiro, e só os nós tocados por algum aluguel
+    existem (dicionarios indexados como um heap, raiz 1). Somar em um
+    intervalo e consultar o máximo de um intervalo custam O(log) do
+    horizonte.
+    """
+
+    def __init__(self, bits=HORIZONTE_BITS):
+        self.limite = 1 << bits
+        self.maximos = {}
+        self.somas = {}
+
+    def adicionar(self, inicio: int, fim: int | None, qnt_bikes: int) -> None:
+        """
+        Soma qnt_bikes (negativo para liberar) às horas [inicio, fim).
+        :param inicio: hora inicial (horas desde a época).
+        :param fim: hora final, exclusiva (None: sem fim previsto).
+        :param qnt_bikes: bicicletas comprometidas.
+        """
+        inicio, fim = self._recortar(inicio, fim)
+        if inicio < fim:
+            self._adicionar(1, 0, self.limite, inicio, fim, qnt_bikes)
+
+    def maximo(self, inicio: int, fim: int | None = None) -> int:
+        """
+        Retorna o maior número de bicicletas comprometidas em uma mesma
+        hora de [inicio, fim).
+        :param inicio: hora inicial (horas desde a época).
+        :param fim: hora final, exclusiva (None: até o fim do horizonte).
+        :return: bicicletas comprometidas no pico do intervalo.
+        """
+        inicio, fim = self._recortar(inicio, fim)
+        if inicio >= fim:
+            return 0
+        return self._maximo(1, 0, self.limite, inicio, fim)
+
+    def _recortar(self, inicio, fim) -> tuple[int, int]:
+        fim = self.limite if fim is None else min(fim, self.limite)
+        return max(inicio, 0), fim
+
+    def _adicionar(self, no, ini, fim, a, b, valor) -> None:
+        if a <= ini and fim <= b:
+            self.somas[no] = self.somas.get(no, 0) + valor
+            self.maximos[no] = self.maximos.get(no, 0) + valor
+            return
+        meio = (ini + fim) // 2
+        if a < meio:
+            self._adicionar(2 * no, ini, meio, a, b, valor)
+        if meio < b:
+            self._adicionar(2 * no + 1, meio, fim, a, b, valor)
+        self.maximos[no] = self.somas.get(no, 0) + max(
+            self.maximos.get(2 * no, 0), self.maximos.get(2 * no + 1, 0))
+
+    def _maximo(self, no, ini, fim, a, b) -> int:
+        if a <= ini and fim <= b:
+            return self.maximos.get(no, 0)
+        meio = (ini + fim) // 2
+        if b <= meio:
+            melhor = self._maximo(2 * no, ini, meio, a, b)
+        elif meio <= a:
+            melhor = self._maximo(2 * no + 1, meio, fim, a, b)
+        else:
+            melhor = max(self._maximo(2 * no, ini, meio, a, b),
+                         self._maximo(2 * no + 1, meio, fim, a, b))
+        return self.somas.get(no, 0) + melhor
+
+
+class IndiceOcupacao(object):
+    """
+    Bicicletas comprometidas por hora na loja toda e em cada estação de
+    retirada (uma ArvoreOcupacao para cada), montado a partir dos aluguéis
+    em aberto: cada um ocupa de data_ini até a devolução prevista (ou sem
+    fim, se não houver previsão), e nas estações o aluguel com previsão é
+    tratado como devolvido na estação de retirada. Um aluguel que passa da
+    previsão sem ser devolvido continua ocupando, sem fim, até a devolução
+    (ver vencer).
+
+    saldos guarda, por estação, quanto o estoque dela mudou com os aluguéis
+    ja devolvidos (devoluções menos retiradas), preenchido por quem monta
+    o índice e atualizado por devolver: o estoque livre da estação em um
+    intervalo é o cadastrado mais o saldo menos o pico do intervalo.
+    """
+
+    def __init__(self, bits=HORIZONTE_BITS):
+        self.bits = bits
+        self.loja = ArvoreOcupacao(bits)
+        self.estacoes = {}
+        self.saldos = {}
+        # Heap de (data_prevista, data_ini, qnt_bikes, estacao) dos aluguéis
+        # que ocupam até a devolução prevista, devoluções ja feitas desses
+        # aluguéis e hora até a qual as previsões ja venceram.
+        self._vencimentos = []
+        self._devolvidosAntes = {}
+        self.vencidosAte = None
+
+    def adicionar(self, inicio: int, fim: int | None, qnt_bikes: int,
+                  estacao: str = '') -> None:
+        """
+        Registra a abertura (qnt_bikes positivo) de um aluguel, ou desfaz
+        uma abertura (negativo; ver também devolver).
+        :param inicio: data inicial (horas desde a época).
+        :param fim: devolução prevista (None: sem previsão).
+        :param qnt_bikes: bicicletas do aluguel.
+        :param estacao: estação de retirada ('' em lojas sem estações).
+        """
+        if fim is not None and self.vencidosAte is not None and \
+                fim <= self.vencidosAte:
+            # Previsão vencida: o aluguel ja ocupa sem fim.
+            fim = None
+        elif fim is not None:
+            vencimento = (fim, inicio, abs(qnt_bikes), estacao)
+            if qnt_bikes > 0:
+                heapq.heappush(self._vencimentos, vencimento)
+            else:
+                self._devolvidosAntes[vencimento] = \
+                    self._devolvidosAntes.get(vencimento, 0) + 1
+        self._adicionarNasArvores(inicio, fim, qnt_bikes, estacao)
+
+    def devolver(self, inicio: int, fim: int | None, qnt_bikes: int,
+                 estacao: str = '', estacao_fim: str = '') -> None:
+        """
+        Registra a devolução de um aluguel aberto com adicionar.
+        :param estacao_fim: estação de devolução (padrao: a de retirada).
+        """
+        self.adicionar(inicio, fim, -qnt_bikes, estacao)
+        if estacao:
+            estacao_fim = estacao_fim or estacao
+            self.saldos[estacao] = self.saldos.get(estacao, 0) - qnt_bikes
+            self.saldos[estacao_fim] = self.saldos.get(estacao_fim, 0) + \
+                qnt_bikes
+
+    def vencer(self, agora: int) -> None:
+        """
+        Estende até a devolução os aluguéis que passaram da devolução
+        prevista sem devolver as bicicletas: elas continuam fora da loja e
+        não podem ir para outro pedido.
+        :param agora: hora atual (horas desde a época).
+        """
+        vencimentos = self._vencimentos
+        while vencimentos and vencimentos[0][0] <= agora:
+            vencimento = heapq.heappop(vencimentos)
+            devolvidos = self._devolvidosAntes.get(vencimento, 0)
+            if devolvidos:
+                self._devolvidosAntes[vencimento] = devolvidos - 1
+            else:
+                fim, _, qnt_bikes, estacao = vencimento
+                self._adicionarNasArvores(fim, None, qnt_bikes, estacao)
+        if self.vencidosAte is None or agora > self.vencidosAte:
+            self.vencidosAte = agora
+
+    def maximo(self, inicio: int, fim: int | None = None,
+               estacao: str = None) -> int:
+        """
+        Retorna o pico de bicicletas comprometidas em [inicio, fim), na
+        loja toda ou só nas retiradas de uma estação.
+        :param inicio: hora inicial (horas desde a época).
+        :param fim: hora final, exclusiva (None: até o fim do horizonte).
+        :param estacao: estação de retirada (None: loja toda).
+        :return: bicicletas comprometidas no pico do intervalo.
+        """
+        arvore = self.loja if estacao is None else self.estacoes.get(estacao)
+        return 0 if arvore is None else arvore.maximo(inicio, fim)
+
+    def _adicionarNasArvores(self, inicio, fim, qnt_bikes, estacao) -> None:
+        self.loja.adicionar(inicio, fim, qnt_bikes)
+        if estacao:
+            arvore = self.estacoes.get(estacao)
+            if arvore is None:
+                arvore = self.estacoes[estacao] = ArvoreOcupacao(self.bits)
+            arvore.adicionar(inicio, fim, qnt_bikes)
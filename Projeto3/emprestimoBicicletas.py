@@ -1,19 +1,57 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from math import ceil
-import csv
+import os
+
+from armazenamento import Aluguel
+from cadastroClientes import normalizarNome
+from cobranca import calcularValoresLote
+from datas import converterDataEntrada, paraHorasEpoch
+from disponibilidade import IndiceOcupacao
+from metricas import METRICAS, cronometrado, medir
+from registroAlugueis import RegistroAlugueis
+from relatorios import Relatorio, gerarRelatorio
+from resultados import CodigoErro, ErroLoja, Resultado, codigoDoErro
+
+
+def _camposDoLote(registro) -> tuple:
+    """
+    Retorna os campos de um pedido ou fechamento de um lote (tupla vazia se
+    o registro não for uma sequência), para que um registro malformado vire
+    um erro só dele e não interrompa o lote.
+    """
+    try:
+        return tuple(registro)
+    except TypeError:
+        return ()
 
 
 class Cliente(object):
 
-    def __init__(self, nome):
-        self.nome = nome.strip().title()
+    def __init__(self, nome, loja=None, codigo=None):
+        self.nome = normalizarNome(nome)
+        # Código no cadastro de clientes da loja (ver Loja.cadastrarCliente);
+        # sem ele o cliente é identificado pelo nome.
+        self.codigo = codigo
+        # Loja injetada; sem ela o cliente usa a loja compartilhada do
+        # arquivo padrao.
+        self.loja = loja
+
+    def identificacao(self) -> int | str:
+        return self.nome if self.codigo is None else self.codigo
+
+    def lojaAtual(self):
+        """
+        Retorna a loja a qual o cliente esta vinculado.
+        :return: objeto Loja.
+        """
+        return self.loja if self.loja is not None else Loja.compartilhada()
 
     def mostrarBicicletasDisponiveis(self) -> int:
         """
         Mostra e retorna o estoque atual do objeto Loja.
         :return: quantidade disponivel de bikes: int.
         """
-        estoque_atual = Loja().mostrarEstoque()
+        estoque_atual = self.lojaAtual().mostrarEstoque()
         print(f'Bicicletas disponíveis: {estoque_atual}')
         return estoque_atual
 
@@ -26,7 +64,8 @@ class Cliente(object):
         :param data_ini: data atual do início do aluguel 'dd/mm/yyyy H'.
         :return: True (se pedido aceito)/ False (se pedido negado).
         """
-        return Loja().receberPedido(self.nome, qnt_bikes, plano, data_ini)
+        return self.lojaAtual().receberPedido(self.identificacao(), qnt_bikes,
+                                             plano, data_ini)
 
     def finalizarConta(self, data_fim: str) -> bool:
         """
@@ -36,79 +75,441 @@ class Cliente(object):
         :return: True (se pedido finalizado com sucesso)/
         False (se pedido negado).
         """
-        return Loja().finalizarConta(self.nome, data_fim)
+        return self.lojaAtual().finalizarConta(self.identificacao(), data_fim)
 
 
 class Loja(object):
+    # Lojas compartilhadas, uma por arquivo (caminho absoluto).
+    _compartilhadas = {}
 
-    def __init__(self, estoque_definido=10):
+    def __init__(self, estoque_definido=10, arquivo='clientes.csv',
+                 armazenamento=None, estacoes=None, relogio=datetime.now):
         self.planos = {'hora': 5, 'dia': 25, 'semana': 100}
-        try:
-            arquivo = open('clientes.csv', 'r', encoding='UTF-8')
-        except:
-            self.criarArquivoCSV()
-        else:
-            arquivo.close()
-        finally:
-            self.estoqueBikes = estoque_definido - self.calcularBicicletasAlugadas()
+        # Rede de estações (estacoes.RedeEstacoes). Com ela cada pedido
+        # retira de uma estação e o estoque total passa a ser a soma das
+        # bicicletas das estações.
+        self.estacoes = estacoes
+        if estacoes is not None:
+            estoque_definido = estacoes.totalBicicletas()
+        self.estoque_definido = estoque_definido
+        # Backend do registro de aluguéis (ver armazenamento.Armazenamento);
+        # por padrao o csv.
+        if armazenamento is None:
+            armazenamento = RegistroAlugueis(arquivo)
+        self.registro = armazenamento
+        # Agregados do historico (ver relatorio()), atualizados a cada
+        # conta finalizada por esta loja.
+        self._relatorio = None
+        self._versaoRelatorio = None
+        # Bicicletas comprometidas por hora (ver bicicletasLivres).
+        self._ocupacao = None
+        self._versaoOcupacao = None
+        # Data e hora atuais (datetime): o estoque atual é o livre nessa
+        # hora, e os aluguéis que passaram da devolução prevista sem
+        # devolver continuam ocupando (ver IndiceOcupacao.vencer).
+        self.relogio = relogio
+
+    @classmethod
+    def compartilhada(cls, arquivo='clientes.csv', estoque_definido=10):
+        """
+        Retorna a loja compartilhada do arquivo, criando-a na primeira vez.
+        O índice em memória continua carregado entre as chamadas; antes de
+        cada operação a loja confere se o arquivo foi alterado por fora e só
+        então o relê (ver RegistroAlugueis.sincronizar).
+        :param arquivo: arquivo csv de clientes.
+        :param estoque_definido: estoque usado se a loja ainda nao existir.
+        :return: objeto Loja.
+        """
+        chave = os.path.abspath(arquivo)
+        loja = cls._compartilhadas.get(chave)
+        if loja is None:
+            loja = cls._compartilhadas[chave] = cls(estoque_definido, arquivo)
+        return loja
+
+    def fechar(self) -> None:
+        """
+        Encerra a sessao da loja, retirando-a das lojas compartilhadas e
+        liberando o armazenamento. A proxima chamada a Loja.compartilhada()
+        relê o arquivo.
+        """
+        chave = os.path.abspath(self.registro.arquivo)
+        if self._compartilhadas.get(chave) is self:
+            del self._compartilhadas[chave]
+        self.registro.fechar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    @property
+    def estoqueBikes(self) -> int:
+        # Livres na hora atual: reservas que ainda não começaram não contam.
+        agora = paraHorasEpoch(self.relogio())
+        return self._bicicletasLivresEntre(agora, agora + 1)
 
     def mostrarEstoque(self) -> int:
         """
         Retorna o estoque atual de bicicletas disponíveis.
         :return: quantidade de bicicletas disponíveis
         """
+        self.registro.sincronizar()
         return self.estoqueBikes
 
-    def receberPedido(self, cliente: str, qnt_bikes: int, plano: str,
-                      data_ini: str) -> bool:
+    def estoqueEstacao(self, estacao: str) -> int:
+        """
+        Retorna as bicicletas disponíveis em uma estação na hora atual: as
+        que ela tinha no cadastro mais o saldo do registro (devoluções menos
+        retiradas), sem descontar as reservas que ainda não começaram.
+        :param estacao: código da estação.
+        :return: quantidade de bicicletas disponíveis na estação.
+        """
+        agora = paraHorasEpoch(self.relogio())
+        return self._bicicletasLivresEntre(agora, agora + 1, estacao)
+
+    def estacaoMaisProxima(self, x: float, y: float,
+                           qnt_bikes: int = 1) -> str | None:
+        """
+        Busca a estação mais próxima da posição com bicicletas suficientes.
+        :param x: coordenada x.
+        :param y: coordenada y.
+        :param qnt_bikes: quantidade de bicicletas desejada.
+        :return: código da estação / None se nenhuma tiver o suficiente.
+        """
+        self.registro.sincronizar()
+        estacao = self.estacoes.maisProxima(x, y, qnt_bikes,
+                                            self.estoqueEstacao)
+        return None if estacao is None else estacao.codigo
+
+    @cronometrado('loja.bicicletasLivres')
+    def bicicletasLivres(self, data_ini: str, data_fim: str = None,
+                         estacao: str = None) -> int:
+        """
+        Retorna quantas bicicletas ficam livres durante todo o intervalo
+        [data_ini, data_fim), considerando os aluguéis em aberto até a
+        devolução prevista (ou para sempre, se não houver previsão) e as
+        reservas futuras.
+        :param data_ini: início do intervalo no padrao 'dd/mm/yyyy H'.
+        :param data_fim: fim do intervalo no padrao 'dd/mm/yyyy H' (None:
+        sem fim).
+        :param estacao: estação de retirada (None: loja toda).
+        :return: quantidade de bicicletas livres no intervalo.
+        """
+        self.registro.sincronizar()
+        inicio = paraHorasEpoch(self._converterData(data_ini))
+        fim = None if data_fim is None else \
+            paraHorasEpoch(self._converterData(data_fim))
+        return self._bicicletasLivresEntre(inicio, fim, estacao)
+
+    @cronometrado('loja.cadastrarCliente')
+    def cadastrarCliente(self, nome: str) -> int | bool:
+        """
+        Cadastra um novo cliente, mesmo que ja exista outro com o mesmo
+        nome. Pedidos e contas de clientes que dividem o nome devem usar o
+        código no lugar do nome.
+        :param nome: nome do cliente.
+        :return: código do cliente / False (se nome inválido).
+        """
+        if type(nome) != str or len(nome.strip()) < 2:
+            print('Nome inválido.')
+            return False
+        with self.registro.transacao():
+            self.registro.clientes.sincronizar()
+            return self.registro.clientes.cadastrar(nome).codigo
+
+    @cronometrado('loja.efetuarPedido')
+    def efetuarPedido(self, cliente: int | str, qnt_bikes: int, plano: str,
+                      data_ini: str, estacao: str = None,
+                      data_prevista: str = None) -> Resultado:
+        """
+        Versão silenciosa de receberPedido, para uso programático: não
+        imprime nada e devolve o resultado com o código do erro.
+        :return: Resultado (cliente: código do cliente, se aceito).
+        """
+        # Validacao e gravacao na mesma transacao: nenhum outro pedido (de
+        # outra thread ou processo) consome o estoque entre as duas.
+        with self.registro.transacao():
+            try:
+                cliente, qnt, plano, data_ini, data_prevista = \
+                    self._validarPedido(cliente, qnt_bikes, plano, data_ini,
+                                        estacao=estacao,
+                                        data_prevista=data_prevista)
+            except Exception as erro:
+                METRICAS.incrementar('loja.pedidosRecusados')
+                return Resultado.falha(erro)
+            inicio = paraHorasEpoch(data_ini)
+            fim = None if data_prevista is None else \
+                paraHorasEpoch(data_prevista)
+            codigo = self._codigoDoPedido(cliente)
+            self.registro.registrarAbertura(codigo, qnt, plano, inicio,
+                                            estacao or '', fim)
+            self._reservarNoIndice(inicio, fim, qnt, estacao or '')
+        return Resultado(True, cliente=codigo)
+
+    @cronometrado('loja.receberPedido')
+    def receberPedido(self, cliente: int | str, qnt_bikes: int, plano: str,
+                      data_ini: str, estacao: str = None,
+                      data_prevista: str = None) -> bool:
         """
         Recebe parâmetros para fazer pedido. Vverifica em outro método se são
-        válidos. Se sim, grava o pedido no arquivo csv.
-        :param cliente: nome do cliente
+        válidos. Se sim, grava o pedido no registro de aluguéis.
+        :param cliente: código ou nome do cliente (um nome ainda sem
+        cadastro cadastra um novo cliente)
         :param qnt_bikes: quantidade de bicicletas solicitada
         :param plano: plano
         :param data_ini: data e hora inicial no padrao: 'dd/mm/yyyy H'
+        :param estacao: estação de retirada (lojas com estações)
+        :param data_prevista: devolução prevista no padrao 'dd/mm/yyyy H'
+        (opcional; com ela o pedido só ocupa o estoque até essa data)
         :return: True (se parametros validos)/ False (se parametros invalidos)
         """
-        parametros = self.validarParametros(cliente, qnt_bikes, plano,
-                                            data_ini)
-        if parametros is not False:
-            itens_pedidos = list(parametros) + [0, 0]
-            with open('clientes.csv', 'a', encoding='utf-8') as dados:
-                escrita = csv.writer(dados)
-                escrita.writerows([itens_pedidos])
+        resultado = self.efetuarPedido(cliente, qnt_bikes, plano, data_ini,
+                                       estacao, data_prevista)
+        if resultado:
             print('Pedido realizado com sucesso.')
             return True
         else:
+            print(resultado.mensagem)
             print('Não foi possível realizar o pedido.')
             return False
 
-    def finalizarConta(self, cliente: str, data_fim: str) -> tuple[
-                                                                 bool, float] | bool:
+    @cronometrado('loja.efetuarFechamento')
+    def efetuarFechamento(self, cliente: int | str, data_fim: str,
+                          estacao: str = None) -> Resultado:
+        """
+        Versão silenciosa de finalizarConta, para uso programático: não
+        imprime nada e devolve o resultado com o código do erro.
+        :return: Resultado (cliente: código do cliente e valor: valor da
+        conta, se finalizada).
+        """
+        with self.registro.transacao():
+            try:
+                cliente, data_fim, valor, estacao = self._validarFechamento(
+                    cliente, data_fim, estacao=estacao)
+            except Exception as erro:
+                METRICAS.incrementar('loja.contasRecusadas')
+                return Resultado.falha(erro)
+            aluguel = self.registro.buscarAberto(cliente)
+            self.registro.registrarFechamento(cliente, data_fim, valor,
+                                              estacao)
+            self._acumularNoRelatorio(aluguel, data_fim, valor, estacao)
+            self._devolverNoIndice(aluguel, estacao)
+        return Resultado(True, cliente=cliente, valor=valor)
+
+    @cronometrado('loja.finalizarConta')
+    def finalizarConta(self, cliente: int | str, data_fim: str,
+                       estacao: str = None) -> tuple[bool, float] | bool:
         """
         Finaliza conta do cliente se parâmetros válidos.
-        :param cliente: nome do cliente.
+        :param cliente: código ou nome do cliente.
         :param data_fim: data e hora da entrega das bikes no padrao 'dd/mm/yyyy H'.
+        :param estacao: estação de devolução (padrao: a de retirada).
         :return: True (se finalizado com sucesso)/ False (se dados invalidos).
         """
-        nome_valido = self.checarNomeNaLista(cliente)
-        if nome_valido:
-            data_fim = self.validarData(data_fim)
-            qnt_bikes, data_ini, plano = self.colhetarDados(cliente)
-            data_delta = self.calcularDeltaDatas(data_ini, data_fim)
-            if data_delta is not False:
-                delta_em_horas = self.tratarDeltaDataHora(data_delta)
-                # Gerar quanto deve pagar.
-                valor = round(self.calcularValorConta(plano, qnt_bikes,
-                                                      delta_em_horas), 2)
-                print(f'Valor da conta: R${valor:.2f}')
-                self.gravarFechamentoPedido(cliente, data_fim, valor)
-                print('Pedido pago e finalizado. Volte sempre.')
-                return True, valor
-        else:
-            print('Cliente não encontrado.')
-        return False
+        resultado = self.efetuarFechamento(cliente, data_fim, estacao)
+        if not resultado:
+            print(resultado.mensagem)
+            return False
+        print(f'Valor da conta: R${resultado.valor:.2f}')
+        print('Dados salvos com sucesso!')
+        print('Pedido pago e finalizado. Volte sempre.')
+        return True, resultado.valor
+
+    @cronometrado('loja.receberPedidos')
+    def receberPedidos(self, pedidos) -> list[dict]:
+        """
+        Recebe um lote de pedidos. Todos são validados contra o mesmo estado
+        do registro, descontando do estoque na ordem do lote, e os aceitos
+        são gravados de uma só vez.
+        :param pedidos: iteravel de (cliente, qnt_bikes, plano, data_ini),
+        opcionalmente seguidos de estacao (lojas com estações) e
+        data_prevista; cliente é o código ou o nome.
+        :return: um relatório por pedido, na ordem do lote:
+        {'cliente', 'sucesso', 'erro', 'codigo'} (erro: mensagem; codigo:
+        CodigoErro).
+        """
+        relatorio = []
+        aceitos = []
+        with self.registro.transacao():
+            # Os pedidos aceitos entram no índice de ocupação (da loja e da
+            # estação) e o próximo do lote ja os vê.
+            reservados = set()
+            try:
+                # Os clientes novos do lote vão para o cadastro (no fim do
+                # emLote) antes das aberturas irem para o diario: um diario
+                # com códigos ausentes do cadastro faria esses códigos serem
+                # dados de novo a outros clientes.
+                with self.registro.clientes.emLote():
+                    for pedido in pedidos:
+                        campos = _camposDoLote(pedido)
+                        cliente = campos[0] if campos else None
+                        try:
+                            codigo, qnt, plano, inicio, fim, estacao = \
+                                self._validarPedidoDoLote(campos, reservados)
+                        except Exception as erro:
+                            METRICAS.incrementar('loja.pedidosRecusados')
+                            relatorio.append({'cliente': cliente,
+                                              'sucesso': False,
+                                              'erro': str(erro),
+                                              'codigo': codigoDoErro(erro)})
+                            continue
+                        codigo = self._codigoDoPedido(codigo)
+                        self._reservarNoIndice(inicio, fim, qnt,
+                                               estacao or '')
+                        reservados.add(codigo)
+                        aceitos.append((codigo, qnt, plano, inicio,
+                                        estacao or '', fim))
+                        relatorio.append({'cliente': cliente,
+                                          'sucesso': True, 'erro': None,
+                                          'codigo': None})
+                self.registro.registrarAberturas(aceitos)
+            except BaseException:
+                # Reservas do lote que não chegaram ao registro.
+                self._ocupacao = None
+                raise
+        return relatorio
+
+    @cronometrado('loja.finalizarContas')
+    def finalizarContas(self, fechamentos) -> list[dict]:
+        """
+        Finaliza um lote de contas, validadas contra o mesmo estado do
+        registro e gravadas de uma só vez.
+        :param fechamentos: iteravel de (cliente, data_fim) ou, em lojas com
+        estações, (cliente, data_fim, estacao); cliente é o código ou o
+        nome.
+        :return: um relatório por fechamento, na ordem do lote:
+        {'cliente', 'sucesso', 'erro', 'codigo', 'valor'} (ver
+        receberPedidos).
+        """
+        relatorio = []
+        aceitos = []
+        alugueis = []
+        with self.registro.transacao():
+            fechados = set()
+            # Bicicletas ja devolvidas no lote, por estação.
+            devolvidas = {}
+            for fechamento in fechamentos:
+                campos = _camposDoLote(fechamento)
+                cliente = campos[0] if campos else None
+                try:
+                    if len(campos) < 2:
+                        raise ErroLoja(CodigoErro.DADOS_INVALIDOS,
+                                       'Fechamento incompleto.')
+                    _, data_fim, *estacao = campos
+                    codigo, data_fim, valor, estacao = self._validarFechamento(
+                        cliente, data_fim, fechados,
+                        estacao[0] if estacao else None, devolvidas)
+                except Exception as erro:
+                    METRICAS.incrementar('loja.contasRecusadas')
+                    relatorio.append({'cliente': cliente, 'sucesso': False,
+                                      'erro': str(erro),
+                                      'codigo': codigoDoErro(erro),
+                                      'valor': None})
+                else:
+                    fechados.add(codigo)
+                    aluguel = self.registro.buscarAberto(codigo)
+                    if estacao:
+                        devolvidas[estacao] = devolvidas.get(estacao, 0) + \
+                            aluguel.qnt_bikes
+                    aceitos.append((codigo, data_fim, valor, estacao))
+                    alugueis.append(aluguel)
+                    relatorio.append({'cliente': cliente, 'sucesso': True,
+                                      'erro': None, 'codigo': None,
+                                      'valor': valor})
+            self.registro.registrarFechamentos(aceitos)
+            for aluguel, (_, data_fim, valor, estacao) in zip(alugueis,
+                                                               aceitos):
+                self._acumularNoRelatorio(aluguel, data_fim, valor, estacao)
+                self._devolverNoIndice(aluguel, estacao)
+        return relatorio
+
+    @cronometrado('loja.relatorio')
+    def relatorio(self) -> Relatorio:
+        """
+        Retorna os agregados do historico (receita por plano e por dia,
+        bicicleta-horas, utilização do estoque). Na primeira chamada o
+        registro é percorrido uma vez; depois os agregados são mantidos a
+        cada conta finalizada por esta loja e só são recalculados se o
+        registro for alterado por fora.
+        :return: relatorios.Relatorio.
+        """
+        self.registro.sincronizar()
+        versao = self.registro.versaoExterna()
+        if self._relatorio is None or versao != self._versaoRelatorio:
+            self._relatorio = gerarRelatorio(self.registro.linhas(),
+                                             self.estoque_definido)
+            self._versaoRelatorio = versao
+        return self._relatorio
 
+    def _indiceOcupacao(self) -> IndiceOcupacao:
+        """
+        Retorna o índice de ocupação, (re)construído a partir dos aluguéis
+        em aberto na primeira vez e quando o registro é alterado por fora,
+        com as previsões vencidas até a hora atual.
+        """
+        versao = self.registro.versaoExterna()
+        if self._ocupacao is None or versao != self._versaoOcupacao:
+            with medir('loja.construirOcupacao'):
+                ocupacao = IndiceOcupacao()
+                retiradas = {}
+                for aluguel in self.registro.alugueisAbertos():
+                    ocupacao.adicionar(aluguel.data_ini,
+                                       aluguel.data_prevista,
+                                       aluguel.qnt_bikes, aluguel.estacao_ini)
+                    if aluguel.estacao_ini:
+                        retiradas[aluguel.estacao_ini] = retiradas.get(
+                            aluguel.estacao_ini, 0) + aluguel.qnt_bikes
+                # Saldo do registro sem as retiradas ainda em aberto, que o
+                # índice desconta pelo período de cada uma.
+                codigos = set(retiradas)
+                if self.estacoes is not None:
+                    codigos.update(estacao.codigo
+                                   for estacao in self.estacoes)
+                ocupacao.saldos = {
+                    codigo: self.registro.saldoEstacao(codigo) +
+                    retiradas.get(codigo, 0) for codigo in codigos}
+            self._ocupacao, self._versaoOcupacao = ocupacao, versao
+        self._ocupacao.vencer(paraHorasEpoch(self.relogio()))
+        return self._ocupacao
+
+    def _bicicletasLivresEntre(self, inicio: int, fim: int | None,
+                               estacao: str = None) -> int:
+        """
+        Bicicletas livres durante todo o intervalo [inicio, fim) (horas
+        desde a época), na loja toda ou em uma estação.
+        """
+        ocupacao = self._indiceOcupacao()
+        if estacao is None:
+            return self.estoque_definido - ocupacao.maximo(inicio, fim)
+        return self.estacoes[estacao].bicicletas + \
+            ocupacao.saldos.get(estacao, 0) - \
+            ocupacao.maximo(inicio, fim, estacao)
+
+    def _reservarNoIndice(self, inicio: int, fim: int | None,
+                          qnt_bikes: int, estacao: str = '') -> None:
+        # Índice ainda não construído (ou desatualizado) ja vai ler o
+        # registro com a alteração quando for usado.
+        if self._ocupacao is not None and \
+                self.registro.versaoExterna() == self._versaoOcupacao:
+            self._ocupacao.adicionar(inicio, fim, qnt_bikes, estacao)
+
+    def _devolverNoIndice(self, aluguel: Aluguel, estacao: str) -> None:
+        if self._ocupacao is not None and \
+                self.registro.versaoExterna() == self._versaoOcupacao:
+            self._ocupacao.devolver(aluguel.data_ini, aluguel.data_prevista,
+                                    aluguel.qnt_bikes, aluguel.estacao_ini,
+                                    estacao)
+
+    def _acumularNoRelatorio(self, aberto: Aluguel, data_fim: int,
+                             valor: float, estacao: str) -> None:
+        if self._relatorio is not None:
+            self._relatorio.adicionar(Aluguel(
+                aberto.cliente, aberto.qnt_bikes, aberto.plano,
+                aberto.data_ini, data_fim, str(valor), aberto.estacao_ini,
+                estacao))
+
+    @cronometrado('loja.calcularValorConta')
     def calcularValorConta(self, plano: str, qnt_bikes: int,
                            qnt_horas: int) -> float:
         """
@@ -131,69 +532,82 @@ class Loja(object):
         # Dar desconto de 30% se mais de 2 bikes.
         return valor * 0.7 if qnt_bikes > 2 else valor
 
-    def gravarFechamentoPedido(self, nome_cliente: str, data_fim: datetime,
-                               valor: float) -> None:
+    def calcularValoresConta(self, planos, qnt_bikes, qnt_horas):
+        """
+        Versão em lote de calcularValorConta, para recalcular o historico
+        (ex.: auditoria ou mudança de preços em self.planos).
+        :param planos: sequencia de planos.
+        :param qnt_bikes: sequencia de quantidades de bikes alugadas.
+        :param qnt_horas: sequencia de durações em horas.
+        :return: valores finais na ordem das sequencias.
+        """
+        return calcularValoresLote(planos, qnt_bikes, qnt_horas, self.planos)
+
+    @cronometrado('loja.gravarFechamentoPedido')
+    def gravarFechamentoPedido(self, cliente: int, data_fim: int,
+                               valor: float, estacao: str = None) -> None:
         """
-        Grava no arquivo csv os dados do fechamento do pedido.
-        :param nome_cliente: nome cliente.
-        :param data_fim: data de entrega das bicicletas.
+        Grava no registro de aluguéis os dados do fechamento do pedido.
+        :param cliente: código do cliente.
+        :param data_fim: data de entrega das bicicletas (horas desde a época).
         :param valor: valor total da conta.
+        :param estacao: estação de devolução (padrao: a de retirada).
         """
-        copia = []
-        with open('clientes.csv', 'r', encoding='UTF-8') as arquivo_leitura:
-            leitura = csv.reader(arquivo_leitura)
-            for row in leitura:
-                if row[0] == nome_cliente and row[5] == '0':
-                    linha = list(row)
-                    linha[4] = data_fim
-                    linha[5] = valor
-                    copia.append(linha)
-                else:
-                    copia.append(row)
-        with open('clientes.csv', 'w', encoding='UTF-8') as arquivo_escrita:
-            escrita = csv.writer(arquivo_escrita)
-            escrita.writerows(copia)
+        self.registro.registrarFechamento(cliente, data_fim, valor, estacao)
         print('Dados salvos com sucesso!')
 
-    def colhetarDados(self, nome_cliente: str) -> tuple[int, str, str]:
+    def colhetarDados(self, cliente: int) -> tuple[int, int, str]:
         """
         Colhe os dados necessários do cliente.
-        :param nome_cliente: nome do cliente
-        :return: quantidade de bikes alugada, data incial, plano
+        :param cliente: código do cliente
+        :return: quantidade de bikes alugada, data incial (horas desde a
+        época), plano
         """
-        with open('clientes.csv', 'r', encoding='UTF-8') as arquivo:
-            leitura = csv.DictReader(arquivo)
-            for row in leitura:
-                if row['Cliente'] == nome_cliente and row['Total'] == '0':
-                    qnt_bikes = row['Quantidade_Alugada']
-                    data_ini = row['Data_Inicial']
-                    plano = row['Plano']
-                    break
-        return int(qnt_bikes), data_ini, plano
+        aluguel = self.registro.buscarAberto(cliente)
+        return aluguel.qnt_bikes, aluguel.data_ini, aluguel.plano
 
-    def tratarDeltaDataHora(self, data: timedelta) -> int:
+    def checarNomeNaLista(self, cliente: int | str) -> bool:
         """
-        Recebe um time delta e devolve a quantidade em horas.
-        :param data: timedelta
-        :return: horas
+        Checa se o cliente tem um aluguel em aberto no registro.
+        :param cliente: código ou nome do cliente
+        :return: True (se nome na lista)/ False (se nome nao estiver na lista)
         """
-        return int(data.total_seconds() / 3600)
+        if type(cliente) != int:
+            cliente = self._identificarCliente(cliente)
+            if type(cliente) != int:
+                return False
+        # Clientes que ja finalizaram o pedido nao ficam no indice.
+        return self.registro.buscarAberto(cliente) is not None
 
-    def checarNomeNaLista(self, nome_cliente: str) -> bool:
+    def _identificarCliente(self, cliente: int | str) -> int | str:
         """
-        Checa se nome do cliente esta no arquivo csv.
-        :param nome_cliente: nome do cliente
-        :return: True (se nome na lista)/ False (se nome nao estiver na lista)
+        Identifica o cliente pelo código ou pelo nome, levantando ErroLoja
+        com a mensagem para o usuário se não for possível.
+        :param cliente: código ou nome do cliente.
+        :return: código do cliente / nome normalizado, se ainda não houver
+        cliente com esse nome.
         """
-        with open('clientes.csv', 'r', encoding='utf-8') as arquivo:
-            leitura = csv.DictReader(arquivo)
-            for row in leitura:
-                # Verifica se o cliente esta na lista, se for o mesmo nome
-                # porem ja finalizou o pedido, continua verificando.
-                if row['Cliente'] == nome_cliente and \
-                        row['Total'] == '0':
-                    return True
-        return False
+        clientes = self.registro.clientes
+        clientes.sincronizar()
+        if type(cliente) == int:
+            if clientes.buscar(cliente) is None:
+                raise ErroLoja(CodigoErro.CLIENTE_NAO_ENCONTRADO,
+                               'Cliente não encontrado.')
+            return cliente
+        if type(cliente) != str or len(cliente) < 2:
+            raise ErroLoja(CodigoErro.NOME_INVALIDO, 'Nome inválido.')
+        codigos = clientes.codigosDoNome(cliente)
+        if len(codigos) > 1:
+            raise ErroLoja(CodigoErro.CLIENTE_AMBIGUO,
+                           'Mais de um cliente com esse nome. Informe o '
+                           'código do cliente.')
+        return codigos[0] if codigos else normalizarNome(cliente)
+
+    def _codigoDoPedido(self, cliente: int | str) -> int:
+        # Nome ainda sem cadastro: o pedido aceito cadastra o cliente.
+        if type(cliente) == int:
+            return cliente
+        return self.registro.clientes.cadastrar(cliente).codigo
 
     def validarData(self, data: str) -> bool | datetime:
         """
@@ -202,109 +616,254 @@ class Loja(object):
         :return: datetime se válido / False se inválido
         """
         try:
-            data = datetime.strptime(data, '%d/%m/%Y %H')
+            return self._converterData(data)
+        except Exception as erro:
+            print(erro)
+            return False
+
+    @cronometrado('loja.converterData')
+    def _converterData(self, data: str) -> datetime:
+        """
+        Converte a data no padrao dd/mm/yyyy H, levantando ErroLoja com a
+        mensagem para o usuário se for inválida.
+        """
+        try:
+            return converterDataEntrada(data)
         except Exception as erro:
             if 'day is out of range' in str(erro):
-                print('Mês/Dia inexistente. Verifique data corretamente.')
+                raise ErroLoja(
+                    CodigoErro.DATA_INVALIDA,
+                    'Mês/Dia inexistente. Verifique data corretamente.')
             elif 'unconverted data remains' in str(erro):
-                print('Hora inexistente. Verifique hora digitada novamente')
+                raise ErroLoja(
+                    CodigoErro.DATA_INVALIDA,
+                    'Hora inexistente. Verifique hora digitada novamente')
             elif 'does not match format' in str(erro):
-                print('Padrão Data/Hora inválidos.\n'
-                      'Por favor coloque exatamente no padrao: "dd/mm/yyyy H".')
-            else:
-                print(erro)
-            return False
-        else:
-            return data
+                raise ErroLoja(
+                    CodigoErro.DATA_INVALIDA,
+                    'Padrão Data/Hora inválidos.\n'
+                    'Por favor coloque exatamente no padrao: "dd/mm/yyyy H".')
+            raise ErroLoja(CodigoErro.DATA_INVALIDA, str(erro))
 
-    def calcularDeltaDatas(self, data_ini: str,
-                           data_fim: datetime) -> bool | timedelta:
+    def calcularDeltaDatas(self, data_ini: int, data_fim: int) -> bool | int:
         """
         Calcula a diferenca de tempo entre data final e data incial.
-        :param data_ini: data incial
-        :param data_fim: data final
-        :return: timedelta se data final > data incial/ False se fim <= inicio
+        :param data_ini: data incial (horas desde a época)
+        :param data_fim: data final (horas desde a época)
+        :return: horas se data final > data incial/ False se fim <= inicio
         """
         try:
-            with open('clientes.csv', 'r', encoding='utf-8') as dados:
-                escrita = csv.DictReader(dados)
-                for row in escrita:
-                    if row['Data_Inicial'] == data_ini:
-                        data_ini = datetime.strptime(data_ini[:13],
-                                                     '%Y-%m-%d %H')
-                        break
-            if data_ini > data_fim:
-                raise Exception(
-                    'ERRO: Data final menor que data inicial do aluguel.')
-            if data_ini == data_fim:
-                raise Exception(
-                    'ERRO: Data final igual a data inicial do aluguel.')
+            return self._calcularDelta(data_ini, data_fim)
         except Exception as erro:
             print(erro)
             return False
-        else:
-            return data_fim - data_ini
 
-    def validarParametros(self, nome_cliente: str, qnt: int, plano: str,
-                          data: str) -> bool | tuple[str, int, str, datetime]:
+    def _calcularDelta(self, data_ini: int, data_fim: int) -> int:
+        if data_ini > data_fim:
+            raise ErroLoja(
+                CodigoErro.PERIODO_INVALIDO,
+                'ERRO: Data final menor que data inicial do aluguel.')
+        if data_ini == data_fim:
+            raise ErroLoja(
+                CodigoErro.PERIODO_INVALIDO,
+                'ERRO: Data final igual a data inicial do aluguel.')
+        return data_fim - data_ini
+
+    def validarParametros(self, nome_cliente: int | str, qnt: int, plano: str,
+                          data: str, estacao: str = None,
+                          data_prevista: str = None
+                          ) -> bool | tuple[int | str, int, str, datetime,
+                                            datetime | None]:
         """
         Valida parâmetros iniciais para se alugar bicicletas.
-        :param nome_cliente: nome do cliente
+        :param nome_cliente: código ou nome do cliente
         :param qnt: quantidade de bicicletas pedidas
         :param plano: plano ('hora', 'dia', 'semana')
         :param data: data incial
+        :param estacao: estação de retirada (lojas com estações)
+        :param data_prevista: devolução prevista (opcional)
         :return: todos os parâmetros se validos/ False se inválidos
         """
         try:
-            # Valida nome
-            if type(nome_cliente) != str or len(nome_cliente) < 2:
-                raise Exception('Nome inválido.')
-            with open('clientes.csv', 'r', encoding='utf-8') as arquivo:
-                leitura = csv.DictReader(arquivo)
-                for row in leitura:
-                    # Se o cliente ja estiver na lista e ainda nao finalizou o pedido.
-                    if nome_cliente == row['Cliente'] and row['Total'] == '0':
-                        raise Exception('Nome já cadastrado.'
-                                        ' For favor finzalize o aluguel em'
-                                        ' aberto antes de tentar alugar novas bicicletas.')
-
-            # Valida quantidade de bikes solicitadas.
-            if type(qnt) != int:
-                raise Exception(
-                    'Verifique se a quantidade solicitada se encontra como um '
-                    'número inteiro.')
-            if qnt < 1:
-                raise Exception('Quantidade solicitada não pode ser menor do que um.')
-            if self.estoqueBikes < qnt:
-                raise Exception(
-                    'Ops... parece que não temos essa quantidade disponível em estoque.\n'
-                    f'Temos {self.estoqueBikes} bicicleta'
-                    f'{"s disponíveis." if self.estoqueBikes > 1 else " disponível."}')
-
-            # Valida plano.
-            if plano.strip().lower() not in self.planos:
-                raise Exception(f'Plano inexistente\n'
-                                f'Planos: {tuple(self.planos.keys())}')
-
-            # Valida data.
-            data_ini = self.validarData(data)
-            if data_ini is False:
-                raise Exception('Erro de data/hora.')
+            return self._validarPedido(nome_cliente, qnt, plano, data,
+                                       estacao=estacao,
+                                       data_prevista=data_prevista)
         except Exception as erro:
             print(erro)
             return False
+
+    def _validarEstacao(self, estacao: str | None) -> None:
+        """
+        Confere a estação informada: obrigatória e cadastrada em lojas com
+        estações, ausente nas demais.
+        """
+        if self.estacoes is None:
+            if estacao is not None:
+                raise ErroLoja(CodigoErro.ESTACAO_INEXISTENTE,
+                               'Estação inexistente.')
+        elif estacao is None:
+            raise ErroLoja(CodigoErro.ESTACAO_OBRIGATORIA,
+                           'Informe a estação.')
+        elif estacao not in self.estacoes:
+            raise ErroLoja(CodigoErro.ESTACAO_INEXISTENTE,
+                           'Estação inexistente.')
+
+    def _converterPeriodo(self, data: str, data_prevista: str | None
+                          ) -> tuple[datetime, datetime | None]:
+        """
+        Converte a data inicial e a devolução prevista de um pedido,
+        levantando ErroLoja se a previsão não for posterior ao início ou se
+        o pedido com previsão (uma reserva) começar antes da hora atual.
+        """
+        data_ini = self._converterData(data)
+        if data_prevista is None:
+            return data_ini, None
+        data_fim = self._converterData(data_prevista)
+        if data_fim <= data_ini:
+            raise ErroLoja(CodigoErro.PERIODO_INVALIDO,
+                           'ERRO: Devolução prevista deve ser depois da data '
+                           'inicial do aluguel.')
+        if paraHorasEpoch(data_ini) < paraHorasEpoch(self.relogio()):
+            raise ErroLoja(CodigoErro.PERIODO_INVALIDO,
+                           'ERRO: Reserva com data inicial no passado.')
+        return data_ini, data_fim
+
+    @cronometrado('loja.validarPedido')
+    def _validarPedido(self, nome_cliente: int | str, qnt: int, plano: str,
+                       data: str, estoque: int = None, reservados=(),
+                       estacao: str = None, data_prevista: str = None
+                       ) -> tuple[int | str, int, str, datetime,
+                                  datetime | None]:
+        """
+        Valida os parâmetros de um pedido, levantando ErroLoja com a
+        mensagem para o usuário no primeiro erro encontrado.
+        :param estoque: estoque a considerar (padrao: bicicletas livres na
+        loja, ou na estação, durante o período pedido).
+        :param reservados: clientes com pedido ja aceito no mesmo lote.
+        :param estacao: estação de retirada (lojas com estações).
+        :param data_prevista: devolução prevista (opcional).
+        :return: cliente (código, ou nome normalizado se ainda não tiver
+        cadastro), quantidade, plano, data inicial e devolução prevista (ou
+        None).
+        """
+        self._validarEstacao(estacao)
+        # Período convertido uma vez só; se for inválido, o erro só aparece
+        # depois das validações de estoque e plano.
+        try:
+            periodo = self._converterPeriodo(data, data_prevista)
+        except ErroLoja as erro:
+            periodo, erro_periodo = None, erro
+        # Valida cliente
+        cliente = self._identificarCliente(nome_cliente)
+        # Se o cliente ja estiver na lista e ainda nao finalizou o pedido.
+        if cliente in reservados or self.checarNomeNaLista(cliente):
+            raise ErroLoja(CodigoErro.ALUGUEL_EM_ABERTO,
+                           'Nome já cadastrado.'
+                           ' For favor finzalize o aluguel em'
+                           ' aberto antes de tentar alugar novas bicicletas.')
+
+        # Valida quantidade de bikes solicitadas.
+        if type(qnt) != int:
+            raise ErroLoja(
+                CodigoErro.QUANTIDADE_INVALIDA,
+                'Verifique se a quantidade solicitada se encontra como um '
+                'número inteiro.')
+        if qnt < 1:
+            raise ErroLoja(
+                CodigoErro.QUANTIDADE_INVALIDA,
+                'Quantidade solicitada não pode ser menor do que um.')
+        if estoque is None and periodo is None:
+            estoque = self.estoqueBikes if estacao is None else \
+                self.estoqueEstacao(estacao)
+        elif estoque is None:
+            # Livres durante todo o período pedido.
+            inicio, fim = periodo
+            estoque = self._bicicletasLivresEntre(
+                paraHorasEpoch(inicio),
+                None if fim is None else paraHorasEpoch(fim), estacao)
+        if estoque < qnt:
+            raise ErroLoja(
+                CodigoErro.ESTOQUE_INSUFICIENTE,
+                'Ops... parece que não temos essa quantidade disponível em estoque.\n'
+                f'Temos {estoque} bicicleta'
+                f'{"s disponíveis." if estoque > 1 else " disponível."}')
+
+        # Valida plano.
+        if plano.strip().lower() not in self.planos:
+            raise ErroLoja(CodigoErro.PLANO_INEXISTENTE,
+                           f'Plano inexistente\n'
+                           f'Planos: {tuple(self.planos.keys())}')
+
+        # Valida data.
+        if periodo is None:
+            raise erro_periodo
+        return (cliente, qnt, plano.strip().lower()) + periodo
+
+    def _validarPedidoDoLote(self, campos: tuple, reservados: set) -> tuple:
+        """
+        Valida um pedido de receberPedidos, levantando ErroLoja como
+        _validarPedido.
+        :param campos: (cliente, qnt_bikes, plano, data_ini), opcionalmente
+        seguidos de estacao e data_prevista.
+        :param reservados: clientes com pedido ja aceito no lote.
+        :return: cliente, quantidade, plano, início e devolução prevista
+        (horas desde a época; None se não informada) e estação.
+        """
+        if len(campos) < 4:
+            raise ErroLoja(CodigoErro.DADOS_INVALIDOS, 'Pedido incompleto.')
+        cliente, qnt_bikes, plano, data_ini, *extras = campos
+        estacao = extras[0] if extras else None
+        data_prevista = extras[1] if len(extras) > 1 else None
+        cliente, qnt, plano, data_ini, data_prevista = self._validarPedido(
+            cliente, qnt_bikes, plano, data_ini, None, reservados, estacao,
+            data_prevista)
+        return cliente, qnt, plano, paraHorasEpoch(data_ini), \
+            None if data_prevista is None else paraHorasEpoch(data_prevista), \
+            estacao
+
+    @cronometrado('loja.validarFechamento')
+    def _validarFechamento(self, nome_cliente: int | str, data_fim: str,
+                           fechados=(), estacao: str = None,
+                           devolvidas=None) -> tuple[int, int, float, str]:
+        """
+        Valida o fechamento da conta e calcula o valor, levantando ErroLoja
+        com a mensagem para o usuário se algo estiver errado.
+        :param fechados: clientes com conta ja fechada no mesmo lote.
+        :param estacao: estação de devolução (padrao: a de retirada).
+        :param devolvidas: bicicletas ja devolvidas no mesmo lote, por
+        estação.
+        :return: código do cliente, data final (horas desde a época), valor
+        da conta e estação de devolução ('' em lojas sem estações).
+        """
+        cliente = self._identificarCliente(nome_cliente)
+        if cliente in fechados or not self.checarNomeNaLista(cliente):
+            raise ErroLoja(CodigoErro.CLIENTE_NAO_ENCONTRADO,
+                           'Cliente não encontrado.')
+        if estacao is not None:
+            self._validarEstacao(estacao)
         else:
-            return nome_cliente.title(), qnt, plano.strip().lower(), data_ini
-
-    def calcularBicicletasAlugadas(self):
-        with open('clientes.csv', 'r', encoding='utf-8') as arquivo:
-            leitura = csv.reader(arquivo)
-            bikes_alugadas = sum(int(row[1]) for row in leitura if row[5] == '0')
-        return bikes_alugadas
-
-    def criarArquivoCSV(self):
-        with open('clientes.csv', 'w', encoding='utf-8') as gravar:
-            header = ['Cliente', 'Quantidade_Alugada', 'Plano',
-                      'Data_Inicial', 'Data_Final', 'Total']
-            escrita = csv.writer(gravar)
-            escrita.writerow(header)
+            estacao = self.registro.buscarAberto(cliente).estacao_ini
+        data_fim = paraHorasEpoch(self._converterData(data_fim))
+        qnt_bikes, data_ini, plano = self.colhetarDados(cliente)
+        if estacao and self.estacoes is not None:
+            vagas = self.estacoes[estacao].capacidade - \
+                self.estoqueEstacao(estacao)
+            if devolvidas:
+                vagas -= devolvidas.get(estacao, 0)
+            if vagas < qnt_bikes:
+                raise ErroLoja(CodigoErro.ESTACAO_SEM_VAGAS,
+                               'Estação sem vagas para devolver as '
+                               'bicicletas.')
+        delta_em_horas = self._calcularDelta(data_ini, data_fim)
+        # Gerar quanto deve pagar.
+        valor = round(self.calcularValorConta(plano, qnt_bikes,
+                                              delta_em_horas), 2)
+        return cliente, data_fim, valor, estacao
+
+    @cronometrado('loja.calcularBicicletasAlugadas')
+    def calcularBicicletasAlugadas(self) -> int:
+        """
+        Retorna a quantidade de bicicletas em aluguéis ainda em aberto.
+        :return: quantidade de bicicletas alugadas.
+        """
+        return self.registro.contarBicicletasAlugadas()
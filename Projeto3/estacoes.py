@@ -0,0 +1,198 @@
+from math import floor, hypot, sqrt
+import heapq
+
+
+class Estacao(object):
+    """
+    Estação de bicicletas: código, quantidade de vagas, bicicletas que ela
+    tinha quando foi cadastrada e posição (coordenadas planas, ex.: km).
+    """
+    __slots__ = ('codigo', 'capacidade', 'bicicletas', 'x', 'y')
+
+    def __init__(self, codigo: str, capacidade: int, x: float, y: float,
+                 bicicletas: int = None):
+        self.codigo = codigo
+        self.capacidade = capacidade
+        self.bicicletas = capacidade if bicicletas is None else bicicletas
+        self.x = x
+        self.y = y
+
+
+class RedeEstacoes(object):
+    """
+    Conjunto das estações da loja, com um índice espacial em grade: cada
+    estação fica na célula (floor(x / tamanho_celula),
+    floor(y / tamanho_celula)). Sem tamanho_celula, ele sai da densidade
+    das estações (cerca de uma por célula) e a grade é refeita sempre que
+    a quantidade de estações dobra.
+
+    A busca da estação mais próxima percorre as células em anéis a partir
+    da posição consultada, parando assim que nenhuma célula ainda não
+    visitada puder ter estação mais perto. Se os anéis passarem a ter mais
+    células do que as ocupadas, ela segue só pelas ocupadas, da mais perto
+    para a mais longe.
+    """
+
+    def __init__(self, estacoes=(), tamanho_celula: float = None):
+        self._celulaAutomatica = tamanho_celula is None
+        self.tamanho_celula = 1.0 if tamanho_celula is None else \
+            tamanho_celula
+        self.estacoes = {}
+        self.grade = {}
+        # Limites das células ocupadas (coluna e linha mínimas e máximas).
+        self.limites = None
+        # Estações na última vez que a grade automática foi montada.
+        self._estacoesNaGrade = 0
+        for estacao in estacoes:
+            self.adicionar(estacao)
+
+    def adicionar(self, estacao: Estacao) -> None:
+        """
+        Cadastra uma estação na rede.
+        :param estacao: objeto Estacao (código ainda não cadastrado).
+        """
+        if estacao.codigo in self.estacoes:
+            raise ValueError(f'Estação {estacao.codigo} já cadastrada.')
+        self.estacoes[estacao.codigo] = estacao
+        if self._celulaAutomatica and \
+                len(self.estacoes) >= 2 * self._estacoesNaGrade:
+            self._remontarGrade()
+        else:
+            self._colocarNaGrade(estacao)
+
+    def __contains__(self, codigo) -> bool:
+        return codigo in self.estacoes
+
+    def __getitem__(self, codigo) -> Estacao:
+        return self.estacoes[codigo]
+
+    def __iter__(self):
+        return iter(self.estacoes.values())
+
+    def __len__(self) -> int:
+        return len(self.estacoes)
+
+    def totalBicicletas(self) -> int:
+        """
+        Retorna a soma das bicicletas cadastradas em todas as estações.
+        :return: quantidade de bicicletas da rede.
+        """
+        return sum(estacao.bicicletas for estacao in self.estacoes.values())
+
+    def maisProxima(self, x: float, y: float, qnt_bikes: int,
+                    estoque) -> Estacao | None:
+        """
+        Busca a estação mais próxima de (x, y) com pelo menos qnt_bikes
+        bicicletas disponíveis.
+        :param x: coordenada x da consulta.
+        :param y: coordenada y da consulta.
+        :param qnt_bikes: bicicletas necessárias.
+        :param estoque: função que recebe o código da estação e retorna as
+        bicicletas disponíveis nela.
+        :return: Estacao mais próxima / None se nenhuma tiver o suficiente.
+        """
+        if not self.grade:
+            return None
+        coluna, linha = self._celula(x, y)
+        # Maior anel que ainda alcança alguma célula ocupada.
+        minima_c, maxima_c, minima_l, maxima_l = self.limites
+        ultimo_anel = max(abs(coluna - minima_c), abs(coluna - maxima_c),
+                          abs(linha - minima_l), abs(linha - maxima_l))
+        melhor = None
+        menor_distancia = None
+        visitadas = 0
+        for anel in range(ultimo_anel + 1):
+            visitadas += 8 * anel or 1
+            if visitadas > len(self.grade):
+                return self._maisProximaPelasOcupadas(
+                    x, y, qnt_bikes, estoque, anel, melhor, menor_distancia)
+            for celula in self._anel(coluna, linha, anel):
+                for estacao in self.grade.get(celula, ()):
+                    distancia = hypot(estacao.x - x, estacao.y - y)
+                    if (menor_distancia is None
+                            or distancia < menor_distancia) \
+                            and estoque(estacao.codigo) >= qnt_bikes:
+                        melhor, menor_distancia = estacao, distancia
+            # Qualquer ponto do próximo anel fica a pelo menos
+            # anel * tamanho_celula da consulta.
+            if menor_distancia is not None and \
+                    menor_distancia <= anel * self.tamanho_celula:
+                break
+        return melhor
+
+    def _maisProximaPelasOcupadas(self, x: float, y: float, qnt_bikes: int,
+                                  estoque, anel: int, melhor: Estacao | None,
+                                  menor_distancia: float | None
+                                  ) -> Estacao | None:
+        """
+        Continua a busca de maisProxima a partir do anel dado (os
+        anteriores ja foram visitados), só pelas células ocupadas, em ordem
+        de distância da consulta até a célula.
+        """
+        coluna, linha = self._celula(x, y)
+        tamanho = self.tamanho_celula
+        celulas = []
+        for c, lin in self.grade:
+            if max(abs(c - coluna), abs(lin - linha)) < anel:
+                continue
+            dx = max(c * tamanho - x, 0.0, x - (c + 1) * tamanho)
+            dy = max(lin * tamanho - y, 0.0, y - (lin + 1) * tamanho)
+            celulas.append((hypot(dx, dy), c, lin))
+        heapq.heapify(celulas)
+        while celulas:
+            distancia_celula, c, lin = heapq.heappop(celulas)
+            if menor_distancia is not None and \
+                    distancia_celula >= menor_distancia:
+                break
+            for estacao in self.grade[c, lin]:
+                distancia = hypot(estacao.x - x, estacao.y - y)
+                if (menor_distancia is None
+                        or distancia < menor_distancia) \
+                        and estoque(estacao.codigo) >= qnt_bikes:
+                    melhor, menor_distancia = estacao, distancia
+        return melhor
+
+    def _remontarGrade(self) -> None:
+        """
+        Recalcula tamanho_celula pela área ocupada pelas estações, para
+        ficar perto de uma estação por célula, e refaz a grade.
+        """
+        xs = [estacao.x for estacao in self.estacoes.values()]
+        ys = [estacao.y for estacao in self.estacoes.values()]
+        largura, altura = max(xs) - min(xs), max(ys) - min(ys)
+        quantidade = len(self.estacoes)
+        if largura > 0 and altura > 0:
+            self.tamanho_celula = sqrt(largura * altura / quantidade)
+        elif largura > 0 or altura > 0:
+            # Estações em linha reta.
+            self.tamanho_celula = max(largura, altura) / quantidade
+        self._estacoesNaGrade = quantidade
+        self.grade = {}
+        self.limites = None
+        for estacao in self.estacoes.values():
+            self._colocarNaGrade(estacao)
+
+    def _colocarNaGrade(self, estacao: Estacao) -> None:
+        coluna, linha = self._celula(estacao.x, estacao.y)
+        self.grade.setdefault((coluna, linha), []).append(estacao)
+        if self.limites is None:
+            self.limites = (coluna, coluna, linha, linha)
+        else:
+            minima_c, maxima_c, minima_l, maxima_l = self.limites
+            self.limites = (min(minima_c, coluna), max(maxima_c, coluna),
+                            min(minima_l, linha), max(maxima_l, linha))
+
+    def _celula(self, x: float, y: float) -> tuple[int, int]:
+        return (floor(x / self.tamanho_celula),
+                floor(y / self.tamanho_celula))
+
+    def _anel(self, coluna: int, linha: int, anel: int):
+        if anel == 0:
+            yield coluna, linha
+            return
+        for c in range(coluna - anel, coluna + anel + 1):
+            yield c, linha - anel
+            yield c, linha + anel
+        for lin in range(linha - anel + 1, linha + anel):
+            yield coluna - anel, lin
+            yield coluna + anel, lin
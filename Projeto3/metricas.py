@@ -0,0 +1,242 @@
+"""
+Instrumentação da Loja: contagem de chamadas e histogramas de latência das
+operações públicas e das etapas internas (conversão de datas, cálculo da
+conta, gravação no registro, compactação...), guardados em um registro de
+métricas do próprio processo e exportáveis em json ou no formato texto do
+Prometheus.
+
+As métricas ficam desligadas por padrao (ou ligadas com a variavel de
+ambiente LOJA_METRICAS=1); desligadas, cronometrado só confere um atributo
+antes de chamar a função e medir devolve um contexto vazio compartilhado.
+Uso:
+    from metricas import METRICAS
+    METRICAS.ativar()
+    ...
+    print(METRICAS.paraPrometheus())
+"""
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+from time import perf_counter
+import json
+import os
+import threading
+
+# Limites superiores (em segundos) dos baldes dos histogramas.
+LIMITES = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_NULO = nullcontext()
+
+
+class Histograma(object):
+    """
+    Distribuição das durações de uma operação: quantidade de medições em
+    cada balde de LIMITES (o último balde, além deles, é o +Inf), soma e
+    máximo.
+    """
+    __slots__ = ('baldes', 'contagem', 'soma', 'maximo')
+
+    def __init__(self):
+        self.baldes = [0] * (len(LIMITES) + 1)
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, duracao: float) -> None:
+        self.baldes[bisect_left(LIMITES, duracao)] += 1
+        self.contagem += 1
+        self.soma += duracao
+        if duracao > self.maximo:
+            self.maximo = duracao
+
+    def acumulados(self) -> list[int]:
+        """
+        Retorna as contagens acumuladas por balde (medições com duração
+        até cada limite, e o total no +Inf), como no Prometheus.
+        :return: lista com um valor por limite e o total.
+        """
+        total = 0
+        acumulados = []
+        for quantidade in self.baldes:
+            total += quantidade
+            acumulados.append(total)
+        return acumulados
+
+    def percentil(self, fracao: float) -> float:
+        """
+        Estima o percentil pelo limite superior do balde onde ele cai.
+        :param fracao: percentil entre 0 e 1 (ex.: 0.99).
+        :return: duração em segundos (o máximo se cair no +Inf; 0.0 sem
+        medições).
+        """
+        if not self.contagem:
+            return 0.0
+        alvo = fracao * self.contagem
+        for limite, acumulado in zip(LIMITES, self.acumulados()):
+            if acumulado >= alvo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+class _Medicao(object):
+    """
+    Contexto que mede a duração do bloco e a registra no histograma da
+    operação ao sair, com ou sem exceção.
+    """
+    __slots__ = ('metricas', 'nome', 'inicio')
+
+    def __init__(self, metricas, nome: str):
+        self.metricas = metricas
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        self.metricas.observar(self.nome, perf_counter() - self.inicio)
+
+
+class Metricas(object):
+    """
+    Registro de métricas do processo: um histograma de duração por
+    operação (cuja contagem é a quantidade de chamadas) e contadores de
+    eventos. Pode ser usado por várias threads.
+    """
+
+    def __init__(self, ativo: bool = False):
+        self.ativo = ativo
+        self.histogramas = {}
+        self.contadores = {}
+        self._trava = threading.Lock()
+
+    def ativar(self) -> None:
+        self.ativo = True
+
+    def desativar(self) -> None:
+        self.ativo = False
+
+    def limpar(self) -> None:
+        """
+        Descarta tudo o que foi medido até aqui.
+        """
+        with self._trava:
+            self.histogramas = {}
+            self.contadores = {}
+
+    def observar(self, nome: str, duracao: float) -> None:
+        """
+        Registra uma duração no histograma da operação.
+        :param nome: nome da operação (ex.: 'loja.receberPedido').
+        :param duracao: duração em segundos.
+        """
+        with self._trava:
+            histograma = self.histogramas.get(nome)
+            if histograma is None:
+                histograma = self.histogramas[nome] = Histograma()
+            histograma.observar(duracao)
+
+    def incrementar(self, nome: str, quantidade: int = 1) -> None:
+        """
+        Soma ao contador do evento, se as métricas estiverem ligadas.
+        :param nome: nome do evento (ex.: 'loja.pedidosRecusados').
+        :param quantidade: valor a somar.
+        """
+        if self.ativo:
+            with self._trava:
+                self.contadores[nome] = self.contadores.get(nome, 0) + \
+                    quantidade
+
+    def medir(self, nome: str):
+        """
+        Contexto que mede a duração do bloco na operação nome.
+        :param nome: nome da operação.
+        :return: gerenciador de contexto (vazio se as métricas estiverem
+        desligadas).
+        """
+        return _Medicao(self, nome) if self.ativo else _NULO
+
+    def cronometrado(self, nome: str):
+        """
+        Decorador que mede cada chamada da função na operação nome.
+        :param nome: nome da operação.
+        :return: decorador.
+        """
+        def decorador(funcao):
+            @wraps(funcao)
+            def medida(*args, **kwargs):
+                if not self.ativo:
+                    return funcao(*args, **kwargs)
+                inicio = perf_counter()
+                try:
+                    return funcao(*args, **kwargs)
+                finally:
+                    self.observar(nome, perf_counter() - inicio)
+            return medida
+        return decorador
+
+    def paraDicionario(self) -> dict:
+        """
+        Retorna uma cópia das métricas: {'histogramas': {nome: {'contagem',
+        'soma', 'maximo', 'p50', 'p99', 'baldes': {limite: acumulado}}},
+        'contadores': {nome: valor}}, com durações em segundos.
+        """
+        with self._trava:
+            histogramas = {}
+            for nome, histograma in sorted(self.histogramas.items()):
+                limites = [repr(limite) for limite in LIMITES] + ['+Inf']
+                histogramas[nome] = {
+                    'contagem': histograma.contagem,
+                    'soma': histograma.soma,
+                    'maximo': histograma.maximo,
+                    'p50': histograma.percentil(0.50),
+                    'p99': histograma.percentil(0.99),
+                    'baldes': dict(zip(limites, histograma.acumulados()))}
+            return {'histogramas': histogramas,
+                    'contadores': dict(sorted(self.contadores.items()))}
+
+    def paraJSON(self, **opcoes) -> str:
+        """
+        Exporta as métricas em json (ver paraDicionario).
+        :param opcoes: repassadas a json.dumps (ex.: indent=2).
+        :return: texto json.
+        """
+        return json.dumps(self.paraDicionario(), **opcoes)
+
+    def paraPrometheus(self, prefixo: str = 'loja') -> str:
+        """
+        Exporta as métricas no formato texto do Prometheus: um histograma
+        <prefixo>_duracao_segundos com a operação no rótulo 'operacao' e um
+        contador <prefixo>_eventos_total com o evento no rótulo 'evento'.
+        :param prefixo: prefixo dos nomes das métricas.
+        :return: texto no formato de exposição do Prometheus.
+        """
+        dados = self.paraDicionario()
+        nome = f'{prefixo}_duracao_segundos'
+        linhas = [f'# HELP {nome} Duração das operações da loja.',
+                  f'# TYPE {nome} histogram']
+        for operacao, histograma in dados['histogramas'].items():
+            rotulo = f'operacao="{_escapar(operacao)}"'
+            for limite, acumulado in histograma['baldes'].items():
+                linhas.append(f'{nome}_bucket{{{rotulo},le="{limite}"}} '
+                              f'{acumulado}')
+            linhas.append(f'{nome}_sum{{{rotulo}}} {histograma["soma"]!r}')
+            linhas.append(f'{nome}_count{{{rotulo}}} '
+                          f'{histograma["contagem"]}')
+        nome = f'{prefixo}_eventos_total'
+        linhas += [f'# HELP {nome} Eventos contados na loja.',
+                   f'# TYPE {nome} counter']
+        for evento, valor in dados['contadores'].items():
+            linhas.append(f'{nome}{{evento="{_escapar(evento)}"}} {valor}')
+        return '\n'.join(linhas) + '\n'
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+# Registro usado pela Loja e pelos backends de armazenamento.
+METRICAS = Metricas(ativo=os.environ.get('LOJA_METRICAS') == '1')
+cronometrado = METRICAS.cronometrado
+medir = METRICAS.medir
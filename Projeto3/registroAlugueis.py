@@ -0,0 +1,561 @@
+from contextlib import contextmanager
+import atexit
+import csv
+import os
+import threading
+
+from armazenamento import Aluguel, Armazenamento, CABECALHO
+from arquivoHistorico import ArquivoHistorico
+from cadastroClientes import CadastroClientes, formatarCodigo
+from datas import lerHorasGravadas, lerHorasOpcionais
+from metricas import cronometrado, medir
+from snapshotBinario import assinaturaCSV, gravarSnapshotBinario, \
+    lerSnapshotBinario
+from travas import TravaArquivo
+
+# Tipos de evento gravados no diario.
+ABERTURA = 'A'
+FECHAMENTO = 'F'
+
+# Modos de durabilidade do diario: quando os eventos confirmados chegam ao
+# arquivo.
+DURABILIDADE_ESCRITA = 'escrita'
+DURABILIDADE_INTERVALO = 'intervalo'
+DURABILIDADE_FECHAMENTO = 'fechamento'
+
+# Registros com eventos no buffer, por id: gravados na saída normal do
+# interpretador (o temporizador do modo 'intervalo' é uma thread daemon e
+# o modo 'fechamento' depende de fechar()).
+_COM_BUFFER = {}
+_travaComBuffer = threading.Lock()
+
+
+@atexit.register
+def _descarregarNaSaida() -> None:
+    with _travaComBuffer:
+        registros = list(_COM_BUFFER.values())
+    for registro in registros:
+        registro.descarregar()
+
+
+class RegistroAlugueis(Armazenamento):
+    """
+    Livro de aluguéis da loja. Lê o arquivo csv uma única vez e mantém em
+    memória um índice dos aluguéis em aberto (por código do cliente, ver
+    CadastroClientes em '<arquivo>.clientes'), a
+    quantidade de bicicletas alugadas e o saldo de cada estação.
+
+    O arquivo csv é um snapshot: aberturas e fechamentos posteriores são
+    apenas acrescentados ao diario ('<arquivo>.diario') e o estado atual é
+    o snapshot mais o diario reaplicado. Quando o diario passa de
+    limite_diario eventos, ele é compactado para dentro de um novo snapshot.
+    O snapshot guarda só os aluguéis em aberto: na compactação os fechados
+    vão para o arquivo historico ('<arquivo>.historico/AAAA-MM.csv', uma
+    partição por mês de devolução, ver ArquivoHistorico).
+    Junto do csv fica o snapshot binário ('<arquivo>.bin', ver
+    snapshotBinario) com só os aluguéis em aberto e o saldo das estações:
+    a carga lê esse binário e o diario, e o csv só é percorrido se o
+    binário faltar ou for de outra versão do csv (e então é regravado).
+
+    Toda leitura ou escrita dos arquivos acontece dentro de transacao(), que
+    combina uma trava de threads com a trava do arquivo '<arquivo>.lock'
+    entre processos.
+
+    Os eventos podem ser gravados em grupo (durabilidade):
+    - 'escrita': cada registro é acrescentado ao diario na hora (padrao);
+    - 'intervalo': os eventos ficam em um buffer gravado a cada
+      intervalo_ms milissegundos;
+    - 'fechamento': o buffer só é gravado em fechar() ou descarregar().
+    Nos dois últimos o buffer também é gravado ao chegar a max_buffer
+    eventos e na saída normal do interpretador (atexit). O índice em
+    memória é atualizado na hora e continua sendo a fonte das consultas;
+    enquanto houver eventos no buffer o registro segura a trava entre
+    processos, para que ninguém leia o arquivo sem eles (outro processo
+    espera a gravação do buffer; outro registro do mesmo arquivo neste
+    processo grava o buffer na hora, ver TravaArquivo.reter).
+    """
+
+    def __init__(self, arquivo='clientes.csv', limite_diario=1000,
+                 durabilidade=DURABILIDADE_ESCRITA, intervalo_ms=50,
+                 max_buffer=1000):
+        if durabilidade not in (DURABILIDADE_ESCRITA, DURABILIDADE_INTERVALO,
+                                DURABILIDADE_FECHAMENTO):
+            raise ValueError(f'Durabilidade inexistente: {durabilidade}')
+        self.arquivo = arquivo
+        self.diario = arquivo + '.diario'
+        self.binario = arquivo + '.bin'
+        self.clientes = CadastroClientes(arquivo + '.clientes')
+        self.historicoArquivado = ArquivoHistorico(arquivo + '.historico',
+                                                   self.clientes.lerCliente)
+        self.preparacao = arquivo + '.arquivando'
+        self.limite_diario = limite_diario
+        self.durabilidade = durabilidade
+        self.intervalo_ms = intervalo_ms
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._temporizador = None
+        self._trava = threading.RLock()
+        self._travaArquivo = TravaArquivo(arquivo + '.lock')
+        self._comTravaArquivo = False
+        self._profundidade = 0
+        self.assinatura = None
+        # Quantas vezes o índice foi (re)construído a partir dos arquivos.
+        self.recargas = 0
+        with self.transacao():
+            pass
+
+    @contextmanager
+    def transacao(self):
+        """
+        Seção crítica sobre o registro, reentrante. Na transação mais externa
+        adquire a trava entre processos e relê os arquivos se outro processo
+        os alterou, de modo que validação e gravação feitas dentro dela
+        enxergam o estado mais recente e nao se intercalam com outras.
+        """
+        with self._trava:
+            externa = self._profundidade == 0
+            # Com a trava retida (buffer pendente) ninguém mais gravou.
+            recarregar = externa and not self._comTravaArquivo
+            if externa and self._comTravaArquivo:
+                self._travaArquivo.retomar()
+            elif recarregar:
+                with medir('registro.esperaTrava'):
+                    self._travaArquivo.adquirir()
+                self._comTravaArquivo = True
+            self._profundidade += 1
+            try:
+                if recarregar and \
+                        self._assinaturaArquivos() != self.assinatura:
+                    self.carregar()
+                yield self
+            except BaseException:
+                # Estado em memória pode ter ficado pela metade: grava o
+                # que ja foi confirmado e força releitura na próxima
+                # transação.
+                if externa:
+                    self._gravarBuffer()
+                self.assinatura = None
+                raise
+            finally:
+                self._profundidade -= 1
+                if externa and not self._buffer:
+                    self._liberarTravaArquivo()
+                elif externa:
+                    self._travaArquivo.reter(self.descarregar)
+
+    @cronometrado('registro.carregar')
+    def carregar(self) -> None:
+        """
+        (Re)constrói o índice em memória a partir do snapshot e do diario,
+        criando o arquivo csv caso ainda não exista.
+        """
+        self.abertos = {}
+        self.bikesAlugadas = 0
+        self.saldoEstacoes = {}
+        # Abertos no snapshot, pendentes (abertos pelo diario) e fechamentos
+        # de aluguéis do snapshot: o que a compactação precisa gravar.
+        self.abertosSnapshot = {}
+        self.pendentes = []
+        self.fechamentosSnapshot = {}
+        self.eventosDiario = 0
+        self._recuperarCompactacao()
+        # Registros antigos trazem o nome no lugar do código: os clientes
+        # cadastrados durante a leitura são gravados de uma vez.
+        with self.clientes.emLote():
+            try:
+                arquivo = open(self.arquivo, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                self.criarArquivoCSV()
+            else:
+                with arquivo:
+                    origem = assinaturaCSV(os.fstat(arquivo.fileno()))
+                    snapshot = lerSnapshotBinario(self.binario, origem)
+                    if snapshot is None:
+                        self._carregarCSV(arquivo)
+                        gravarSnapshotBinario(self.binario, origem,
+                                              self.abertos.values(),
+                                              self.saldoEstacoes)
+                    else:
+                        abertos, self.saldoEstacoes = snapshot
+                        for aluguel in abertos:
+                            self.abertosSnapshot[aluguel.cliente] = aluguel
+                            self.abertos[aluguel.cliente] = aluguel
+                            self.bikesAlugadas += aluguel.qnt_bikes
+            for evento in csv.reader(self._lerDiario(self.diario)):
+                self._aplicarEvento(evento)
+                self.eventosDiario += 1
+        self.assinatura = self._assinaturaArquivos()
+        self.recargas += 1
+
+    def _carregarCSV(self, arquivo) -> None:
+        for row in csv.DictReader(arquivo):
+            # Lido em todas as linhas para que os nomes dos arquivos antigos
+            # sejam cadastrados na ordem do arquivo.
+            cliente = self.clientes.lerCliente(row['Cliente'])
+            # Arquivos anteriores às estações e à data prevista não têm
+            # essas colunas.
+            retirada = row.get('Estacao_Retirada') or ''
+            if row['Total'] == '0':
+                aluguel = Aluguel(
+                    cliente, int(row['Quantidade_Alugada']), row['Plano'],
+                    lerHorasGravadas(row['Data_Inicial']),
+                    estacao_ini=retirada,
+                    data_prevista=lerHorasOpcionais(row.get('Data_Prevista')))
+                self.abertosSnapshot[aluguel.cliente] = aluguel
+                self._indexar(aluguel)
+            elif retirada:
+                qnt_bikes = int(row['Quantidade_Alugada'])
+                self._moverEstacao(retirada, -qnt_bikes)
+                self._moverEstacao(row['Estacao_Devolucao'], qnt_bikes)
+        for aluguel in self.historicoArquivado.ler():
+            if aluguel.estacao_ini:
+                self._moverEstacao(aluguel.estacao_ini, -aluguel.qnt_bikes)
+                self._moverEstacao(aluguel.estacao_fim, aluguel.qnt_bikes)
+
+    def sincronizar(self) -> bool:
+        """
+        Relê o snapshot e o diario se algum deles foi alterado desde a
+        ultima leitura ou escrita feita por este registro (outro processo ou
+        outro objeto gravando no mesmo arquivo).
+        :return: True (se recarregou)/ False (se o índice ja estava em dia).
+        """
+        if self._assinaturaArquivos() == self.assinatura:
+            return False
+        with self.transacao():
+            return True
+
+    def versaoExterna(self) -> int:
+        return self.recargas
+
+    def buscarAberto(self, cliente: int) -> Aluguel | None:
+        return self.abertos.get(cliente)
+
+    def contarBicicletasAlugadas(self) -> int:
+        return self.bikesAlugadas
+
+    def saldoEstacao(self, estacao: str) -> int:
+        return self.saldoEstacoes.get(estacao, 0)
+
+    def alugueisAbertos(self):
+        return list(self.abertos.values())
+
+    @cronometrado('registro.registrarAbertura')
+    def registrarAbertura(self, cliente: int, qnt_bikes: int, plano: str,
+                          data_ini, estacao: str = '',
+                          data_prevista=None) -> Aluguel:
+        """
+        Acrescenta a abertura do aluguel ao diario e a aplica ao índice.
+        :param cliente: código do cliente.
+        :param qnt_bikes: quantidade de bicicletas alugadas.
+        :param plano: plano.
+        :param data_ini: data inicial do aluguel.
+        :param estacao: estação de retirada.
+        :param data_prevista: devolução prevista.
+        :return: Aluguel registrado.
+        """
+        return self._registrar([self._eventoAbertura(cliente, qnt_bikes, plano,
+                                                     data_ini, estacao,
+                                                     data_prevista)])[0]
+
+    @cronometrado('registro.registrarFechamento')
+    def registrarFechamento(self, cliente: int, data_fim, valor: float,
+                            estacao: str = None) -> None:
+        """
+        Acrescenta o fechamento do aluguel em aberto do cliente ao diario e o
+        remove do índice.
+        :param cliente: código do cliente.
+        :param data_fim: data de entrega das bicicletas.
+        :param valor: valor total da conta.
+        :param estacao: estação de devolução (padrao: a de retirada).
+        """
+        self._registrar([self._eventoFechamento(cliente, data_fim, valor,
+                                                estacao)])
+
+    def registrarAberturas(self, pedidos: list) -> None:
+        self._registrar([self._eventoAbertura(*pedido) for pedido in pedidos])
+
+    def registrarFechamentos(self, fechamentos: list) -> None:
+        self._registrar([self._eventoFechamento(*fechamento)
+                         for fechamento in fechamentos])
+
+    @cronometrado('registro.compactar')
+    def compactar(self) -> None:
+        """
+        Grava um novo snapshot com os aluguéis em aberto (do snapshot atual
+        mais os eventos do diario), arquiva os fechados e descarta o diario.
+
+        Ordem das operações (usada por _recuperarCompactacao se o processo
+        cair no meio): cria '<arquivo>.tmp', renomeia o diario para
+        '<diario>.compactando', escreve o novo snapshot no temporário,
+        prepara o arquivamento dos fechados ('<arquivo>.arquivando'),
+        substitui o snapshot, conclui o arquivamento e por fim apaga o
+        '.compactando'.
+        """
+        with self.transacao():
+            self._gravarBuffer()
+            if not self.eventosDiario:
+                return
+            temporario = self.arquivo + '.tmp'
+            compactando = self.diario + '.compactando'
+            with open(temporario, 'w', encoding='utf-8') as destino:
+                os.replace(self.diario, compactando)
+                escrita = csv.writer(destino)
+                escrita.writerow(CABECALHO)
+                escrita.writerows(aluguel.linha()
+                                  for aluguel in self.abertos.values())
+                destino.flush()
+                os.fsync(destino.fileno())
+            self.historicoArquivado.prepararArquivamento(
+                self.preparacao, (aluguel for aluguel in self._linhasQuentes()
+                                  if aluguel.data_fim is not None))
+            os.replace(temporario, self.arquivo)
+            gravarSnapshotBinario(self.binario,
+                                  assinaturaCSV(os.stat(self.arquivo)),
+                                  self.abertos.values(), self.saldoEstacoes)
+            self.historicoArquivado.concluirArquivamento(self.preparacao)
+            os.remove(compactando)
+            self.abertosSnapshot = dict(self.abertos)
+            self.pendentes = []
+            self.fechamentosSnapshot = {}
+            self.eventosDiario = 0
+            self.assinatura = self._assinaturaArquivos()
+
+    def linhas(self):
+        """
+        Percorre o historico arquivado e em seguida o snapshot (aplicando os
+        fechamentos do diario) e os aluguéis abertos pelo diario, sem
+        carregar o historico em memória. Os arquivados vêm por mês de
+        devolução, os demais na ordem em que foram abertos.
+        :return: gerador de Aluguel.
+        """
+        with self.transacao():
+            yield from self.historicoArquivado.ler()
+            yield from self._linhasQuentes()
+
+    def historico(self, de: int = None, ate: int = None):
+        """
+        Percorre os aluguéis fechados devolvidos em [de, ate): os das
+        partições dos meses do intervalo e os fechados ainda não
+        arquivados.
+        :param de: início do intervalo (horas desde a época; None: sem
+        início).
+        :param ate: fim do intervalo, exclusivo (None: sem fim).
+        :return: gerador de Aluguel.
+        """
+        with self.transacao():
+            yield from self.historicoArquivado.ler(de, ate)
+            for aluguel in self._linhasQuentes():
+                if aluguel.data_fim is not None and \
+                        (de is None or aluguel.data_fim >= de) and \
+                        (ate is None or aluguel.data_fim < ate):
+                    yield aluguel
+
+    def _linhasQuentes(self):
+        """
+        Percorre o snapshot aplicando os fechamentos do diario e em seguida
+        os aluguéis abertos pelo diario.
+        :return: gerador de Aluguel.
+        """
+        with self.transacao(), \
+                open(self.arquivo, 'r', encoding='utf-8') as snapshot:
+            for row in csv.DictReader(snapshot):
+                cliente = self.clientes.lerCliente(row['Cliente'])
+                fechado = self.fechamentosSnapshot.get(cliente)
+                if fechado is not None and row['Total'] == '0':
+                    yield fechado
+                else:
+                    aberto = row['Total'] == '0'
+                    yield Aluguel(
+                        cliente, int(row['Quantidade_Alugada']),
+                        row['Plano'], lerHorasGravadas(row['Data_Inicial']),
+                        None if aberto else
+                        lerHorasGravadas(row['Data_Final']),
+                        row['Total'], row.get('Estacao_Retirada') or '',
+                        row.get('Estacao_Devolucao') or '',
+                        lerHorasOpcionais(row.get('Data_Prevista')))
+            yield from self.pendentes
+
+    def descarregar(self) -> None:
+        """
+        Grava no diario os eventos do buffer e libera a trava entre
+        processos retida por eles.
+        """
+        with self._trava:
+            self._gravarBuffer()
+            if self._profundidade == 0:
+                self._liberarTravaArquivo()
+
+    def fechar(self) -> None:
+        self.descarregar()
+
+    def criarArquivoCSV(self) -> None:
+        with open(self.arquivo, 'w', encoding='utf-8') as gravar:
+            escrita = csv.writer(gravar)
+            escrita.writerow(CABECALHO)
+
+    def _eventoAbertura(self, cliente, qnt_bikes, plano, data_ini,
+                        estacao='', data_prevista=None) -> list:
+        return [ABERTURA, formatarCodigo(cliente), qnt_bikes, plano,
+                data_ini, estacao,
+                0 if data_prevista is None else data_prevista]
+
+    def _eventoFechamento(self, cliente, data_fim, valor,
+                          estacao=None) -> list:
+        # Estação vazia no diario: devolvida onde foi retirada.
+        return [FECHAMENTO, formatarCodigo(cliente), data_fim, str(valor),
+                estacao or '']
+
+    def _registrar(self, eventos: list) -> list[Aluguel]:
+        """
+        Grava os eventos no diario com uma única escrita e os aplica ao
+        índice.
+        :return: aluguéis afetados, na ordem dos eventos.
+        """
+        if not eventos:
+            return []
+        with self.transacao():
+            self._gravarEventos(eventos)
+            alugueis = [self._aplicarEvento(evento) for evento in eventos]
+            self._compactarSeNecessario()
+        return alugueis
+
+    def _aplicarEvento(self, evento: list) -> Aluguel:
+        # Eventos gravados antes das estações e da data prevista não têm os
+        # últimos campos.
+        if evento[0] == ABERTURA:
+            aluguel = Aluguel(self.clientes.lerCliente(evento[1]),
+                              int(evento[2]), evento[3],
+                              lerHorasGravadas(evento[4]),
+                              estacao_ini=evento[5] if len(evento) > 5 else '',
+                              data_prevista=lerHorasOpcionais(
+                                  evento[6] if len(evento) > 6 else None))
+            self.pendentes.append(aluguel)
+            self._indexar(aluguel)
+        else:
+            aluguel = self.abertos.pop(self.clientes.lerCliente(evento[1]))
+            self.bikesAlugadas -= aluguel.qnt_bikes
+            aluguel.data_fim = lerHorasGravadas(evento[2])
+            aluguel.total = evento[3]
+            if aluguel.estacao_ini:
+                aluguel.estacao_fim = (evento[4] if len(evento) > 4 else '') \
+                    or aluguel.estacao_ini
+                self._moverEstacao(aluguel.estacao_fim, aluguel.qnt_bikes)
+            if self.abertosSnapshot.get(aluguel.cliente) is aluguel:
+                self.fechamentosSnapshot[aluguel.cliente] = aluguel
+        return aluguel
+
+    def _gravarEventos(self, eventos: list) -> None:
+        self.eventosDiario += len(eventos)
+        if self.durabilidade == DURABILIDADE_ESCRITA:
+            self._acrescentarAoDiario(eventos)
+            return
+        self._buffer += eventos
+        with _travaComBuffer:
+            _COM_BUFFER[id(self)] = self
+        if len(self._buffer) >= self.max_buffer:
+            self._gravarBuffer()
+        elif self.durabilidade == DURABILIDADE_INTERVALO and \
+                self._temporizador is None:
+            self._temporizador = threading.Timer(self.intervalo_ms / 1000,
+                                                 self.descarregar)
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def _acrescentarAoDiario(self, eventos: list) -> None:
+        with open(self.diario, 'a', encoding='utf-8', newline='') as diario:
+            escrita = csv.writer(diario, lineterminator='\n')
+            escrita.writerows(eventos)
+
+    @cronometrado('registro.gravarBuffer')
+    def _gravarBuffer(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        if self._buffer:
+            eventos, self._buffer = self._buffer, []
+            self._acrescentarAoDiario(eventos)
+            self.assinatura = self._assinaturaArquivos()
+            with _travaComBuffer:
+                _COM_BUFFER.pop(id(self), None)
+
+    def _liberarTravaArquivo(self) -> None:
+        if self._comTravaArquivo:
+            self._comTravaArquivo = False
+            self._travaArquivo.liberar()
+
+    def _compactarSeNecessario(self) -> None:
+        if self.eventosDiario >= self.limite_diario:
+            self.compactar()
+        self.assinatura = self._assinaturaArquivos()
+
+    def _assinaturaArquivos(self) -> tuple:
+        assinatura = []
+        for caminho in (self.arquivo, self.diario):
+            try:
+                estado = os.stat(caminho)
+            except FileNotFoundError:
+                assinatura.append(None)
+            else:
+                assinatura.append((estado.st_ino, estado.st_size,
+                                   estado.st_mtime_ns))
+        return tuple(assinatura)
+
+    def _indexar(self, aluguel: Aluguel) -> None:
+        self.abertos[aluguel.cliente] = aluguel
+        self.bikesAlugadas += aluguel.qnt_bikes
+        if aluguel.estacao_ini:
+            self._moverEstacao(aluguel.estacao_ini, -aluguel.qnt_bikes)
+
+    def _moverEstacao(self, estacao: str, qnt_bikes: int) -> None:
+        self.saldoEstacoes[estacao] = self.saldoEstacoes.get(estacao, 0) + \
+            qnt_bikes
+
+    def _lerDiario(self, caminho: str) -> list[str]:
+        """
+        Lê as linhas completas de um diario. Uma última linha sem '\\n' é
+        resto de uma escrita interrompida: é ignorada e cortada do arquivo
+        para não se juntar ao próximo evento.
+        """
+        try:
+            with open(caminho, 'r', encoding='utf-8', newline='') as diario:
+                linhas = diario.readlines()
+        except FileNotFoundError:
+            return []
+        if linhas and not linhas[-1].endswith('\n'):
+            incompleta = linhas.pop()
+            with open(caminho, 'r+b') as diario:
+                diario.seek(0, os.SEEK_END)
+                diario.truncate(diario.tell() -
+                                len(incompleta.encode('utf-8')))
+        return linhas
+
+    def _recuperarCompactacao(self) -> None:
+        """
+        Termina ou desfaz uma compactação interrompida (ver compactar).
+        """
+        temporario = self.arquivo + '.tmp'
+        compactando = self.diario + '.compactando'
+        if not os.path.exists(compactando):
+            # Caiu antes de renomear o diario: snapshot e diario intactos.
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return
+        if os.path.exists(temporario):
+            # Caiu antes de substituir o snapshot: os eventos do
+            # '.compactando' voltam para o inicio do diario e os fechados
+            # continuam no snapshot antigo.
+            linhas = self._lerDiario(compactando) + \
+                self._lerDiario(self.diario)
+            with open(temporario, 'w', encoding='utf-8',
+                      newline='') as destino:
+                destino.writelines(linhas)
+                destino.flush()
+                os.fsync(destino.fileno())
+            os.replace(temporario, self.diario)
+            if os.path.exists(self.preparacao):
+                os.remove(self.preparacao)
+        elif os.path.exists(self.preparacao):
+            # Snapshot ja substituido: termina de arquivar os fechados.
+            self.historicoArquivado.concluirArquivamento(self.preparacao)
+        # Snapshot ja substituido (ou eventos devolvidos ao diario).
+        os.remove(compactando)
@@ -0,0 +1,138 @@
+from datas import deHorasEpoch
+
+
+class Relatorio(object):
+    """
+    Agregados do historico de aluguéis, acumulados um aluguel fechado por
+    vez (adicionar), sem guardar os aluguéis: receita por plano e por dia
+    (dia da devolução), bicicleta-horas, duração média e utilização do
+    estoque por dia e por hora do dia. A memória usada depende do número de
+    dias do historico, não do número de aluguéis.
+    """
+
+    def __init__(self, estoque_definido: int):
+        self.estoque_definido = estoque_definido
+        self.alugueis = 0
+        self.horas = 0
+        self.receita_plano = {}
+        self.bike_horas_plano = {}
+        # Chaves em dias desde a época.
+        self.receita_dia = {}
+        self.bike_horas_dia = {}
+        # Bicicleta-horas em cada hora do dia (0 a 23).
+        self.bike_horas_hora = [0] * 24
+        self.primeira_hora = None
+        self.ultima_hora = None
+
+    def adicionar(self, aluguel) -> None:
+        """
+        Acumula um aluguel fechado (aluguéis em aberto são ignorados).
+        :param aluguel: armazenamento.Aluguel.
+        """
+        if aluguel.data_fim is None:
+            return
+        inicio, fim, qnt = aluguel.data_ini, aluguel.data_fim, \
+            aluguel.qnt_bikes
+        valor = float(aluguel.total)
+        self.alugueis += 1
+        self.horas += fim - inicio
+        self.receita_plano[aluguel.plano] = \
+            self.receita_plano.get(aluguel.plano, 0) + valor
+        self.bike_horas_plano[aluguel.plano] = \
+            self.bike_horas_plano.get(aluguel.plano, 0) + qnt * (fim - inicio)
+        self.receita_dia[fim // 24] = \
+            self.receita_dia.get(fim // 24, 0) + valor
+        # Divide o intervalo [inicio, fim) entre os dias que ele cobre.
+        hora = inicio
+        while hora < fim:
+            dia = hora // 24
+            ate = min(fim, (dia + 1) * 24)
+            self.bike_horas_dia[dia] = \
+                self.bike_horas_dia.get(dia, 0) + qnt * (ate - hora)
+            hora = ate
+        # Cada hora do dia recebe os dias inteiros do intervalo e as horas
+        # restantes, a partir da hora de retirada.
+        dias_inteiros, resto = divmod(fim - inicio, 24)
+        if dias_inteiros:
+            for h in range(24):
+                self.bike_horas_hora[h] += qnt * dias_inteiros
+        for h in range(inicio, inicio + resto):
+            self.bike_horas_hora[h % 24] += qnt
+        if self.primeira_hora is None or inicio < self.primeira_hora:
+            self.primeira_hora = inicio
+        if self.ultima_hora is None or fim > self.ultima_hora:
+            self.ultima_hora = fim
+
+    def receitaTotal(self) -> float:
+        return sum(self.receita_plano.values())
+
+    def bicicletaHoras(self) -> int:
+        return sum(self.bike_horas_plano.values())
+
+    def duracaoMedia(self) -> float:
+        """
+        Retorna a duração média dos aluguéis fechados, em horas.
+        :return: horas (0 sem aluguéis).
+        """
+        return self.horas / self.alugueis if self.alugueis else 0.0
+
+    def receitaPorDia(self) -> dict:
+        """
+        Retorna a receita de cada dia (dia da devolução), em ordem.
+        :return: {datetime.date: receita}.
+        """
+        return {deHorasEpoch(dia * 24).date(): valor
+                for dia, valor in sorted(self.receita_dia.items())}
+
+    def utilizacaoPorDia(self) -> dict:
+        """
+        Retorna a fração do estoque em uso em cada dia com aluguéis.
+        :return: {datetime.date: bicicleta-horas / (estoque * 24)}.
+        """
+        return {deHorasEpoch(dia * 24).date():
+                bike_horas / (self.estoque_definido * 24)
+                for dia, bike_horas in sorted(self.bike_horas_dia.items())}
+
+    def utilizacaoPorHora(self) -> list[float]:
+        """
+        Retorna a fração média do estoque em uso em cada hora do dia, ao
+        longo de todos os dias do historico.
+        :return: lista com 24 frações (hora 0 a 23).
+        """
+        if self.primeira_hora is None:
+            return [0.0] * 24
+        dias = self.ultima_hora // 24 - self.primeira_hora // 24 + 1
+        return [bike_horas / (self.estoque_definido * dias)
+                for bike_horas in self.bike_horas_hora]
+
+    def resumo(self) -> dict:
+        """
+        Retorna todos os agregados em um dicionario serializável em json.
+        """
+        return {
+            'alugueis': self.alugueis,
+            'receita_total': self.receitaTotal(),
+            'receita_por_plano': dict(self.receita_plano),
+            'bicicleta_horas': self.bicicletaHoras(),
+            'bicicleta_horas_por_plano': dict(self.bike_horas_plano),
+            'duracao_media_horas': self.duracaoMedia(),
+            'receita_por_dia': {str(dia): valor for dia, valor
+                                in self.receitaPorDia().items()},
+            'utilizacao_por_dia': {str(dia): fracao for dia, fracao
+                                   in self.utilizacaoPorDia().items()},
+            'utilizacao_por_hora': self.utilizacaoPorHora(),
+        }
+
+
+def gerarRelatorio(alugueis, estoque_definido: int) -> Relatorio:
+    """
+    Percorre uma única vez um iteravel de aluguéis (ex.: registro.linhas())
+    e acumula os agregados.
+    :param alugueis: iteravel de armazenamento.Aluguel.
+    :param estoque_definido: estoque usado nas frações de utilização.
+    :return: Relatorio.
+    """
+    relatorio = Relatorio(estoque_definido)
+    for aluguel in alugueis:
+        relatorio.adicionar(aluguel)
+    return relatorio
@@ -0,0 +1,83 @@
+"""
+Resultados das operações da Loja para uso programático: em vez de imprimir
+mensagens e devolver False, as operações silenciosas (Loja.efetuarPedido,
+Loja.efetuarFechamento) devolvem um Resultado com o código do erro
+(CodigoErro) e a mensagem que o console mostraria.
+"""
+from enum import Enum
+
+
+class CodigoErro(Enum):
+    NOME_INVALIDO = 'nome_invalido'
+    CLIENTE_NAO_ENCONTRADO = 'cliente_nao_encontrado'
+    CLIENTE_AMBIGUO = 'cliente_ambiguo'
+    ALUGUEL_EM_ABERTO = 'aluguel_em_aberto'
+    QUANTIDADE_INVALIDA = 'quantidade_invalida'
+    ESTOQUE_INSUFICIENTE = 'estoque_insuficiente'
+    PLANO_INEXISTENTE = 'plano_inexistente'
+    DATA_INVALIDA = 'data_invalida'
+    PERIODO_INVALIDO = 'periodo_invalido'
+    ESTACAO_OBRIGATORIA = 'estacao_obrigatoria'
+    ESTACAO_INEXISTENTE = 'estacao_inexistente'
+    ESTACAO_SEM_VAGAS = 'estacao_sem_vagas'
+    # Parâmetros de tipo inesperado que as validações não previram.
+    DADOS_INVALIDOS = 'dados_invalidos'
+
+
+class ErroLoja(Exception):
+    """
+    Erro de validação da Loja: a mensagem para o usuário (str(erro)) e o
+    código do erro.
+    """
+
+    def __init__(self, codigo: CodigoErro, mensagem: str):
+        super().__init__(mensagem)
+        self.codigo = codigo
+
+
+def codigoDoErro(erro: Exception) -> CodigoErro:
+    """
+    Retorna o código de um erro levantado pelas validações da Loja.
+    :param erro: ErroLoja (ou outra exceção, tratada como DADOS_INVALIDOS).
+    :return: CodigoErro.
+    """
+    if isinstance(erro, ErroLoja):
+        return erro.codigo
+    return CodigoErro.DADOS_INVALIDOS
+
+
+class Resultado(object):
+    """
+    Resultado de uma operação da Loja. Verdadeiro se ela deu certo; senão
+    erro traz o CodigoErro e mensagem o texto para o usuário. cliente é o
+    código do cliente (quando identificado) e valor, o valor da conta nos
+    fechamentos.
+    """
+    __slots__ = ('sucesso', 'erro', 'mensagem', 'cliente', 'valor')
+
+    def __init__(self, sucesso: bool, erro: CodigoErro = None,
+                 mensagem: str = None, cliente: int = None,
+                 valor: float = None):
+        self.sucesso = sucesso
+        self.erro = erro
+        self.mensagem = mensagem
+        self.cliente = cliente
+        self.valor = valor
+
+    @classmethod
+    def falha(cls, erro: Exception) -> 'Resultado':
+        """
+        Monta o resultado de uma operação que levantou o erro.
+        :param erro: exceção levantada (ver codigoDoErro).
+        :return: Resultado sem sucesso.
+        """
+        return cls(False, codigoDoErro(erro), str(erro))
+
+    def __bool__(self) -> bool:
+        return self.sucesso
+
+    def __repr__(self) -> str:
+        if self.sucesso:
+            return f'Resultado(sucesso, cliente={self.cliente}, ' \
+                   f'valor={self.valor})'
+        return f'Resultado({self.erro.name}: {self.mensagem!r})'
@@ -0,0 +1,163 @@
+import asyncio
+
+from emprestimoBicicletas import Loja
+
+# Tipos de operação na fila do escritor.
+ALUGAR = 'alugar'
+FINALIZAR = 'finalizar'
+
+
+class ServicoAssincrono(object):
+    """
+    Frente asyncio da Loja, para atender vários terminais de um mesmo
+    processo. As corrotinas alugar e finalizar só enfileiram o pedido; uma
+    única tarefa escritora junta o que estiver na fila (até max_lote
+    pedidos) e grava o lote com Loja.receberPedidos / Loja.finalizarContas
+    em uma thread, com uma escrita no registro por lote em vez de uma por
+    pedido. A ordem de chegada é preservada.
+
+    Uso:
+        async with ServicoAssincrono(loja) as servico:
+            resultado = await servico.alugar('Lucas', 2, 'hora',
+                                             '11/02/2021 12')
+    """
+
+    def __init__(self, loja: Loja = None, max_lote=256):
+        self.loja = loja if loja is not None else Loja.compartilhada()
+        self.max_lote = max_lote
+        self._fila = None
+        self._escritor = None
+        # True de encerrar() em diante: novos pedidos são recusados.
+        self._encerrado = False
+
+    async def __aenter__(self):
+        self.iniciar()
+        return self
+
+    async def __aexit__(self, *erro):
+        await self.encerrar()
+
+    def iniciar(self) -> None:
+        """
+        Cria a fila e a tarefa escritora no laço de eventos atual. Levanta
+        RuntimeError se a escritora anterior ainda estiver rodando.
+        """
+        if self._escritor is not None and not self._escritor.done():
+            raise RuntimeError('Serviço já iniciado.')
+        self._fila = asyncio.Queue()
+        self._encerrado = False
+        self._escritor = asyncio.create_task(self._escrever())
+
+    async def encerrar(self) -> None:
+        """
+        Grava os pedidos que ainda estão na fila e encerra a tarefa
+        escritora. Pedidos feitos depois disso levantam RuntimeError.
+        """
+        if self._escritor is None:
+            return
+        self._encerrado = True
+        await self._fila.put(None)
+        await self._escritor
+        self._escritor = None
+
+    async def alugar(self, cliente: str, qnt_bikes: int, plano: str,
+                     data_ini: str, estacao: str = None,
+                     data_prevista: str = None) -> dict:
+        """
+        Versão assíncrona de Loja.receberPedido.
+        :param cliente: nome do cliente.
+        :param qnt_bikes: quantidade de bicicletas solicitada.
+        :param plano: plano ('hora', 'dia', 'semana').
+        :param data_ini: data e hora inicial no padrao 'dd/mm/yyyy H'.
+        :param estacao: estação de retirada (lojas com estações).
+        :param data_prevista: devolução prevista (opcional).
+        :return: {'cliente', 'sucesso', 'erro', 'codigo'}.
+        """
+        pedido = (cliente, qnt_bikes, plano, data_ini)
+        if estacao is not None or data_prevista is not None:
+            pedido += (estacao, data_prevista)
+        return await self._enfileirar(ALUGAR, pedido)
+
+    async def finalizar(self, cliente: str, data_fim: str,
+                        estacao: str = None) -> dict:
+        """
+        Versão assíncrona de Loja.finalizarConta.
+        :param cliente: nome do cliente.
+        :param data_fim: data e hora da entrega no padrao 'dd/mm/yyyy H'.
+        :param estacao: estação de devolução (padrao: a de retirada).
+        :return: {'cliente', 'sucesso', 'erro', 'codigo', 'valor'}.
+        """
+        fechamento = (cliente, data_fim)
+        if estacao is not None:
+            fechamento += (estacao,)
+        return await self._enfileirar(FINALIZAR, fechamento)
+
+    async def estoque(self) -> int:
+        """
+        Versão assíncrona de Loja.mostrarEstoque.
+        :return: quantidade de bicicletas disponíveis.
+        """
+        return await asyncio.to_thread(self.loja.mostrarEstoque)
+
+    async def _enfileirar(self, tipo: str, argumentos: tuple) -> dict:
+        if self._escritor is None:
+            raise RuntimeError('Serviço não iniciado.')
+        if self._encerrado:
+            raise RuntimeError('Serviço encerrado.')
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((tipo, argumentos, futuro))
+        return await futuro
+
+    async def _escrever(self) -> None:
+        encerrar = False
+        while not encerrar:
+            lote = []
+            item = await self._fila.get()
+            while True:
+                if item is None:
+                    encerrar = True
+                    break
+                lote.append(item)
+                if len(lote) >= self.max_lote or self._fila.empty():
+                    break
+                item = self._fila.get_nowait()
+            if not lote:
+                continue
+            try:
+                resultados = await asyncio.to_thread(self._gravarLote, lote)
+            except Exception as erro:
+                for _, _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(erro)
+            else:
+                for (_, _, futuro), resultado in zip(lote, resultados):
+                    if not futuro.done():
+                        futuro.set_result(resultado)
+        # Nada deveria chegar depois do fim (ver _enfileirar), mas um pedido
+        # que ficasse na fila esperaria para sempre.
+        while not self._fila.empty():
+            item = self._fila.get_nowait()
+            if item is not None and not item[2].done():
+                item[2].set_exception(RuntimeError('Serviço encerrado.'))
+
+    def _gravarLote(self, lote: list) -> list[dict]:
+        """
+        Grava o lote em ordem, chamando a operação em lote da Loja para cada
+        sequência de pedidos do mesmo tipo, todas na mesma transação.
+        :return: um relatório por pedido, na ordem do lote.
+        """
+        resultados = []
+        with self.loja.registro.transacao():
+            inicio = 0
+            while inicio < len(lote):
+                tipo = lote[inicio][0]
+                fim = inicio
+                while fim < len(lote) and lote[fim][0] == tipo:
+                    fim += 1
+                argumentos = [item[1] for item in lote[inicio:fim]]
+                if tipo == ALUGAR:
+                    resultados += self.loja.receberPedidos(argumentos)
+                else:
+                    resultados += self.loja.finalizarContas(argumentos)
+                inicio = fim
+        return resultados
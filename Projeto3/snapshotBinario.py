@@ -0,0 +1,138 @@
+"""
+Snapshot binário do registro de aluguéis ('<arquivo>.bin'): uma cópia
+compacta, em registros de tamanho fixo, do que o RegistroAlugueis precisa
+para montar o índice a partir do snapshot csv (aluguéis em aberto e saldo
+das estações), para que a inicialização não tenha que ler o historico
+inteiro. O csv continua sendo o snapshot oficial; o binário guarda a
+assinatura do csv de onde saiu e é ignorado se ela não bater.
+
+Formato (little-endian):
+- cabecalho: MAGICO, VERSAO, assinatura do csv (inode, tamanho, mtime em
+  ns), quantidade de aluguéis em aberto, de estações e bytes de texto;
+- um registro REGISTRO_ABERTO por aluguel em aberto: código do cliente,
+  posição e tamanho da estação de retirada no bloco de texto, plano (um
+  byte, índice em PLANOS), quantidade, data inicial e devolução prevista
+  (horas desde a época em int32, 0 se não houver previsão);
+- um registro REGISTRO_ESTACAO por estação: posição e tamanho do código e
+  saldo;
+- o bloco de texto (utf-8), com cada texto gravado uma única vez.
+"""
+import mmap
+import os
+import struct
+
+from armazenamento import Aluguel
+from cobranca import PERIODOS
+
+MAGICO = b'ALUG'
+VERSAO = 2
+CABECALHO_BIN = struct.Struct('<4sHQqqIII')
+REGISTRO_ABERTO = struct.Struct('<IIHBiii')
+REGISTRO_ESTACAO = struct.Struct('<IHi')
+PLANOS = tuple(PERIODOS)
+_CODIGO_PLANO = {plano: codigo for codigo, plano in enumerate(PLANOS)}
+# Limites dos campos int32, uint32 e uint16.
+_HORAS_MAX = 2 ** 31 - 1
+_CODIGO_MAX = 2 ** 32 - 1
+_TEXTO_MAX = 2 ** 16 - 1
+
+
+def assinaturaCSV(estado: os.stat_result) -> tuple[int, int, int]:
+    return estado.st_ino, estado.st_size, estado.st_mtime_ns
+
+
+def gravarSnapshotBinario(caminho: str, assinatura: tuple, abertos,
+                          saldos: dict) -> bool:
+    """
+    Grava o snapshot binário (em '<caminho>.tmp', depois renomeado).
+    :param caminho: caminho do arquivo binário.
+    :param assinatura: assinaturaCSV do snapshot csv de origem.
+    :param abertos: iteravel de Aluguel em aberto no snapshot.
+    :param saldos: {estacao: saldo} do snapshot.
+    :return: True (se gravou)/ False (se algum valor não cabe no formato;
+    o registro continua usando o csv).
+    """
+    textos = {}
+    partes = []
+    tamanho_textos = 0
+
+    def texto(valor: str) -> tuple[int, int]:
+        nonlocal tamanho_textos
+        if valor not in textos:
+            codificado = valor.encode('utf-8')
+            textos[valor] = (tamanho_textos, len(codificado))
+            partes.append(codificado)
+            tamanho_textos += len(codificado)
+        return textos[valor]
+
+    registros = []
+    for aluguel in abertos:
+        plano = _CODIGO_PLANO.get(aluguel.plano)
+        prevista = aluguel.data_prevista or 0
+        if plano is None or not (-_HORAS_MAX <= aluguel.data_ini <= _HORAS_MAX
+                                 and -_HORAS_MAX <= prevista <= _HORAS_MAX
+                                 and 0 <= aluguel.cliente <= _CODIGO_MAX):
+            return False
+        registros.append((aluguel.cliente, *texto(aluguel.estacao_ini),
+                          plano, aluguel.qnt_bikes, aluguel.data_ini,
+                          prevista))
+    estacoes = [(*texto(estacao), saldo) for estacao, saldo in saldos.items()]
+    if any(tamanho > _TEXTO_MAX for _, tamanho in textos.values()):
+        return False
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as destino:
+        destino.write(CABECALHO_BIN.pack(MAGICO, VERSAO, *assinatura,
+                                         len(registros), len(estacoes),
+                                         tamanho_textos))
+        destino.write(b''.join(REGISTRO_ABERTO.pack(*registro)
+                               for registro in registros))
+        destino.write(b''.join(REGISTRO_ESTACAO.pack(*estacao)
+                               for estacao in estacoes))
+        destino.writelines(partes)
+    os.replace(temporario, caminho)
+    return True
+
+
+def lerSnapshotBinario(caminho: str, assinatura: tuple
+                       ) -> tuple[list[Aluguel], dict] | None:
+    """
+    Lê o snapshot binário mapeando o arquivo em memória.
+    :param caminho: caminho do arquivo binário.
+    :param assinatura: assinaturaCSV do snapshot csv atual.
+    :return: (aluguéis em aberto, {estacao: saldo}) / None se o arquivo não
+    existir, estiver incompleto ou tiver sido gerado de outro csv.
+    """
+    try:
+        arquivo = open(caminho, 'rb')
+    except FileNotFoundError:
+        return None
+    with arquivo:
+        tamanho = os.fstat(arquivo.fileno()).st_size
+        if tamanho < CABECALHO_BIN.size:
+            return None
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as dados:
+            magico, versao, *origem, n_abertos, n_estacoes, tamanho_textos = \
+                CABECALHO_BIN.unpack_from(dados)
+            inicio_estacoes = CABECALHO_BIN.size + \
+                n_abertos * REGISTRO_ABERTO.size
+            inicio_textos = inicio_estacoes + \
+                n_estacoes * REGISTRO_ESTACAO.size
+            if magico != MAGICO or versao != VERSAO or \
+                    tuple(origem) != tuple(assinatura) or \
+                    inicio_textos + tamanho_textos != tamanho:
+                return None
+            textos = dados[inicio_textos:]
+            abertos = [
+                Aluguel(cliente, qnt, PLANOS[plano], data_ini,
+                        estacao_ini=textos[estacao:estacao + n_estacao]
+                        .decode('utf-8'),
+                        data_prevista=prevista or None)
+                for cliente, estacao, n_estacao, plano, qnt, data_ini,
+                prevista in REGISTRO_ABERTO.iter_unpack(
+                    dados[CABECALHO_BIN.size:inicio_estacoes])]
+            saldos = {textos[estacao:estacao + n_estacao].decode('utf-8'):
+                      saldo
+                      for estacao, n_estacao, saldo in
+                      REGISTRO_ESTACAO.iter_unpack(
+                          dados[inicio_estacoes:inicio_textos])}
+    return abertos, saldos
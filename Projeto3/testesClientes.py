@@ -0,0 +1,114 @@
+from apoioTestes import PastaTemporaria
+from cadastroClientes import CadastroClientes
+from contextlib import redirect_stdout
+from emprestimoBicicletas import Cliente, Loja
+from registroAlugueis import RegistroAlugueis
+from unittest import TestCase, main, mock
+import io
+
+
+class TestesClientes(PastaTemporaria, TestCase):
+
+    def test01HomonimosSaoClientesDiferentes(self):
+        loja = Loja(10, self.arquivo)
+        with redirect_stdout(io.StringIO()):
+            lucas = loja.cadastrarCliente('Lucas')
+            outro = loja.cadastrarCliente(' lucas ')
+            self.assertNotEqual(lucas, outro)
+            self.assertFalse(loja.receberPedido('Lucas', 2, 'hora',
+                                                '11/02/2021 12'))
+            self.assertTrue(loja.receberPedido(lucas, 2, 'hora',
+                                               '11/02/2021 12'))
+            self.assertTrue(loja.receberPedido(outro, 3, 'dia',
+                                               '11/02/2021 12'))
+        self.assertEqual(loja.calcularBicicletasAlugadas(), 5)
+        self.assertEqual(loja.finalizarConta(outro, '12/02/2021 12'),
+                         (True, 52.5))
+        self.assertTrue(loja.checarNomeNaLista(lucas))
+        self.assertFalse(loja.checarNomeNaLista(outro))
+
+    def test02NomesNormalizadosEInternados(self):
+        cadastro = CadastroClientes(self.arquivo + '.clientes')
+        primeiro = cadastro.cadastrar(''.join(['ana', ' maria']))
+        segundo = cadastro.cadastrar(' Ana Maria')
+        self.assertEqual(primeiro.nome, 'Ana Maria')
+        self.assertIs(primeiro.nome, segundo.nome)
+        relido = CadastroClientes(self.arquivo + '.clientes')
+        self.assertEqual(relido.codigosDoNome('ANA MARIA'),
+                         [primeiro.codigo, segundo.codigo])
+
+    def test03RegistroAntigoComNomesViraCodigos(self):
+        with open(self.arquivo, 'w', encoding='utf-8') as arquivo:
+            arquivo.write('Cliente,Quantidade_Alugada,Plano,Data_Inicial,'
+                          'Data_Final,Total\n'
+                          'Lucas,2,hora,448308,448310,30.0\n'
+                          'Ana,1,dia,448308,0,0\n'
+                          'Lucas,3,hora,448320,0,0\n')
+        registro = RegistroAlugueis(self.arquivo)
+        lucas, ana = (registro.clientes.codigosDoNome(nome)[0]
+                      for nome in ('Lucas', 'Ana'))
+        self.assertEqual([aluguel.cliente for aluguel in registro.linhas()],
+                         [lucas, ana, lucas])
+        self.assertEqual(registro.buscarAberto(lucas).qnt_bikes, 3)
+        registro.compactar()
+        relido = RegistroAlugueis(self.arquivo)
+        self.assertEqual(len(relido.clientes), 2)
+        self.assertEqual(relido.buscarAberto(ana).qnt_bikes, 1)
+
+    def test04ClientePeloCodigo(self):
+        loja = Loja(10, self.arquivo)
+        with redirect_stdout(io.StringIO()):
+            codigo = loja.cadastrarCliente('Jose')
+            loja.cadastrarCliente('Jose')
+            cliente = Cliente('Jose', loja, codigo)
+            self.assertTrue(cliente.alugarBilicletas(4, 'semana',
+                                                     '11/02/2021 12'))
+        self.assertEqual(loja.registro.buscarAberto(codigo).qnt_bikes, 4)
+
+    def test05NomeSoDeDigitosNaoViraCodigo(self):
+        with open(self.arquivo, 'w', encoding='utf-8') as arquivo:
+            arquivo.write('Cliente,Quantidade_Alugada,Plano,Data_Inicial,'
+                          'Data_Final,Total\n'
+                          'Lucas,2,hora,448308,0,0\n'
+                          '12,1,dia,448308,0,0\n')
+        registro = RegistroAlugueis(self.arquivo)
+        self.assertEqual(registro.clientes.codigosDoNome('12'), [2])
+        self.assertEqual(registro.buscarAberto(2).qnt_bikes, 1)
+        self.assertIsNone(registro.buscarAberto(12))
+        # Depois da compactação o código é gravado com a marca.
+        registro.registrarAbertura(registro.clientes.cadastrar('Ana').codigo,
+                                   1, 'hora', 448309)
+        registro.compactar()
+        with open(self.arquivo, encoding='utf-8') as arquivo:
+            self.assertEqual([linha.split(',')[0] for linha
+                              in arquivo.read().splitlines()[1:]],
+                             ['#1', '#2', '#3'])
+        self.assertEqual(RegistroAlugueis(self.arquivo).buscarAberto(2)
+                         .qnt_bikes, 1)
+
+    def test06LoteGravaCadastroAntesDoDiario(self):
+        loja = Loja(10, self.arquivo)
+        gravacoes = []
+        gravarCadastro = CadastroClientes._gravar
+        gravarDiario = RegistroAlugueis._acrescentarAoDiario
+
+        def cadastro(cadastro, fichas):
+            if fichas and cadastro._pendentes is None:
+                gravacoes.append('cadastro')
+            gravarCadastro(cadastro, fichas)
+
+        def diario(registro, eventos):
+            gravacoes.append('diario')
+            gravarDiario(registro, eventos)
+
+        with mock.patch.object(CadastroClientes, '_gravar', cadastro), \
+                mock.patch.object(RegistroAlugueis, '_acrescentarAoDiario',
+                                  diario):
+            loja.receberPedidos([('Ana', 2, 'hora', '11/02/2021 12'),
+                                 ('Bruno', 1, 'hora', '11/02/2021 12')])
+        self.assertEqual(gravacoes, ['cadastro', 'diario'])
+        loja.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+from apoioTestes import PastaTemporaria
+from emprestimoBicicletas import Loja
+from unittest import TestCase, main, skipIf
+import cobranca
+import random
+
+
+class TestesCobranca(PastaTemporaria, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.loja = Loja(arquivo=self.arquivo)
+        sorteio = random.Random(2021)
+        self.planos = [sorteio.choice(['hora', 'dia', 'semana'])
+                       for _ in range(5000)]
+        self.bikes = [sorteio.randint(1, 10) for _ in range(5000)]
+        self.horas = [sorteio.randint(1, 24 * 400) for _ in range(5000)]
+        self.esperado = [self.loja.calcularValorConta(*linha) for linha in
+                         zip(self.planos, self.bikes, self.horas)]
+
+    def test01LoteIgualAoCalculoIndividual(self):
+        self.assertEqual(list(self.loja.calcularValoresConta(
+            self.planos, self.bikes, self.horas)), self.esperado)
+
+    def test02LoteComArray(self):
+        self.assertEqual(list(cobranca._calcularComArray(
+            self.planos, self.bikes, self.horas, self.loja.planos)),
+            self.esperado)
+
+    @skipIf(cobranca.numpy is None, 'numpy não instalado')
+    def test03LoteComNumpy(self):
+        self.assertEqual(list(cobranca._calcularComNumpy(
+            self.planos, self.bikes, self.horas, self.loja.planos)),
+            self.esperado)
+
+    def test04PlanoInexistente(self):
+        with self.assertRaises(ValueError):
+            self.loja.calcularValoresConta(['anual'], [1], [1])
+
+    def test05PrecosFracionados(self):
+        self.loja.planos = {'hora': 4.5, 'dia': 22.75, 'semana': 99.9}
+        planos = ['hora', 'hora', 'dia', 'dia', 'semana', 'semana']
+        bikes = [1, 3, 2, 5, 1, 4]
+        horas = [3, 7, 25, 48, 169, 400]
+        esperado = [self.loja.calcularValorConta(*linha) for linha in
+                    zip(planos, bikes, horas)]
+        self.assertEqual(esperado[0], 13.5)
+        self.assertEqual(list(self.loja.calcularValoresConta(
+            planos, bikes, horas)), esperado)
+        self.assertEqual(list(cobranca._calcularComArray(
+            planos, bikes, horas, self.loja.planos)), esperado)
+        if cobranca.numpy is not None:
+            self.assertEqual(list(cobranca._calcularComNumpy(
+                planos, bikes, horas, self.loja.planos)), esperado)
+
+
+if __name__ == '__main__':
+    main()
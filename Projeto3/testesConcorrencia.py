@@ -0,0 +1,97 @@
+from apoioTestes import PastaTemporaria
+from armazenamentoSQLite import ArmazenamentoSQLite
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from emprestimoBicicletas import Loja
+from unittest import TestCase, main
+import csv
+import io
+import multiprocessing
+import os
+import random
+
+ESTOQUE = 10
+
+
+def operar(loja, nome, sorteio):
+    """
+    Tenta alugar de 1 a 3 bicicletas e, em metade das vezes, devolve logo
+    em seguida, para que o estoque fique sempre disputado.
+    """
+    if loja.receberPedido(nome, sorteio.randint(1, 3), 'hora',
+                          '11/02/2021 12') and sorteio.random() < 0.5:
+        loja.finalizarConta(nome, '11/02/2021 15')
+
+
+def processoOperador(arquivo, indice, operacoes):
+    loja = Loja(ESTOQUE, arquivo)
+    sorteio = random.Random(indice)
+    with redirect_stdout(io.StringIO()):
+        for i in range(operacoes):
+            operar(loja, f'Processo{indice}Cliente{i}', sorteio)
+
+
+class TestesConcorrencia(PastaTemporaria, TestCase):
+
+    def conferirDiario(self):
+        """
+        Reaplica o diario na ordem em que foi gravado e confere que o
+        estoque nunca ficou negativo.
+        """
+        alugados = {}
+        em_uso = 0
+        with open(self.arquivo + '.diario', encoding='utf-8') as diario:
+            for evento in csv.reader(diario):
+                if evento[0] == 'A':
+                    alugados[evento[1]] = int(evento[2])
+                    em_uso += int(evento[2])
+                else:
+                    em_uso -= alugados.pop(evento[1])
+                self.assertLessEqual(em_uso, ESTOQUE)
+        return em_uso
+
+    def test01ThreadsNaoPassamDoEstoque(self):
+        loja = Loja(ESTOQUE, self.arquivo)
+        loja.registro.limite_diario = 10 ** 6
+        with redirect_stdout(io.StringIO()), \
+                ThreadPoolExecutor(max_workers=16) as executor:
+            tarefas = [executor.submit(operar, loja, f'Cliente{i}',
+                                       random.Random(i))
+                       for i in range(2000)]
+            for tarefa in tarefas:
+                tarefa.result()
+        self.assertEqual(self.conferirDiario(),
+                         loja.calcularBicicletasAlugadas())
+        self.assertGreaterEqual(loja.mostrarEstoque(), 0)
+
+    def test02ProcessosNaoPassamDoEstoque(self):
+        # 4 x 120 operacoes geram menos eventos do que o limite_diario
+        # padrao, entao o diario inteiro continua disponivel para conferir.
+        processos = [multiprocessing.Process(target=processoOperador,
+                                             args=(self.arquivo, i, 120))
+                     for i in range(4)]
+        for processo in processos:
+            processo.start()
+        for processo in processos:
+            processo.join()
+            self.assertEqual(processo.exitcode, 0)
+        self.assertEqual(self.conferirDiario(),
+                         Loja(ESTOQUE, self.arquivo)
+                         .calcularBicicletasAlugadas())
+
+    def test03SQLiteNaoPassaDoEstoque(self):
+        arquivo_db = os.path.join(self.pasta.name, 'clientes.db')
+        loja = Loja(ESTOQUE, armazenamento=ArmazenamentoSQLite(arquivo_db))
+        with redirect_stdout(io.StringIO()), \
+                ThreadPoolExecutor(max_workers=16) as executor:
+            tarefas = [executor.submit(operar, loja, f'Cliente{i}',
+                                       random.Random(i))
+                       for i in range(1000)]
+            for tarefa in tarefas:
+                tarefa.result()
+        self.assertTrue(0 <= loja.mostrarEstoque() <= ESTOQUE)
+        loja.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+from datas import converterDataEntrada, converterDataGravada
+from datetime import datetime
+from unittest import TestCase, main
+import random
+
+
+def resultadoStrptime(data, formato='%d/%m/%Y %H'):
+    try:
+        return datetime.strptime(data, formato)
+    except ValueError as erro:
+        return str(erro)
+
+
+def resultadoConversor(data):
+    try:
+        return converterDataEntrada(data)
+    except ValueError as erro:
+        return str(erro)
+
+
+class TestesDatas(TestCase):
+
+    def test01MesmoResultadoDoStrptime(self):
+        entradas = ['11/02/2021 12', '1/2/2021 0', ' 5/03/2021 09',
+                    '05/03/2021   9', '31/04/2021 12', '29/02/2021 10',
+                    '29/02/2024 10', '30/04/2021 25', '30/06/2021 -1',
+                    '20210325 12', '16062021 12h', '32/01/2021 10',
+                    '10/13/2021 10', '10/10/0000 10', '10/10/2021',
+                    '10/10/2021 10 ', '', '٠١/٠٢/٢٠٢١ ١٢']
+        sorteio = random.Random(8)
+        for _ in range(5000):
+            entradas.append(''.join(sorteio.choice('0123456789/ ')
+                                    for _ in range(sorteio.randint(8, 15))))
+        for data in entradas:
+            self.assertEqual(resultadoConversor(data),
+                             resultadoStrptime(data), data)
+
+    def test02DataGravada(self):
+        for data in ('2021-02-11 12:00:00', '1999-12-31 23:00:00'):
+            self.assertEqual(converterDataGravada(data),
+                             resultadoStrptime(data[:13], '%Y-%m-%d %H'))
+
+
+if __name__ == '__main__':
+    main()
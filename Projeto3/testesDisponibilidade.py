@@ -0,0 +1,191 @@
+from apoioTestes import PastaTemporaria, horas
+from armazenamentoSQLite import ArmazenamentoSQLite
+from contextlib import redirect_stdout
+from datetime import datetime
+from disponibilidade import ArvoreOcupacao
+from emprestimoBicicletas import Cliente, Loja
+from estacoes import Estacao, RedeEstacoes
+from resultados import CodigoErro
+from unittest import TestCase, main
+import io
+import os
+import random
+
+
+class TestesDisponibilidade(PastaTemporaria, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Relógio das lojas: as previsões dos testes ainda não venceram.
+        self.agora = datetime(2021, 2, 11, 12)
+
+    def relogio(self):
+        return self.agora
+
+    def test01ArvoreIgualAForcaBruta(self):
+        sorteio = random.Random(0)
+        arvore = ArvoreOcupacao(bits=7)
+        ocupacao = [0] * 128
+        for _ in range(300):
+            inicio = sorteio.randrange(128)
+            fim = sorteio.choice([None, sorteio.randrange(inicio, 129)])
+            qnt = sorteio.randint(-3, 5)
+            arvore.adicionar(inicio, fim, qnt)
+            for hora in range(inicio, 128 if fim is None else fim):
+                ocupacao[hora] += qnt
+            a = sorteio.randrange(128)
+            b = sorteio.randrange(a + 1, 129)
+            self.assertEqual(arvore.maximo(a, b), max(ocupacao[a:b]))
+            self.assertEqual(arvore.maximo(a), max(ocupacao[a:]))
+
+    def test02ReservaFuturaDepoisDaDevolucaoPrevista(self):
+        loja = Loja(10, self.arquivo, relogio=self.relogio)
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(loja.receberPedido('Lucas', 8, 'dia',
+                                               '11/02/2021 12',
+                                               data_prevista='13/02/2021 12'))
+            # Sem previsão de devolução, ocupa do início em diante.
+            self.assertTrue(loja.receberPedido('Ana', 4, 'hora',
+                                               '20/02/2021 12'))
+            self.assertFalse(loja.receberPedido('Jose', 7, 'hora',
+                                                '14/02/2021 12'))
+            self.assertTrue(loja.receberPedido('Jose', 7, 'hora',
+                                               '14/02/2021 12',
+                                               data_prevista='20/02/2021 12'))
+            self.assertFalse(loja.receberPedido('Maria', 3, 'hora',
+                                                '12/02/2021 12',
+                                                data_prevista='12/02/2021 13'))
+            self.assertFalse(loja.receberPedido('Maria', 1, 'hora',
+                                                '12/02/2021 12',
+                                                data_prevista='12/02/2021 12'))
+        self.assertEqual(loja.bicicletasLivres('12/02/2021 0'), 2)
+        self.assertEqual(loja.bicicletasLivres('13/02/2021 12',
+                                               '14/02/2021 12'), 10)
+        self.assertEqual(loja.bicicletasLivres('14/02/2021 12'), 3)
+        self.assertEqual(loja.bicicletasLivres('20/02/2021 12'), 6)
+        self.assertEqual(loja.finalizarConta('Lucas', '12/02/2021 12'),
+                         (True, 140.0))
+        self.assertEqual(loja.bicicletasLivres('12/02/2021 12',
+                                               '14/02/2021 12'), 10)
+
+    def test03LoteVeReservasDoProprioLote(self):
+        loja = Loja(10, self.arquivo, relogio=self.relogio)
+        relatorio = loja.receberPedidos([
+            ('Lucas', 6, 'hora', '11/02/2021 12', None, '11/02/2021 18'),
+            ('Ana', 6, 'hora', '11/02/2021 15', None, '11/02/2021 20'),
+            ('Jose', 6, 'hora', '11/02/2021 18', None, '11/02/2021 20')])
+        self.assertEqual([r['sucesso'] for r in relatorio],
+                         [True, False, True])
+        self.assertEqual(loja.bicicletasLivres('11/02/2021 0'), 4)
+        loja.finalizarContas([('Lucas', '11/02/2021 18'),
+                              ('Jose', '11/02/2021 20')])
+        self.assertEqual(loja.bicicletasLivres('11/02/2021 0'), 10)
+
+    def test04PrevisaoPersistidaEVistaPorOutraLoja(self):
+        loja = Loja(10, self.arquivo, relogio=self.relogio)
+        outra = Loja(10, self.arquivo, relogio=self.relogio)
+        self.assertEqual(outra.bicicletasLivres('11/02/2021 0'), 10)
+        with redirect_stdout(io.StringIO()):
+            loja.receberPedido('Lucas', 7, 'dia', '11/02/2021 12',
+                               data_prevista='12/02/2021 12')
+        self.assertEqual(outra.bicicletasLivres('11/02/2021 0'), 3)
+        self.assertEqual(outra.bicicletasLivres('12/02/2021 12'), 10)
+        loja.registro.compactar()
+        relida = Loja(10, self.arquivo, relogio=self.relogio)
+        self.assertEqual(relida.registro.buscarAberto(1).data_prevista,
+                         horas(2021, 2, 12, 12))
+        self.assertEqual(relida.bicicletasLivres('11/02/2021 0'), 3)
+
+    def test05PrevisaoNoSQLite(self):
+        arquivo_db = os.path.join(self.pasta.name, 'clientes.db')
+        with Loja(armazenamento=ArmazenamentoSQLite(arquivo_db),
+                  relogio=self.relogio) as loja:
+            self.assertTrue(loja.receberPedido('Lucas', 7, 'dia',
+                                               '11/02/2021 12',
+                                               data_prevista='12/02/2021 12'))
+            self.assertTrue(loja.receberPedido('Ana', 5, 'hora',
+                                               '13/02/2021 12',
+                                               data_prevista='13/02/2021 14'))
+        with Loja(armazenamento=ArmazenamentoSQLite(arquivo_db),
+                  relogio=self.relogio) as loja:
+            self.assertEqual(loja.bicicletasLivres('11/02/2021 0'), 3)
+            self.assertEqual(loja.bicicletasLivres('12/02/2021 12'), 5)
+
+    def test06AluguelVencidoContinuaOcupando(self):
+        loja = Loja(10, self.arquivo, relogio=self.relogio)
+        self.assertTrue(loja.efetuarPedido('Ana', 10, 'hora', '11/02/2021 12',
+                                           data_prevista='11/02/2021 14'))
+        self.assertEqual(loja.bicicletasLivres('11/02/2021 15'), 10)
+        # Passou da previsão e Ana não devolveu: nada livre até devolver.
+        self.agora = datetime(2021, 2, 11, 15)
+        self.assertEqual(loja.bicicletasLivres('11/02/2021 15'), 0)
+        resultado = loja.efetuarPedido('Bia', 10, 'hora', '11/02/2021 15',
+                                       data_prevista='11/02/2021 18')
+        self.assertEqual(resultado.erro, CodigoErro.ESTOQUE_INSUFICIENTE)
+        self.assertEqual(Loja(10, self.arquivo, relogio=self.relogio)
+                         .bicicletasLivres('12/02/2021 0'), 0)
+        self.assertTrue(loja.efetuarFechamento('Ana', '11/02/2021 16'))
+        self.assertEqual(loja.bicicletasLivres('11/02/2021 0'), 10)
+        self.assertTrue(loja.efetuarPedido('Bia', 10, 'hora', '11/02/2021 16',
+                                           data_prevista='11/02/2021 18'))
+        # Bia só começa às 16h: o estoque das 15h continua cheio.
+        self.assertEqual(loja.mostrarEstoque(), 10)
+        self.assertEqual(loja.bicicletasLivres('11/02/2021 16'), 0)
+        # Devolvido antes de vencer: a previsão não volta a ocupar.
+        self.assertTrue(loja.efetuarFechamento('Bia', '11/02/2021 17'))
+        self.agora = datetime(2021, 2, 12, 12)
+        self.assertEqual(loja.bicicletasLivres('12/02/2021 12'), 10)
+
+    def test07ReservaNoPassadoEOrdemDosErros(self):
+        loja = Loja(10, self.arquivo, relogio=self.relogio)
+        resultado = loja.efetuarPedido('Ana', 2, 'hora', '10/02/2021 12',
+                                       data_prevista='12/02/2021 12')
+        self.assertEqual(resultado.erro, CodigoErro.PERIODO_INVALIDO)
+        # Sem previsão o pedido é um aluguel registrado, como antes.
+        self.assertTrue(loja.efetuarPedido('Ana', 2, 'hora', '10/02/2021 12'))
+        # Data inválida: estoque e plano são conferidos antes dela.
+        for pedido, codigo in (((11, 'hora'), CodigoErro.ESTOQUE_INSUFICIENTE),
+                               ((1, 'mes'), CodigoErro.PLANO_INEXISTENTE),
+                               ((1, 'hora'), CodigoErro.DATA_INVALIDA)):
+            self.assertEqual(loja.efetuarPedido('Bia', *pedido,
+                                                '31/02/2021 12').erro,
+                             codigo)
+
+    def test08EstoqueAtualIgnoraReservasFuturas(self):
+        loja = Loja(10, self.arquivo, relogio=self.relogio)
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(loja.receberPedido('Lucas', 8, 'dia',
+                                               '11/02/2021 12',
+                                               data_prevista='13/02/2021 12'))
+            self.assertTrue(loja.receberPedido('Jose', 7, 'hora',
+                                               '14/02/2021 12',
+                                               data_prevista='20/02/2021 12'))
+            self.assertEqual(loja.mostrarEstoque(), 2)
+            self.assertEqual(Cliente('Ana', loja).
+                             mostrarBicicletasDisponiveis(), 2)
+        self.assertEqual(loja.finalizarConta('Lucas', '13/02/2021 12'),
+                         (True, 280.0))
+        self.agora = datetime(2021, 2, 15, 12)
+        self.assertEqual(loja.estoqueBikes, 3)
+
+    def test09EstoqueDaEstacaoIgnoraReservasFuturas(self):
+        rede = RedeEstacoes([Estacao('Centro', 10, 0.0, 0.0, bicicletas=5)])
+        loja = Loja(arquivo=self.arquivo, estacoes=rede, relogio=self.relogio)
+        self.assertTrue(loja.receberPedido('Lucas', 3, 'hora',
+                                           '11/02/2021 12', 'Centro',
+                                           data_prevista='13/02/2021 12'))
+        self.assertTrue(loja.receberPedido('Jose', 4, 'hora',
+                                           '14/02/2021 12', 'Centro',
+                                           data_prevista='20/02/2021 12'))
+        self.assertEqual(loja.estoqueEstacao('Centro'), 2)
+        # Jose ocupa a estação só a partir do dia 14.
+        self.assertTrue(loja.receberPedido('Ana', 2, 'hora',
+                                           '12/02/2021 12', 'Centro',
+                                           data_prevista='13/02/2021 12'))
+        self.assertFalse(loja.receberPedido('Bia', 2, 'hora',
+                                            '14/02/2021 12', 'Centro',
+                                            data_prevista='15/02/2021 12'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+from apoioTestes import PastaTemporaria
+from armazenamentoSQLite import ArmazenamentoSQLite
+from emprestimoBicicletas import Loja
+from estacoes import Estacao, RedeEstacoes
+from math import hypot
+from unittest import TestCase, main
+import os
+import random
+
+
+def criarRede():
+    return RedeEstacoes([Estacao('Centro', 5, 0.0, 0.0, bicicletas=3),
+                         Estacao('Praia', 4, 3.0, 4.0),
+                         Estacao('Parque', 2, -1.0, 0.5, bicicletas=0)])
+
+
+class TestesEstacoes(PastaTemporaria, TestCase):
+
+    def test01RetiraEDevolveEmOutraEstacao(self):
+        loja = Loja(arquivo=self.arquivo, estacoes=criarRede())
+        self.assertEqual(loja.mostrarEstoque(), 7)
+        self.assertTrue(loja.receberPedido('Lucas', 2, 'hora', '11/02/2021 12',
+                                           'Centro'))
+        self.assertFalse(loja.receberPedido('Ana', 2, 'hora', '11/02/2021 12',
+                                            'Centro'))
+        self.assertFalse(loja.receberPedido('Ana', 1, 'hora', '11/02/2021 12'))
+        self.assertFalse(loja.receberPedido('Ana', 1, 'hora', '11/02/2021 12',
+                                            'Lua'))
+        self.assertEqual(loja.estoqueEstacao('Centro'), 1)
+        self.assertEqual(loja.finalizarConta('Lucas', '11/02/2021 14',
+                                             'Parque'), (True, 20))
+        self.assertEqual(loja.estoqueEstacao('Centro'), 1)
+        self.assertEqual(loja.estoqueEstacao('Parque'), 2)
+        self.assertEqual(loja.mostrarEstoque(), 7)
+        # O saldo das estações sobrevive a releitura e à compactação.
+        loja.registro.compactar()
+        relida = Loja(arquivo=self.arquivo, estacoes=criarRede())
+        self.assertEqual(relida.estoqueEstacao('Centro'), 1)
+        self.assertEqual(relida.estoqueEstacao('Parque'), 2)
+
+    def test02NaoDevolveEmEstacaoCheia(self):
+        loja = Loja(arquivo=self.arquivo, estacoes=criarRede())
+        self.assertTrue(loja.receberPedido('Lucas', 3, 'hora', '11/02/2021 12',
+                                           'Praia'))
+        self.assertFalse(loja.finalizarConta('Lucas', '11/02/2021 14',
+                                             'Parque'))
+        self.assertFalse(loja.finalizarConta('Lucas', '11/02/2021 14',
+                                             'Centro'))
+        relatorio = loja.finalizarContas([('Lucas', '11/02/2021 14')])
+        self.assertTrue(relatorio[0]['sucesso'])
+        self.assertEqual(loja.estoqueEstacao('Praia'), 4)
+
+    def test03PedidosEmLotePorEstacao(self):
+        loja = Loja(arquivo=self.arquivo, estacoes=criarRede())
+        relatorio = loja.receberPedidos([
+            ('Lucas', 2, 'hora', '11/02/2021 12', 'Centro'),
+            ('Ana', 2, 'hora', '11/02/2021 12', 'Centro'),
+            ('Jose', 2, 'hora', '11/02/2021 12', 'Praia')])
+        self.assertEqual([pedido['sucesso'] for pedido in relatorio],
+                         [True, False, True])
+        relatorio = loja.finalizarContas([
+            ('Lucas', '11/02/2021 13', 'Parque'),
+            ('Jose', '11/02/2021 13', 'Parque')])
+        self.assertEqual([fechamento['sucesso'] for fechamento in relatorio],
+                         [True, False])
+
+    def test04EstacaoMaisProxima(self):
+        loja = Loja(arquivo=self.arquivo, estacoes=criarRede())
+        self.assertEqual(loja.estacaoMaisProxima(-1.0, 0.4), 'Centro')
+        self.assertEqual(loja.estacaoMaisProxima(0.0, 0.0, 4), 'Praia')
+        self.assertIsNone(loja.estacaoMaisProxima(0.0, 0.0, 6))
+
+    def test05GradeIgualABuscaExaustiva(self):
+        sorteio = random.Random(0)
+        rede = RedeEstacoes(tamanho_celula=0.5)
+        for i in range(2000):
+            rede.adicionar(Estacao(f'E{i}', 10, sorteio.uniform(-20, 20),
+                                   sorteio.uniform(-20, 20),
+                                   bicicletas=sorteio.randint(0, 10)))
+
+        def estoque(codigo):
+            return rede[codigo].bicicletas
+
+        for _ in range(200):
+            x, y = sorteio.uniform(-25, 25), sorteio.uniform(-25, 25)
+            qnt = sorteio.randint(1, 10)
+            candidatas = [estacao for estacao in rede
+                          if estacao.bicicletas >= qnt]
+            esperada = min(candidatas,
+                           key=lambda e: hypot(e.x - x, e.y - y))
+            encontrada = rede.maisProxima(x, y, qnt, estoque)
+            self.assertAlmostEqual(hypot(encontrada.x - x, encontrada.y - y),
+                                   hypot(esperada.x - x, esperada.y - y))
+
+    def test07GradeAutomaticaIgualABuscaExaustiva(self):
+        sorteio = random.Random(1)
+        rede = RedeEstacoes()
+        for i in range(5000):
+            rede.adicionar(Estacao(f'E{i}', 10, sorteio.uniform(0, 1000),
+                                   sorteio.uniform(0, 1000),
+                                   bicicletas=sorteio.randint(0, 10)))
+        # Cerca de uma estação por célula.
+        self.assertLess(len(rede), 2 * len(rede.grade))
+
+        def estoque(codigo):
+            return rede[codigo].bicicletas
+
+        # Inclui consultas fora da área e pedidos que poucas atendem.
+        for _ in range(100):
+            x = sorteio.uniform(-500, 1500)
+            y = sorteio.uniform(-500, 1500)
+            qnt = sorteio.choice((1, 5, 10))
+            candidatas = [estacao for estacao in rede
+                          if estacao.bicicletas >= qnt]
+            esperada = min(candidatas,
+                           key=lambda e: hypot(e.x - x, e.y - y))
+            encontrada = rede.maisProxima(x, y, qnt, estoque)
+            self.assertAlmostEqual(hypot(encontrada.x - x, encontrada.y - y),
+                                   hypot(esperada.x - x, esperada.y - y))
+        self.assertIsNone(rede.maisProxima(0.0, 0.0, 11, estoque))
+
+    def test06EstacoesComSQLite(self):
+        arquivo_db = os.path.join(self.pasta.name, 'clientes.db')
+        with Loja(armazenamento=ArmazenamentoSQLite(arquivo_db),
+                  estacoes=criarRede()) as loja:
+            self.assertTrue(loja.receberPedido('Lucas', 2, 'hora',
+                                               '11/02/2021 12', 'Praia'))
+            self.assertTrue(loja.receberPedido('Ana', 2, 'hora',
+                                               '11/02/2021 12', 'Praia'))
+            self.assertEqual(loja.estoqueEstacao('Praia'), 0)
+            self.assertTrue(loja.finalizarConta('Lucas', '11/02/2021 13',
+                                                'Centro'))
+            self.assertTrue(loja.finalizarConta('Ana', '11/02/2021 13'))
+            self.assertEqual(loja.estoqueEstacao('Centro'), 5)
+            self.assertEqual(loja.estoqueEstacao('Praia'), 2)
+            self.assertEqual([(aluguel.estacao_ini, aluguel.estacao_fim)
+                              for aluguel in loja.registro.linhas()],
+                             [('Praia', 'Centro'), ('Praia', 'Praia')])
+
+
+if __name__ == '__main__':
+    main()
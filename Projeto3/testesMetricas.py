@@ -0,0 +1,104 @@
+from apoioTestes import PastaTemporaria
+from contextlib import redirect_stdout
+from emprestimoBicicletas import Loja
+from metricas import LIMITES, METRICAS, Metricas
+from unittest import TestCase, main
+import io
+import json
+
+
+class TestesMetricas(PastaTemporaria, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ativo = METRICAS.ativo
+        METRICAS.limpar()
+
+    def tearDown(self):
+        METRICAS.ativo = self.ativo
+        METRICAS.limpar()
+
+    def test01DesligadasNaoMedem(self):
+        metricas = Metricas()
+        medida = metricas.cronometrado('soma')(lambda a, b: a + b)
+        self.assertEqual(medida(1, 2), 3)
+        with metricas.medir('bloco'):
+            pass
+        metricas.incrementar('evento')
+        self.assertEqual(metricas.paraDicionario(),
+                         {'histogramas': {}, 'contadores': {}})
+
+    def test02HistogramaEContadores(self):
+        metricas = Metricas(ativo=True)
+        for duracao in (0.00003, 0.0004, 0.0004, 3.0, 20.0):
+            metricas.observar('op', duracao)
+        metricas.incrementar('evento', 2)
+        dados = metricas.paraDicionario()
+        op = dados['histogramas']['op']
+        self.assertEqual(op['contagem'], 5)
+        self.assertAlmostEqual(op['soma'], 23.00083)
+        self.assertEqual(op['maximo'], 20.0)
+        self.assertEqual(op['p50'], 0.0005)
+        self.assertEqual(op['p99'], 20.0)
+        self.assertEqual(len(op['baldes']), len(LIMITES) + 1)
+        self.assertEqual(op['baldes']['5e-05'], 1)
+        self.assertEqual(op['baldes']['0.0005'], 3)
+        self.assertEqual(op['baldes']['5.0'], 4)
+        self.assertEqual(op['baldes']['+Inf'], 5)
+        self.assertEqual(dados['contadores'], {'evento': 2})
+        self.assertEqual(json.loads(metricas.paraJSON()), dados)
+
+    def test03ExcecaoTambemEMedida(self):
+        metricas = Metricas(ativo=True)
+
+        @metricas.cronometrado('falha')
+        def falhar():
+            raise ValueError('erro')
+
+        with self.assertRaises(ValueError):
+            falhar()
+        self.assertEqual(
+            metricas.paraDicionario()['histogramas']['falha']['contagem'], 1)
+
+    def test04FormatoPrometheus(self):
+        metricas = Metricas(ativo=True)
+        metricas.observar('loja.receberPedido', 0.002)
+        metricas.incrementar('loja.pedidosRecusados')
+        texto = metricas.paraPrometheus()
+        self.assertIn('# TYPE loja_duracao_segundos histogram\n', texto)
+        self.assertIn('loja_duracao_segundos_bucket{operacao='
+                      '"loja.receberPedido",le="0.001"} 0\n', texto)
+        self.assertIn('loja_duracao_segundos_bucket{operacao='
+                      '"loja.receberPedido",le="0.0025"} 1\n', texto)
+        self.assertIn('loja_duracao_segundos_bucket{operacao='
+                      '"loja.receberPedido",le="+Inf"} 1\n', texto)
+        self.assertIn('loja_duracao_segundos_count{operacao='
+                      '"loja.receberPedido"} 1\n', texto)
+        self.assertIn('# TYPE loja_eventos_total counter\n', texto)
+        self.assertIn('loja_eventos_total{evento="loja.pedidosRecusados"} 1\n',
+                      texto)
+
+    def test05OperacoesDaLoja(self):
+        METRICAS.ativar()
+        loja = Loja(10, self.arquivo)
+        with redirect_stdout(io.StringIO()):
+            loja.receberPedido('Lucas', 2, 'hora', '11/02/2021 12')
+            loja.receberPedido('Ana', 20, 'hora', '11/02/2021 12')
+            loja.finalizarConta('Lucas', '11/02/2021 15')
+        dados = METRICAS.paraDicionario()
+        histogramas = dados['histogramas']
+        self.assertEqual(histogramas['loja.receberPedido']['contagem'], 2)
+        self.assertEqual(histogramas['loja.finalizarConta']['contagem'], 1)
+        self.assertEqual(histogramas['loja.calcularValorConta']['contagem'],
+                         1)
+        self.assertIn('loja.converterData', histogramas)
+        self.assertEqual(
+            histogramas['registro.registrarAbertura']['contagem'], 1)
+        self.assertEqual(
+            histogramas['registro.registrarFechamento']['contagem'], 1)
+        self.assertIn('registro.carregar', histogramas)
+        self.assertEqual(dados['contadores'], {'loja.pedidosRecusados': 1})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+from apoioTestes import PastaTemporaria, horas
+from armazenamento import CABECALHO
+from arquivoHistorico import ArquivoHistorico
+from emprestimoBicicletas import Loja
+from registroAlugueis import RegistroAlugueis
+from unittest import TestCase, main, mock
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+# Códigos dos clientes no cadastro, na ordem em que aparecem.
+LUCAS, ANA, JOSE = 1, 2, 3
+
+
+class TestesRegistro(PastaTemporaria, TestCase):
+
+    def preencher(self, registro):
+        registro.registrarAbertura(LUCAS, 3, 'hora', horas(2021, 2, 11, 12))
+        registro.registrarAbertura(ANA, 1, 'dia', horas(2021, 2, 21, 12))
+        registro.registrarFechamento(LUCAS, horas(2021, 2, 11, 15), 31.5)
+        registro.registrarAbertura(LUCAS, 2, 'hora', horas(2021, 6, 21, 12))
+
+    def test01ReconstroiEstadoPeloDiario(self):
+        self.preencher(RegistroAlugueis(self.arquivo))
+        registro = RegistroAlugueis(self.arquivo)
+        self.assertEqual(sorted(registro.abertos), [LUCAS, ANA])
+        self.assertEqual(registro.bikesAlugadas, 3)
+        self.assertEqual(registro.buscarAberto(LUCAS).qnt_bikes, 2)
+
+    def test02CompactaDiarioNoSnapshot(self):
+        registro = RegistroAlugueis(self.arquivo, limite_diario=3)
+        self.preencher(registro)
+        registro.registrarFechamento(ANA, horas(2021, 2, 22, 12), 25)
+        registro.compactar()
+        self.assertFalse(os.path.exists(registro.diario))
+        with open(self.arquivo, encoding='utf-8') as arquivo:
+            linhas = arquivo.read().splitlines()
+        # Só os abertos ficam no snapshot; os fechados vão para o historico.
+        self.assertEqual(linhas[1:], ['#1,2,hora,451188,0,0,,,0'])
+        with open(os.path.join(self.arquivo + '.historico', '2021-02.csv'),
+                  encoding='utf-8') as particao:
+            self.assertEqual(particao.read().splitlines()[1:], [
+                '#1,3,hora,448068,448071,31.5,,,0',
+                '#2,1,dia,448308,448332,25,,,0'])
+        self.assertEqual(RegistroAlugueis(self.arquivo).bikesAlugadas, 2)
+
+    def test03IgnoraEventoIncompleto(self):
+        self.preencher(RegistroAlugueis(self.arquivo))
+        with open(self.arquivo + '.diario', 'a', encoding='utf-8') as diario:
+            diario.write('F,Ana,2021-02')
+        registro = RegistroAlugueis(self.arquivo)
+        self.assertIsNotNone(registro.buscarAberto(ANA))
+        registro.registrarFechamento(ANA, horas(2021, 2, 22, 12), 25)
+        self.assertEqual(RegistroAlugueis(self.arquivo).bikesAlugadas, 2)
+
+    def test04RecuperaCompactacaoInterrompida(self):
+        self.preencher(RegistroAlugueis(self.arquivo))
+        # Simula queda depois de renomear o diario e antes de trocar o
+        # snapshot.
+        os.replace(self.arquivo + '.diario',
+                   self.arquivo + '.diario.compactando')
+        open(self.arquivo + '.tmp', 'w').close()
+        registro = RegistroAlugueis(self.arquivo)
+        self.assertEqual(registro.bikesAlugadas, 3)
+        self.assertFalse(os.path.exists(self.arquivo + '.tmp'))
+        self.assertFalse(os.path.exists(self.arquivo + '.diario.compactando'))
+
+    def test05SincronizaAlteracoesDeOutroRegistro(self):
+        registro = RegistroAlugueis(self.arquivo)
+        self.assertFalse(registro.sincronizar())
+        self.preencher(RegistroAlugueis(self.arquivo))
+        self.assertTrue(registro.sincronizar())
+        self.assertEqual(registro.bikesAlugadas, 3)
+
+    def test06LeArquivosComDatasNoFormatoAntigo(self):
+        with open(self.arquivo, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(
+                'Cliente,Quantidade_Alugada,Plano,Data_Inicial,Data_Final,'
+                'Total\n'
+                'Lucas,3,hora,2021-02-11 12:00:00,2021-02-11 15:00:00,31.5\n'
+                'Ana,1,dia,2021-02-21 12:00:00,0,0\n')
+        with open(self.arquivo + '.diario', 'w', encoding='utf-8') as diario:
+            diario.write('A,Jose,1,semana,2021-03-05 09:00:00\n')
+        registro = RegistroAlugueis(self.arquivo)
+        self.assertEqual(registro.buscarAberto(ANA).data_ini,
+                         horas(2021, 2, 21, 12))
+        self.assertEqual(registro.buscarAberto(JOSE).data_ini,
+                         horas(2021, 3, 5, 9))
+        self.assertEqual([aluguel.data_fim for aluguel in registro.linhas()],
+                         [horas(2021, 2, 11, 15), None, None])
+
+    def contarEventosGravados(self):
+        if not os.path.exists(self.arquivo + '.diario'):
+            return 0
+        with open(self.arquivo + '.diario', encoding='utf-8') as diario:
+            return len(diario.readlines())
+
+    def test07GravaBufferNoFechamento(self):
+        registro = RegistroAlugueis(self.arquivo, durabilidade='fechamento')
+        self.preencher(registro)
+        self.assertEqual(self.contarEventosGravados(), 0)
+        self.assertEqual(registro.contarBicicletasAlugadas(), 3)
+        self.assertEqual(registro.buscarAberto(LUCAS).qnt_bikes, 2)
+        registro.fechar()
+        self.assertEqual(self.contarEventosGravados(), 4)
+        self.assertEqual(RegistroAlugueis(self.arquivo).bikesAlugadas, 3)
+
+    def test08GravaBufferPorIntervaloOuTamanho(self):
+        registro = RegistroAlugueis(self.arquivo, durabilidade='intervalo',
+                                    intervalo_ms=20, max_buffer=3)
+        self.preencher(registro)
+        # O terceiro evento encheu o buffer; o quarto espera o intervalo.
+        self.assertEqual(self.contarEventosGravados(), 3)
+        time.sleep(0.2)
+        self.assertEqual(self.contarEventosGravados(), 4)
+        # Sem eventos pendentes a trava foi liberada para outro registro.
+        self.assertEqual(RegistroAlugueis(self.arquivo).bikesAlugadas, 3)
+
+    def test09RecusaDurabilidadeInexistente(self):
+        with self.assertRaises(ValueError):
+            RegistroAlugueis(self.arquivo, durabilidade='nunca')
+
+    def test10CargaPeloSnapshotBinario(self):
+        registro = RegistroAlugueis(self.arquivo)
+        self.preencher(registro)
+        registro.registrarAbertura(JOSE, 4, 'semana', horas(2021, 3, 1, 9),
+                                   'Centro', horas(2021, 3, 8, 9))
+        registro.compactar()
+        registro.registrarFechamento(ANA, horas(2021, 2, 22, 12), 25)
+        # Com o binário em dia o csv não é percorrido; só o diario.
+        with mock.patch.object(RegistroAlugueis, '_carregarCSV',
+                               side_effect=AssertionError):
+            relido = RegistroAlugueis(self.arquivo)
+        self.assertEqual(sorted(relido.abertos), [LUCAS, JOSE])
+        self.assertEqual(relido.bikesAlugadas, 6)
+        self.assertEqual(relido.saldoEstacao('Centro'), -4)
+        jose = relido.buscarAberto(JOSE)
+        self.assertEqual((jose.plano, jose.data_ini, jose.data_prevista),
+                         ('semana', horas(2021, 3, 1, 9), horas(2021, 3, 8, 9)))
+        # Mesmo estado montado pelo csv.
+        os.remove(self.arquivo + '.bin')
+        pelo_csv = RegistroAlugueis(self.arquivo)
+        self.assertEqual([aluguel.linha() for aluguel in pelo_csv.linhas()],
+                         [aluguel.linha() for aluguel in relido.linhas()])
+        self.assertEqual(pelo_csv.saldoEstacoes, relido.saldoEstacoes)
+
+    def test11IgnoraSnapshotBinarioDeOutroCSV(self):
+        registro = RegistroAlugueis(self.arquivo)
+        self.preencher(registro)
+        registro.compactar()
+        with open(self.arquivo, 'a', encoding='utf-8') as arquivo:
+            arquivo.write('#4,5,dia,448308,0,0,,,0\n')
+        relido = RegistroAlugueis(self.arquivo)
+        self.assertEqual(relido.bikesAlugadas, 8)
+        # O binário foi regravado para o csv atual.
+        with mock.patch.object(RegistroAlugueis, '_carregarCSV',
+                               side_effect=AssertionError):
+            self.assertEqual(RegistroAlugueis(self.arquivo).bikesAlugadas, 8)
+
+    def test12HistoricoPorParticao(self):
+        registro = RegistroAlugueis(self.arquivo)
+        self.preencher(registro)
+        registro.registrarFechamento(ANA, horas(2021, 3, 2, 12), 25)
+        registro.compactar()
+        registro.registrarFechamento(LUCAS, horas(2021, 6, 21, 14), 10)
+        registro.registrarAbertura(JOSE, 1, 'dia', horas(2021, 7, 1, 9),
+                                   'Centro')
+        registro.registrarFechamento(JOSE, horas(2021, 7, 2, 9), 25, 'Praia')
+        registro.compactar()
+        self.assertEqual(registro.historicoArquivado.particoes(),
+                         ['2021-02', '2021-03', '2021-06', '2021-07'])
+        self.assertEqual([aluguel.cliente for aluguel in registro.linhas()],
+                         [LUCAS, ANA, LUCAS, JOSE])
+        self.assertEqual([aluguel.data_fim for aluguel in registro.historico(
+            horas(2021, 3, 1), horas(2021, 7, 2, 9))],
+            [horas(2021, 3, 2, 12), horas(2021, 6, 21, 14)])
+        # Fechamentos ainda no diario tambem entram no historico.
+        registro.registrarAbertura(ANA, 2, 'hora', horas(2021, 7, 3, 9))
+        registro.registrarFechamento(ANA, horas(2021, 7, 3, 11), 10)
+        self.assertEqual([aluguel.cliente for aluguel in registro.historico(
+            horas(2021, 7, 1))], [JOSE, ANA])
+        # Sem o binário, o saldo das estações vem das partições.
+        os.remove(self.arquivo + '.bin')
+        relido = RegistroAlugueis(self.arquivo)
+        self.assertEqual(relido.saldoEstacoes, {'Centro': -1, 'Praia': 1})
+        self.assertEqual(relido.bikesAlugadas, 0)
+
+    def test13RecuperaArquivamentoInterrompido(self):
+        registro = RegistroAlugueis(self.arquivo)
+        self.preencher(registro)
+        registro.compactar()
+        registro.registrarFechamento(LUCAS, horas(2021, 6, 21, 14), 10)
+        # Simula queda depois de substituir o snapshot e antes de concluir
+        # o arquivamento, com a linha ja acrescentada à partição.
+        with mock.patch.object(ArquivoHistorico, 'concluirArquivamento',
+                               side_effect=OSError):
+            with self.assertRaises(OSError):
+                registro.compactar()
+        with open(registro.preparacao, encoding='utf-8') as preparacao:
+            linha = preparacao.read().splitlines()[-1].split(',', 1)[1]
+        with open(os.path.join(registro.historicoArquivado.pasta,
+                               '2021-06.csv'), 'w',
+                  encoding='utf-8') as particao:
+            particao.write(','.join(CABECALHO) + '\n' + linha + '\n')
+        relido = RegistroAlugueis(self.arquivo)
+        self.assertFalse(os.path.exists(registro.preparacao))
+        self.assertFalse(os.path.exists(registro.diario + '.compactando'))
+        self.assertEqual([(aluguel.cliente, aluguel.data_fim)
+                          for aluguel in relido.linhas()],
+                         [(LUCAS, horas(2021, 2, 11, 15)),
+                          (LUCAS, horas(2021, 6, 21, 14)),
+                          (ANA, None)])
+
+    def test14OutroRegistroDoProcessoNaoEsperaOBuffer(self):
+        registro = RegistroAlugueis(self.arquivo, durabilidade='fechamento')
+        self.preencher(registro)
+        relidos = []
+        # Em outra thread, para o teste falhar em vez de travar.
+        leitura = threading.Thread(target=lambda: relidos.append(
+            RegistroAlugueis(self.arquivo).bikesAlugadas))
+        leitura.start()
+        leitura.join(5)
+        self.assertFalse(leitura.is_alive())
+        # O outro registro gravou o buffer e leu os eventos dele.
+        self.assertEqual(relidos, [3])
+        self.assertEqual(self.contarEventosGravados(), 4)
+        registro.registrarAbertura(JOSE, 1, 'hora', horas(2021, 6, 22, 9))
+        loja = Loja(10, self.arquivo)
+        self.assertEqual(loja.calcularBicicletasAlugadas(), 4)
+        self.assertTrue(loja.efetuarPedido('Maria', 1, 'hora',
+                                           '22/06/2021 10'))
+        registro.fechar()
+        self.assertEqual(RegistroAlugueis(self.arquivo).bikesAlugadas, 5)
+
+    def test15BufferGravadoNaSaidaDoInterpretador(self):
+        codigo = ('from emprestimoBicicletas import Loja\n'
+                  'from registroAlugueis import RegistroAlugueis\n'
+                  'import sys\n'
+                  'loja = Loja(10, armazenamento=RegistroAlugueis(\n'
+                  '    sys.argv[1], durabilidade=sys.argv[2]))\n'
+                  "assert loja.efetuarPedido('Ana', 3, 'hora', "
+                  "'11/02/2021 12')\n")
+        for durabilidade in ('fechamento', 'intervalo'):
+            with self.subTest(durabilidade=durabilidade):
+                arquivo = os.path.join(self.pasta.name,
+                                       f'{durabilidade}.csv')
+                subprocess.run([sys.executable, '-c', codigo, arquivo,
+                                durabilidade], check=True, timeout=60,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+                self.assertEqual(Loja(10, arquivo).mostrarEstoque(), 7)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+from apoioTestes import PastaTemporaria, horas
+from armazenamento import Aluguel
+from contextlib import redirect_stdout
+from datetime import date
+from emprestimoBicicletas import Loja
+from relatorios import gerarRelatorio
+from unittest import TestCase, main
+import io
+import random
+
+
+class TestesRelatorios(PastaTemporaria, TestCase):
+
+    def test01AgregadosDoHistorico(self):
+        relatorio = gerarRelatorio([
+            Aluguel('Lucas', 3, 'hora', horas(2021, 2, 11, 12),
+                    horas(2021, 2, 11, 15), '31.5'),
+            Aluguel('Ana', 1, 'dia', horas(2021, 2, 21, 12),
+                    horas(2021, 2, 22, 12), '25'),
+            Aluguel('Jose', 2, 'semana', horas(2021, 2, 22, 12))], 10)
+        self.assertEqual(relatorio.receita_plano, {'hora': 31.5, 'dia': 25})
+        self.assertEqual(relatorio.bicicletaHoras(), 3 * 3 + 24)
+        self.assertEqual(relatorio.duracaoMedia(), (3 + 24) / 2)
+        self.assertEqual(relatorio.receitaPorDia(),
+                         {date(2021, 2, 11): 31.5, date(2021, 2, 22): 25})
+        self.assertEqual(relatorio.utilizacaoPorDia(),
+                         {date(2021, 2, 11): 9 / 240,
+                          date(2021, 2, 21): 12 / 240,
+                          date(2021, 2, 22): 12 / 240})
+        # 12 dias de historico; às 12h: 3 bicicletas de Lucas e 1 de Ana.
+        por_hora = relatorio.utilizacaoPorHora()
+        self.assertEqual(por_hora[12], 4 / (10 * 12))
+        self.assertEqual(por_hora[15], 1 / (10 * 12))
+
+    def test02AgregadosIncrementaisIguaisAoRecalculo(self):
+        loja = Loja(10, self.arquivo)
+        sorteio = random.Random(0)
+        primeiro = loja.relatorio()
+        with redirect_stdout(io.StringIO()):
+            for rodada in range(2):
+                loja.relatorio()
+                for i in range(40):
+                    nome = f'Cliente{rodada * 100 + i}'
+                    if loja.receberPedido(nome, sorteio.randint(1, 3),
+                                          sorteio.choice(['hora', 'dia']),
+                                          f'{1 + i % 20}/03/2021 8'):
+                        if i % 2:
+                            loja.finalizarConta(nome, f'{1 + i % 20}/03/2021 '
+                                                      f'{9 + i % 10}')
+                        else:
+                            loja.finalizarContas([(nome, '25/03/2021 20')])
+        # Mantido incrementalmente, sem percorrer o registro de novo.
+        self.assertIs(loja.relatorio(), primeiro)
+        self.assertGreater(primeiro.alugueis, 0)
+        self.assertEqual(loja.relatorio().resumo(),
+                         gerarRelatorio(loja.registro.linhas(), 10).resumo())
+
+    def test03RecalculaSeOutroProcessoAlterouORegistro(self):
+        loja = Loja(10, self.arquivo)
+        outra = Loja(10, self.arquivo)
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(loja.relatorio().alugueis, 0)
+            outra.receberPedido('Lucas', 3, 'hora', '11/02/2021 12')
+            outra.finalizarConta('Lucas', '11/02/2021 15')
+        self.assertEqual(loja.relatorio().receitaTotal(), 31.5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+from apoioTestes import PastaTemporaria
+from contextlib import redirect_stdout
+from emprestimoBicicletas import Loja
+from estacoes import Estacao, RedeEstacoes
+from resultados import CodigoErro
+from unittest import TestCase, main
+import io
+import os
+
+
+class TestesResultados(PastaTemporaria, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.loja = Loja(10, self.arquivo)
+
+    def tearDown(self):
+        self.loja.fechar()
+
+    def test01PedidoEFechamentoSemSaida(self):
+        saida = io.StringIO()
+        with redirect_stdout(saida):
+            pedido = self.loja.efetuarPedido('Lucas', 3, 'dia',
+                                             '11/02/2021 12')
+            fechamento = self.loja.efetuarFechamento('Lucas',
+                                                     '12/02/2021 12')
+        self.assertEqual(saida.getvalue(), '')
+        self.assertTrue(pedido)
+        self.assertIsNone(pedido.erro)
+        self.assertEqual(pedido.cliente, 1)
+        self.assertTrue(fechamento)
+        self.assertEqual(fechamento.cliente, 1)
+        self.assertEqual(fechamento.valor, 52.5)
+
+    def test02CodigosDosErros(self):
+        self.loja.efetuarPedido('Lucas', 2, 'hora', '11/02/2021 12')
+        casos = [
+            (('Lucas', 1, 'hora', '11/02/2021 12'),
+             CodigoErro.ALUGUEL_EM_ABERTO),
+            (('A', 1, 'hora', '11/02/2021 12'), CodigoErro.NOME_INVALIDO),
+            (('Ana', 0, 'hora', '11/02/2021 12'),
+             CodigoErro.QUANTIDADE_INVALIDA),
+            (('Ana', '2', 'hora', '11/02/2021 12'),
+             CodigoErro.QUANTIDADE_INVALIDA),
+            (('Ana', 9, 'hora', '11/02/2021 12'),
+             CodigoErro.ESTOQUE_INSUFICIENTE),
+            (('Ana', 1, 'mes', '11/02/2021 12'),
+             CodigoErro.PLANO_INEXISTENTE),
+            (('Ana', 1, 'hora', '31/02/2021 12'), CodigoErro.DATA_INVALIDA),
+            (('Ana', 1, 'hora', '11/02/2021 12', None, '10/02/2021 12'),
+             CodigoErro.PERIODO_INVALIDO),
+            (('Ana', 1, 'hora', '11/02/2021 12', 'Centro'),
+             CodigoErro.ESTACAO_INEXISTENTE),
+            (('Ana', 1, None, '11/02/2021 12'), CodigoErro.DADOS_INVALIDOS)]
+        for argumentos, codigo in casos:
+            with self.subTest(argumentos=argumentos):
+                resultado = self.loja.efetuarPedido(*argumentos)
+                self.assertFalse(resultado)
+                self.assertIs(resultado.erro, codigo)
+                self.assertTrue(resultado.mensagem)
+        self.assertIs(self.loja.efetuarFechamento('Ana', '12/02/2021 12')
+                      .erro, CodigoErro.CLIENTE_NAO_ENCONTRADO)
+        self.assertIs(self.loja.efetuarFechamento('Lucas', '11/02/2021 12')
+                      .erro, CodigoErro.PERIODO_INVALIDO)
+        self.assertEqual(self.loja.calcularBicicletasAlugadas(), 2)
+
+    def test03ClienteAmbiguoEEstacoes(self):
+        with redirect_stdout(io.StringIO()):
+            self.loja.cadastrarCliente('Jose')
+            self.loja.cadastrarCliente('Jose')
+        self.assertIs(self.loja.efetuarPedido('Jose', 1, 'hora',
+                                              '11/02/2021 12').erro,
+                      CodigoErro.CLIENTE_AMBIGUO)
+        rede = RedeEstacoes([Estacao('Centro', 2, 0.0, 0.0),
+                             Estacao('Praia', 2, 3.0, 4.0)])
+        arquivo = os.path.join(self.pasta.name, 'estacoes.csv')
+        with Loja(arquivo=arquivo, estacoes=rede) as loja:
+            self.assertIs(loja.efetuarPedido('Ana', 1, 'hora',
+                                             '11/02/2021 12').erro,
+                          CodigoErro.ESTACAO_OBRIGATORIA)
+            self.assertTrue(loja.efetuarPedido('Ana', 1, 'hora',
+                                               '11/02/2021 12', 'Praia'))
+            self.assertIs(loja.efetuarFechamento('Ana', '11/02/2021 14',
+                                                 'Centro').erro,
+                          CodigoErro.ESTACAO_SEM_VAGAS)
+
+    def test04LotesTrazemCodigo(self):
+        relatorio = self.loja.receberPedidos([
+            ('Lucas', 2, 'hora', '11/02/2021 12'),
+            ('Lucas', 2, 'hora', '11/02/2021 12'),
+            ('Ana', 20, 'hora', '11/02/2021 12')])
+        self.assertEqual([pedido['codigo'] for pedido in relatorio],
+                         [None, CodigoErro.ALUGUEL_EM_ABERTO,
+                          CodigoErro.ESTOQUE_INSUFICIENTE])
+        relatorio = self.loja.finalizarContas([('Lucas', '11/02/2021 14'),
+                                               ('Ana', '11/02/2021 14')])
+        self.assertEqual([conta['codigo'] for conta in relatorio],
+                         [None, CodigoErro.CLIENTE_NAO_ENCONTRADO])
+
+    def test05ConsoleMantemMensagens(self):
+        saida = io.StringIO()
+        with redirect_stdout(saida):
+            self.assertTrue(self.loja.receberPedido('Lucas', 1, 'hora',
+                                                    '11/02/2021 12'))
+            self.assertFalse(self.loja.receberPedido('Ana', 1, 'mes',
+                                                     '11/02/2021 12'))
+            self.assertEqual(self.loja.finalizarConta('Lucas',
+                                                      '11/02/2021 14'),
+                             (True, 10.0))
+        self.assertEqual(saida.getvalue().splitlines(), [
+            'Pedido realizado com sucesso.',
+            'Plano inexistente',
+            "Planos: ('hora', 'dia', 'semana')",
+            'Não foi possível realizar o pedido.',
+            'Valor da conta: R$10.00',
+            'Dados salvos com sucesso!',
+            'Pedido pago e finalizado. Volte sempre.'])
+
+    def test06LoteComRegistroIncompleto(self):
+        relatorio = self.loja.receberPedidos([
+            ('Lucas', 2, 'hora'),
+            None,
+            ('Ana', 1, 'hora', '11/02/2021 12')])
+        self.assertEqual([pedido['sucesso'] for pedido in relatorio],
+                         [False, False, True])
+        self.assertEqual([pedido['codigo'] for pedido in relatorio[:2]],
+                         [CodigoErro.DADOS_INVALIDOS] * 2)
+        self.assertEqual([pedido['cliente'] for pedido in relatorio],
+                         ['Lucas', None, 'Ana'])
+        relatorio = self.loja.finalizarContas([('Ana',),
+                                               ('Ana', '11/02/2021 14')])
+        self.assertEqual([conta['codigo'] for conta in relatorio],
+                         [CodigoErro.DADOS_INVALIDOS, None])
+        self.assertEqual(self.loja.calcularBicicletasAlugadas(), 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+from apoioTestes import PastaTemporaria, horas
+from armazenamentoSQLite import ArmazenamentoSQLite, importarCSV
+from emprestimoBicicletas import Loja
+from registroAlugueis import RegistroAlugueis
+from unittest import TestCase, main
+import os
+import sqlite3
+
+
+class TestesSQLite(PastaTemporaria, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.arquivo_db = os.path.join(self.pasta.name, 'clientes.db')
+
+    def test01LojaComSQLite(self):
+        with Loja(armazenamento=ArmazenamentoSQLite(self.arquivo_db)) as loja:
+            self.assertTrue(loja.receberPedido('Lucas', 3, 'hora',
+                                               '11/02/2021 12'))
+            self.assertFalse(loja.receberPedido('Lucas', 1, 'hora',
+                                                '11/02/2021 13'))
+            self.assertEqual(loja.mostrarEstoque(), 7)
+            self.assertEqual(loja.finalizarConta('Lucas', '11/02/2021 15'),
+                             (True, 31.5))
+            self.assertEqual(loja.mostrarEstoque(), 10)
+
+    def test02ImportaCSV(self):
+        # Diario gravado antes do cadastro, com o nome no lugar do código
+        # (inclusive um nome só de dígitos).
+        with open(self.arquivo + '.diario', 'w',
+                  encoding='utf-8') as diario:
+            diario.write('A,Lucas,3,hora,448068,,0\n'
+                         'A,Ana,1,dia,448308,,0\n'
+                         'A,12,2,hora,448308,,0\n'
+                         'F,Lucas,448071,31.5,\n')
+        RegistroAlugueis(self.arquivo)
+        self.assertEqual(importarCSV(self.arquivo, self.arquivo_db), 3)
+        banco = ArmazenamentoSQLite(self.arquivo_db)
+        self.assertEqual(banco.contarBicicletasAlugadas(), 3)
+        # Os nomes gravados no diario viram códigos do cadastro importado.
+        lucas, = banco.clientes.codigosDoNome('Lucas')
+        ana, = banco.clientes.codigosDoNome('Ana')
+        doze, = banco.clientes.codigosDoNome('12')
+        self.assertEqual((lucas, ana, doze), (1, 2, 3))
+        self.assertIsNone(banco.buscarAberto(lucas))
+        self.assertEqual(banco.buscarAberto(ana).data_ini,
+                         horas(2021, 2, 21, 12))
+        self.assertEqual(banco.buscarAberto(doze).qnt_bikes, 2)
+        self.assertIsNone(banco.buscarAberto(12))
+        banco.fechar()
+
+    def test03LinhasPaginadas(self):
+        banco = ArmazenamentoSQLite(self.arquivo_db)
+        banco.registrarAberturas([(i, 1, 'hora', 448068 + i)
+                                  for i in range(5)])
+        banco.registrarFechamento(1, 448100, 10)
+        alugueis = list(banco.linhas(tamanho_pagina=2))
+        self.assertEqual([aluguel.cliente for aluguel in alugueis],
+                         list(range(5)))
+        self.assertEqual(alugueis[1].data_fim, 448100)
+        banco.registrarFechamento(3, 448090, 10)
+        self.assertEqual([aluguel.cliente for aluguel
+                          in banco.historico(448090, 448101)],
+                         [3, 1])
+        self.assertEqual([aluguel.cliente for aluguel
+                          in banco.historico(ate=448100)], [3])
+        banco.fechar()
+
+    def test04ConsultasUsamIndices(self):
+        banco = ArmazenamentoSQLite(self.arquivo_db)
+        for consulta in ('SELECT * FROM alugueis '
+                         'WHERE cliente = 1 AND aberto = 1',
+                         'SELECT SUM(quantidade) FROM alugueis '
+                         'WHERE aberto = 1',
+                         'SELECT * FROM alugueis WHERE aberto = 0 '
+                         'AND data_final >= 0 AND data_final < 10'):
+            plano = banco.conexao.execute(
+                'EXPLAIN QUERY PLAN ' + consulta).fetchall()
+            self.assertIn('USING', plano[0][-1])
+        banco.fechar()
+
+    def test05MigraColunaClienteParaInteiro(self):
+        # Banco anterior ao cadastro: a coluna cliente guarda nomes, mesmo
+        # os só de dígitos.
+        antigo = sqlite3.connect(self.arquivo_db)
+        antigo.executescript(
+            'CREATE TABLE alugueis (id INTEGER PRIMARY KEY, '
+            'cliente TEXT NOT NULL, quantidade INTEGER NOT NULL, '
+            'plano TEXT NOT NULL, data_inicial INTEGER NOT NULL, '
+            'data_final INTEGER NOT NULL DEFAULT 0, '
+            "total TEXT NOT NULL DEFAULT '0', "
+            'aberto INTEGER NOT NULL DEFAULT 1);'
+            "INSERT INTO alugueis (cliente, quantidade, plano, data_inicial) "
+            "VALUES ('Lucas', 3, 'hora', 448068), ('12', 2, 'dia', 448070);")
+        antigo.close()
+        banco = ArmazenamentoSQLite(self.arquivo_db)
+        self.assertEqual(banco.conexao.execute(
+            'SELECT DISTINCT typeof(cliente) FROM alugueis').fetchall(),
+            [('integer',)])
+        self.assertEqual(banco.clientes.codigosDoNome('12'), [2])
+        self.assertEqual(banco.buscarAberto(1).qnt_bikes, 3)
+        self.assertEqual(banco.buscarAberto(2).qnt_bikes, 2)
+        self.assertEqual(banco.conexao.execute(
+            'PRAGMA user_version').fetchone()[0], 2)
+        banco.registrarAbertura(3, 1, 'hora', 448071)
+        banco.fechar()
+        # Banco com os códigos gravados como texto (user_version 1).
+        versao1 = sqlite3.connect(self.arquivo_db)
+        versao1.executescript(
+            "UPDATE alugueis SET cliente = CAST(cliente AS TEXT);"
+            'PRAGMA user_version = 1;')
+        versao1.close()
+        banco = ArmazenamentoSQLite(self.arquivo_db)
+        self.assertEqual(banco.conexao.execute(
+            'SELECT cliente, typeof(cliente) FROM alugueis ORDER BY id')
+            .fetchall(), [(1, 'integer'), (2, 'integer'), (3, 'integer')])
+        self.assertEqual(len(banco.clientes), 2)
+        self.assertEqual(banco.contarBicicletasAlugadas(), 6)
+        banco.fechar()
+
+
+if __name__ == '__main__':
+    main()
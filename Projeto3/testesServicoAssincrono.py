@@ -0,0 +1,81 @@
+from apoioTestes import PastaTemporaria
+from emprestimoBicicletas import Loja
+from servicoAssincrono import ServicoAssincrono
+from unittest import IsolatedAsyncioTestCase, main
+import asyncio
+
+
+class TestesServicoAssincrono(PastaTemporaria, IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.loja = Loja(10, self.arquivo)
+
+    def tearDown(self):
+        self.loja.fechar()
+
+    async def test01PedidosConcorrentesNaoPassamDoEstoque(self):
+        async with ServicoAssincrono(self.loja) as servico:
+            resultados = await asyncio.gather(*(
+                servico.alugar(f'Cliente{i}', 1 + i % 3, 'hora',
+                               '11/02/2021 12') for i in range(300)))
+            alugadas = sum(1 + i % 3 for i, resultado in enumerate(resultados)
+                           if resultado['sucesso'])
+            self.assertLessEqual(alugadas, 10)
+            self.assertEqual(await servico.estoque(), 10 - alugadas)
+        # O que foi gravado é o mesmo que outra loja lê do arquivo.
+        self.assertEqual(Loja(10, self.arquivo).mostrarEstoque(),
+                         10 - alugadas)
+
+    async def test02MantemAOrdemDosPedidos(self):
+        async with ServicoAssincrono(self.loja) as servico:
+            aluguel, repetido, fechamento, desconhecido = await asyncio.gather(
+                servico.alugar('Lucas', 3, 'hora', '11/02/2021 12'),
+                servico.alugar('Lucas', 1, 'hora', '11/02/2021 12'),
+                servico.finalizar('Lucas', '11/02/2021 15'),
+                servico.finalizar('Ana', '11/02/2021 15'))
+        self.assertTrue(aluguel['sucesso'])
+        self.assertFalse(repetido['sucesso'])
+        self.assertEqual(fechamento['valor'], 31.5)
+        self.assertEqual(desconhecido['erro'], 'Cliente não encontrado.')
+        self.assertEqual(self.loja.mostrarEstoque(), 10)
+
+    async def test03ServicoEncerradoRecusaPedidos(self):
+        servico = ServicoAssincrono(self.loja)
+        with self.assertRaises(RuntimeError):
+            await servico.alugar('Lucas', 1, 'hora', '11/02/2021 12')
+
+    async def test04PedidoDepoisDoEncerramentoERecusado(self):
+        servico = ServicoAssincrono(self.loja)
+        servico.iniciar()
+        antes = asyncio.create_task(
+            servico.alugar('Lucas', 1, 'hora', '11/02/2021 12'))
+        await asyncio.sleep(0)
+        encerramento = asyncio.create_task(servico.encerrar())
+        await asyncio.sleep(0)
+        # Enquanto o escritor termina o último lote.
+        with self.assertRaises(RuntimeError):
+            await servico.alugar('Ana', 1, 'hora', '11/02/2021 12')
+        await asyncio.wait_for(encerramento, 5)
+        self.assertTrue((await antes)['sucesso'])
+        self.assertEqual(self.loja.mostrarEstoque(), 9)
+
+    async def test05IniciarDuasVezesERecusado(self):
+        servico = ServicoAssincrono(self.loja)
+        servico.iniciar()
+        pedido = asyncio.create_task(
+            servico.alugar('Lucas', 1, 'hora', '11/02/2021 12'))
+        await asyncio.sleep(0)
+        with self.assertRaises(RuntimeError):
+            servico.iniciar()
+        await servico.encerrar()
+        self.assertTrue((await pedido)['sucesso'])
+        # Depois de encerrado pode ser iniciado de novo.
+        async with servico:
+            self.assertTrue((await servico.alugar(
+                'Ana', 1, 'hora', '11/02/2021 12'))['sucesso'])
+        self.assertEqual(self.loja.mostrarEstoque(), 8)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class _EstadoTrava(object):
+    """
+    Dono da trava de um caminho dentro do processo e, se ele a estiver
+    retendo fora de uso (ver TravaArquivo.reter), a função que a libera.
+    """
+    __slots__ = ('condicao', 'dono', 'liberarRetida')
+
+    def __init__(self):
+        self.condicao = threading.Condition()
+        self.dono = None
+        self.liberarRetida = None
+
+
+class TravaArquivo(object):
+    """
+    Trava exclusiva entre processos, feita sobre um arquivo auxiliar
+    (flock no Linux/macOS, msvcrt.locking no Windows). Dentro de um mesmo
+    processo as TravaArquivo do mesmo caminho se revezam por uma condição
+    compartilhada antes do flock: quem pede a trava espera o dono liberá-la
+    ou, se o dono a estiver retendo fora de uso (reter), pede a ele que a
+    libere, em vez de esperar para sempre no flock.
+    """
+    # Estado de cada caminho (absoluto) neste processo.
+    _estados = {}
+    _travaEstados = threading.Lock()
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = None
+        with self._travaEstados:
+            self._estado = self._estados.setdefault(os.path.abspath(caminho),
+                                                    _EstadoTrava())
+
+    def adquirir(self) -> None:
+        estado = self._estado
+        while True:
+            with estado.condicao:
+                while estado.dono is not None and \
+                        estado.liberarRetida is None:
+                    estado.condicao.wait()
+                if estado.dono is None:
+                    estado.dono = self
+                    break
+                liberar, estado.liberarRetida = estado.liberarRetida, None
+            # Fora da condição: liberar() do dono chama liberar desta
+            # classe, que a notifica.
+            liberar()
+        try:
+            self._arquivo = open(self.caminho, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_EX)
+            else:
+                self._arquivo.seek(0)
+                msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+            self._soltar()
+            raise
+
+    def liberar(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+        else:
+            self._arquivo.seek(0)
+            msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+        self._arquivo.close()
+        self._arquivo = None
+        self._soltar()
+
+    def reter(self, liberar) -> None:
+        """
+        Marca a trava adquirida como retida fora de uso: outra TravaArquivo
+        do mesmo caminho neste processo chama liberar() (que deve acabar em
+        liberar desta trava) em vez de esperar.
+        :param liberar: função sem argumentos que libera a trava.
+        """
+        with self._estado.condicao:
+            self._estado.liberarRetida = liberar
+            self._estado.condicao.notify_all()
+
+    def retomar(self) -> None:
+        """
+        Volta a usar a trava retida por reter(): ninguém mais pede a sua
+        liberação até a próxima chamada a reter().
+        """
+        with self._estado.condicao:
+            self._estado.liberarRetida = None
+
+    def _soltar(self) -> None:
+        with self._estado.condicao:
+            self._estado.dono = None
+            self._estado.liberarRetida = None
+            self._estado.condicao.notify_all()
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, *erro):
+        self.liberar()